@@ -0,0 +1,299 @@
+"""Headless JSON HTTP API for notes generation, beside the Streamlit UI.
+
+    python api.py --host 0.0.0.0 --port 8000
+
+Requests become background jobs in the same job table and caches as the UI
+(everything under ``TUBENOTES_CACHE_DIR``), so identical requests from the
+UI, other tools and other API workers share one generation. Run several
+workers against a shared cache directory to scale out behind a load balancer;
+the workers must all run on one host, because the SQLite files use WAL mode,
+which does not work over network filesystems. A worker that dies leaves its
+jobs to be taken over once their lease lapses (see ``jobs``).
+
+    POST /notes                {"url": ..., "format": ..., "lang": "en"}  -> 202 job
+    GET  /jobs/<id>            poll a job; "notes" is set once it is done
+    GET  /jobs/<id>/stream     newline-delimited JSON events until the job ends
+    GET  /jobs/<id>/export     rendered notes (?format=html, md or html.gz)
+    GET  /library?q=...        search saved notes (most recent without ``q``)
+    GET  /library/<id>         one saved entry with its notes
+    GET  /formats              notes formats and languages
+    GET  /metrics              Prometheus text metrics
+    GET  /healthz
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from export import export_formats
+from jobs import ACTIVE_STATUSES, get_job_queue
+from library import get_library
+from llm import configure
+from metrics import prometheus_text
+from prompts import LANGUAGES, LANGUAGE_NAMES, NOTES_FORMAT_PROMPTS, custom_prompt
+from transcripts import get_video_id, is_video_id, link_timestamps
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.5
+MAX_BODY_BYTES = 64 * 1024
+WAIT_TIMEOUT_SECONDS = float(os.environ.get("TUBENOTES_API_WAIT_TIMEOUT", 600))
+
+
+class APIError(Exception):
+    """An error reported to the client as ``{"error": message, "kind": kind}``."""
+
+    def __init__(self, status, message, kind="bad_request"):
+        super().__init__(message)
+        self.status = status
+        self.kind = kind
+
+
+def string_field(body, name, default=None):
+    """``body[name]`` if it is a string (``default`` when missing); anything else is a 400."""
+    value = body.get(name, default)
+    if value is not None and not isinstance(value, str):
+        raise APIError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a string.")
+    return value
+
+
+def int_param(query, name, default, minimum=1, maximum=None):
+    """Integer query parameter, clamped to ``maximum``; a non-integer or too small value is a 400."""
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer.")
+    if value < minimum:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"'{name}' must be at least {minimum}.")
+    return min(value, maximum) if maximum is not None else value
+
+
+def parse_notes_request(body):
+    """Validate a ``POST /notes`` body; return ``(video_id, notes_format, prompt, lang_code, single_pass)``."""
+    url = string_field(body, "url")
+    video_id = string_field(body, "video_id") or (get_video_id(url) if url else None)
+    if not is_video_id(video_id):
+        raise APIError(HTTPStatus.BAD_REQUEST, "Provide a valid YouTube 'url' or 'video_id'.")
+
+    notes_format = string_field(body, "format")
+    if notes_format == "Custom Prompt":
+        if not string_field(body, "prompt"):
+            raise APIError(HTTPStatus.BAD_REQUEST, "'Custom Prompt' needs a 'prompt'.")
+        prompt = custom_prompt(body["prompt"])
+    elif notes_format in NOTES_FORMAT_PROMPTS:
+        prompt = NOTES_FORMAT_PROMPTS[notes_format]
+    else:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"Unknown format {notes_format!r}; see GET /formats.")
+
+    lang = string_field(body, "lang", "en")
+    lang_code = LANGUAGES.get(lang, lang)
+    if lang_code not in LANGUAGE_NAMES:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"Unknown language {lang!r}; see GET /formats.")
+    return video_id, notes_format, prompt, lang_code, bool(body.get("single_pass", True))
+
+
+def job_view(job):
+    """Public JSON shape of a job."""
+    view = {
+        "id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "video_id": job["video_id"],
+        "format": job["notes_format"],
+        "lang": job["lang"],
+        "plan": job["plan"],
+        "links": {
+            "self": f"/jobs/{job['id']}",
+            "stream": f"/jobs/{job['id']}/stream",
+            "export": f"/jobs/{job['id']}/export",
+        },
+    }
+    if job["status"] == "done":
+        view["notes"] = job["result"]
+    elif job["status"] == "failed":
+        view["error"] = {"message": job["error"], "kind": job["error_kind"]}
+    return view
+
+
+class NotesAPIHandler(BaseHTTPRequestHandler):
+    server_version = "TubeNotesAPI/1.0"
+
+    # ---- plumbing ----
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise APIError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise APIError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be JSON.")
+        if not isinstance(body, dict):
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+        return body
+
+    def _job(self, job_id):
+        job = get_job_queue().get(job_id)
+        if job is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"No job {job_id!r} (unknown or expired).", "not_found")
+        return job
+
+    def _dispatch(self, routes):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            for pattern, handler in routes:
+                if len(pattern) == len(parts) and all(p == "*" or p == q for p, q in zip(pattern, parts)):
+                    return handler(*[q for p, q in zip(pattern, parts) if p == "*"], query)
+            raise APIError(HTTPStatus.NOT_FOUND, f"No route for {self.command} {url.path}.", "not_found")
+        except APIError as e:
+            self._json(e.status, {"error": str(e), "kind": e.kind})
+        except Exception as e:
+            logger.exception("request failed: %s %s", self.command, self.path)
+            self._json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e), "kind": "internal"})
+
+    def do_GET(self):
+        self._dispatch([
+            (("healthz",), lambda query: self._json(HTTPStatus.OK, {"status": "ok"})),
+            (("formats",), self.get_formats),
+            (("metrics",), self.get_metrics),
+            (("jobs", "*"), self.get_job),
+            (("jobs", "*", "stream"), self.stream_job),
+            (("jobs", "*", "export"), self.export_job),
+            (("library",), self.search_library),
+            (("library", "*"), self.get_library_entry),
+        ])
+
+    def do_POST(self):
+        self._dispatch([(("notes",), self.post_notes)])
+
+    # ---- endpoints ----
+    def get_formats(self, query):
+        self._json(HTTPStatus.OK, {
+            "formats": list(NOTES_FORMAT_PROMPTS) + ["Custom Prompt"],
+            "languages": LANGUAGES,
+        })
+
+    def get_metrics(self, query):
+        self._send(HTTPStatus.OK, prometheus_text().encode("utf-8"), "text/plain; version=0.0.4")
+
+    def post_notes(self, query):
+        body = self._read_json()
+        video_id, notes_format, prompt, lang_code, single_pass = parse_notes_request(body)
+        job_id = get_job_queue().submit(video_id, notes_format, prompt, lang_code, single_pass)
+        if body.get("wait"):
+            # Synchronous mode for simple clients: block until the job ends.
+            deadline = time.monotonic() + WAIT_TIMEOUT_SECONDS
+            job = self._job(job_id)
+            while job["status"] in ACTIVE_STATUSES and time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                job = self._job(job_id)
+            status = HTTPStatus.ACCEPTED if job["status"] in ACTIVE_STATUSES else HTTPStatus.OK
+            return self._json(status, job_view(job))
+        self._json(HTTPStatus.ACCEPTED, job_view(self._job(job_id)))
+
+    def get_job(self, job_id, query):
+        self._json(HTTPStatus.OK, job_view(self._job(job_id)))
+
+    def stream_job(self, job_id, query):
+        """One JSON object per line whenever the job changes; notes text arrives as deltas."""
+        job = self._job(job_id)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        sent_text, last_event = "", None
+        while True:
+            event = {"status": job["status"], "stage": job["stage"], "progress": job["progress"]}
+            text = job["result"] if job["status"] == "done" else job["partial"] or ""
+            if text.startswith(sent_text) and len(text) > len(sent_text):
+                event["delta"] = text[len(sent_text):]
+                sent_text = text
+            elif text and not text.startswith(sent_text):
+                # The partial text was rewritten (e.g. after translation): resend it whole.
+                event["reset"] = text
+                sent_text = text
+            if job["status"] == "failed":
+                event["error"] = {"message": job["error"], "kind": job["error_kind"]}
+            if event != last_event:
+                self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                last_event = event
+            if job["status"] not in ACTIVE_STATUSES:
+                return
+            time.sleep(POLL_SECONDS)
+            job = self._job(job_id)
+
+    def export_job(self, job_id, query):
+        job = self._job(job_id)
+        if job["status"] != "done":
+            raise APIError(HTTPStatus.CONFLICT, f"Job is {job['status']}, not done.", "not_ready")
+        exports = export_formats(link_timestamps(job["result"], job["video_id"]), f"📘 {job['notes_format']}")
+        extension = query.get("format", "html")
+        if extension not in exports:
+            raise APIError(HTTPStatus.BAD_REQUEST, f"Unknown export format {extension!r}; use {', '.join(exports)}.")
+        content, mime = exports[extension]
+        self._send(HTTPStatus.OK, content, mime, {
+            "Content-Disposition": f'attachment; filename="{job["video_id"]}_notes.{extension}"',
+        })
+
+    def search_library(self, query):
+        limit = int_param(query, "limit", 20, maximum=100)
+        library = get_library()
+        entries = library.search(query["q"], limit) if query.get("q") else library.recent(limit)
+        self._json(HTTPStatus.OK, {"entries": entries, "total": library.count()})
+
+    def get_library_entry(self, entry_id, query):
+        entry = get_library().get(entry_id)
+        if entry is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"No library entry {entry_id!r}.", "not_found")
+        self._json(HTTPStatus.OK, entry)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve TubeNotes AI notes generation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("TUBENOTES_API_PORT", 8000)))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    configure()
+    get_job_queue()  # recover this worker's unfinished jobs before taking traffic
+    server = ThreadingHTTPServer((args.host, args.port), NotesAPIHandler)
+    server.daemon_threads = True
+    logger.info("TubeNotes API listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
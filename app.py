@@ -1,323 +1,38 @@
 import streamlit as st
-from dotenv import load_dotenv
 import os
-import google.generativeai as genai
-from urllib.parse import urlparse, parse_qs
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled, _errors
-import tempfile
-import re
-import html
+import time
+from concurrent.futures import as_completed
+from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, _errors
+
+from transcripts import (
+    Transcript, cancel_prefetch, fetch_transcript, get_video_id, is_video_id, link_timestamps,
+    prefetch_transcript,
+)
+from llm import DEFAULT_MODEL, configure, text_digest
+from preprocess import preprocess_segments
+from pipeline import PIPELINE_STAGES, generate_notes, translate_notes
+from service import get_service, run as run_async, submit as submit_async
+from metrics import StageProgress, prometheus_text, summary as metrics_summary
+from jobs import ACTIVE_STATUSES, get_job_queue
+from export import export_bundle, export_formats
+from library import get_library
+from rate_limit import gemini_limiter
+from hedging import gemini_dispatcher
+from prompts import LANGUAGES, LANGUAGE_NAMES, NOTES_FORMAT_PROMPTS, custom_prompt
+from routing import describe_plan
 
 # Make sure Streamlit listens on the correct port when running on Render
 port = int(os.environ.get("PORT", 8501))
 
+# How often the page re-checks a background job
+JOB_POLL_SECONDS = 1.0
+
 # =========================
 # INITIAL SETUP
 # =========================
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-LANGUAGES = {
-    "English": "en",
-    "Hindi": "hi",
-    "Spanish": "es",
-    "French": "fr",
-    "German": "de",
-    "Chinese": "zh",
-    "Japanese": "ja",
-    "Russian": "ru",
-    "Portuguese": "pt",
-    "Arabic": "ar"
-}
-
-# Notes format prompts
-NOTES_FORMAT_PROMPTS = {
-    "Technical Notes": (                                
-        "You are an expert technical summarizer specializing in programming, software development, AI/ML, "
-        "Data Scientist, and related technologies.\n\n"
-        "Your task is to analyze the transcript and produce comprehensive, developer-focused technical notes "
-        "that accurately reflect all concepts, workflows, implementations, and examples described in the video.\n\n"
-
-        "⚙️ Output Requirements:\n"
-            "1. Cover all content explained in the video, including theory, implementation steps, workflows, edge cases, and reasoning.\n"
-            "2. Clearly mention all libraries, frameworks, APIs, tools, commands, configurations, and environments referenced.\n"
-            "3. Provide step-by-step technical breakdowns for setups, integrations, algorithms, or deployments.\n"
-            "4. Include code snippets exactly as shown or implied in the transcript, formatted using fenced triple-backtick blocks "
-            "   with the appropriate language (e.g., ```python, ```bash, ```javascript).\n"
-            "5. Explain the purpose and reasoning behind important techniques, patterns, or architectural decisions when provided.\n"
-            "6. Maintain the chronological or logical structure of the video so the notes read like well-organized documentation.\n"
-            "7. Use clear Markdown headings, lists, and sub-sections to improve readability.\n"
-            "8. When explicitly supported by the transcript, include simple Mermaid diagrams for architecture or process flows, "
-            "   wrapped in triple-backtick blocks.\n\n"
-
-        "Do Not:\n"
-            "Add or assume information not supported by the transcript.\n"
-            "Omit important details, even if repetitive; reorganize them instead of removing them.\n"
-            "Introduce awkward sentence breaks or unnatural formatting.\n"
-            "Add diagrams that are not directly supported by the content.\n\n"
-
-        "Do:\n"
-            "Normalize formatting and use clean Markdown.\n"
-            "Use bullet points only when they improve clarity.\n"
-            "Reorganize and refine content while preserving every technical detail.\n"
-            "Ensure correctness, grammatical quality, and professional writing.\n"
-            "If multiple pieces of code appear throughout the transcript, include a 'Full Code' or 'Complete Example' section at the end.\n\n"
-
-        "Structure your output exactly in the following format:\n\n"
-
-        "### Video Summary\n"
-        "Provide a 3–5 line overview describing the purpose and goals of the video.\n\n"
-
-        "### Key Concepts\n"
-            "Bullet points listing key ideas, definitions, principles, patterns, and technologies discussed.\n\n"
-
-        "### Topic by Topic Analysis\n"
-            "1. Sequential, numbered explanations of each workflow, setup step, algorithm, configuration, or implementation "
-            "   in the order presented in the video.\n\n"
-            "2. Provide Mermaid diagrams only when the transcript clearly supports a visual architecture or process representation.\n\n"
-            "3. Explain code with proper comments and explanation\n\n"
-        "### Conclusion\n"
-            "Write a brief, well-structured conclusion summarizing the technical outcome.\n\n"
-        "Transcript:\n\n"
-    ),
-
-    # "General Notes Summary": (
-    #     "You are a clear, friendly explainer creating structured notes for a general (non-technical) audience.\n\n"
-    #     "Your task is to read the transcript and produce a well-organized general summary that captures all key ideas, "
-    #     "arguments, examples, and practical advice from the video in simple language.\n\n"
-    #     "⚙️ Output Requirements:\n"
-    #     "1. Cover all topics discussed in the video, including explanations, examples, stories, and conclusions.\n"
-    #     "2. Use plain, accessible language that someone without a technical background can understand.\n"
-    #     "3. Group related ideas together under meaningful headings so the notes feel organized, not fragmented.\n"
-    #     "4. Use bullet points and numbered lists only where they help clarity and readability.\n"
-    #     "5. Maintain the natural flow of the video (introduction → main sections → conclusion).\n"
-    #     "6. Do not add your own opinions or assumptions; stay faithful to what the transcript actually says.\n\n"
-    #     "🛑 Do not:\n"
-    #     "- Introduce new content, opinions, or examples that are not in the transcript.\n"
-    #     "- Overload the notes with unnecessary formatting or overly long bullet lists.\n\n"
-    #     "✅ Do:\n"
-    #     "- Rewrite and organize the content so it is clearer and less repetitive than the raw transcript.\n"
-    #     "- Fix grammar and punctuation so the notes read smoothly.\n"
-    #     "- Ensure every major topic, subtopic, and example mentioned in the video appears somewhere in the notes.\n\n"
-    #     "📘 Structure your output as follows:\n\n"
-    #     "### 📺 Video Overview\n"
-    #     "A short 3–4 line description of what the video is about, who it is for, and what it covers.\n\n"
-    #     "### 🗂️ Main Ideas & Topics\n"
-    #     "- Bullet points summarizing the main ideas, themes, and arguments.\n\n"
-    #     "### 🧩 Important Details & Examples\n"
-    #     "- Briefly describe any important explanations, stories, demonstrations, or case studies from the video.\n\n"
-    #     "### ✅ Practical Takeaways\n"
-    #     "- List the key lessons, suggestions, or action points that viewers can apply.\n\n"
-    #     "### 🧾 Summary in One Paragraph\n"
-    #     "A final, concise paragraph that wraps up the entire video in simple terms.\n\n"
-    #     "Transcript:\n\n"
-    # ),
-
-    # "Coding Notes Summary": (
-    #     "You are a senior software engineer documenting a programming or coding tutorial.\n\n"
-    #     "Your task is to analyze the transcript and create precise, implementation-oriented coding notes that include all "
-    #     "code, commands, and step-by-step guidance shown in the video.\n\n"
-    #     "⚙️ Output Requirements:\n"
-    #     "1. Capture every important coding action: file creation, function/class definitions, configuration changes, commands, and tests.\n"
-    #     "2. Include all code snippets exactly as described or shown, formatted using fenced code blocks with the correct language "
-    #     "(for example, ```python, ```javascript, ```bash, ```html).\n"
-    #     "3. Preserve the order of development: setup → core implementation → enhancements → testing/debugging → final result.\n"
-    #     "4. Mention all tools, libraries, frameworks, packages, versions, and environment details that appear in the transcript.\n"
-    #     "5. When the transcript explains why something is done a certain way, include that reasoning briefly.\n"
-    #     "6. If multiple files or components are involved, clearly separate sections by file or component name.\n"
-    #     "7. Optionally use simple Mermaid diagrams for data flow, component interactions, or architecture if these flows are clearly "
-    #     "shown in the transcript.\n\n"
-    #     "🛑 Do not:\n"
-    #     "- Invent code that is not supported by the transcript.\n"
-    #     "- Change the meaning or intent of the demonstrated code.\n"
-    #     "- Omit small but important details like flags, parameters, or file paths.\n\n"
-    #     "✅ Do:\n"
-    #     "- Clean up minor transcript artifacts (like stray `**` or broken lines) while keeping the code logically identical.\n"
-    #     "- Ensure the final notes could be used by a developer to reproduce the demo or project from scratch.\n"
-    #     "- At the end, if the tutorial builds up a final program or project, provide a \"Full Code\" section with the complete code "
-    #     "assembled in one place.\n\n"
-    #     "📘 Structure your output as follows:\n\n"
-    #     "### 🔍 Video Summary\n"
-    #     "A 2–4 line explanation of what is being built or demonstrated and with which technologies.\n\n"
-    #     "### 🧠 Key Concepts & Setup\n"
-    #     "- List the core ideas (patterns, paradigms, or techniques) and any setup steps (requirements, installations, environment).\n\n"
-    #     "### 💻 Implementation Steps\n"
-    #     "1. Numbered, step-by-step description of how the code is written or modified during the video.\n\n"
-    #     "### 🧾 Code Snippets by Section\n"
-    #     "- Show code snippets grouped by file, component, or logical section, using proper fenced code blocks.\n\n"
-    #     "### 🧩 Debugging / Testing (if any)\n"
-    #     "- Summarize how issues are identified and fixed, and how the code is tested.\n\n"
-    #     "### 🧱 Full Code (if reconstructable)\n"
-    #     "- Provide the complete final code or main files as described in the video.\n\n"
-    #     "### ✅ Conclusion\n"
-    #     "- Briefly summarize what the viewer is able to build or understand after following the tutorial.\n\n"
-    #     "Transcript:\n\n"
-    # ),
-
-    # "Research Notes Summary": (
-    #     "You are an analytical research assistant creating structured, research-style notes from the transcript.\n\n"
-    #     "Your task is to extract and organize all important information related to research questions, background, methods, "
-    #     "evidence, results, and interpretations presented in the video.\n\n"
-    #     "⚙️ Output Requirements:\n"
-    #     "1. Identify the main topic or research question the video addresses.\n"
-    #     "2. Capture any theoretical background, literature references, or conceptual frameworks discussed.\n"
-    #     "3. Summarize methods, experiments, datasets, models, or analytical approaches mentioned.\n"
-    #     "4. Clearly list key findings, insights, or results, including any quantitative metrics cited.\n"
-    #     "5. Note strengths, limitations, assumptions, and open questions if they appear in the transcript.\n"
-    #     "6. Maintain a neutral, objective tone appropriate for academic or research notes.\n"
-    #     "7. Where suitable and clearly supported by the transcript, use Mermaid diagrams to represent processes, pipelines, or "
-    #     "comparisons (for example, experimental workflows or model pipelines).\n\n"
-    #     "🛑 Do not:\n"
-    #     "- Add your own hypotheses, interpretations, or speculative commentary.\n"
-    #     "- Invent numbers, results, or citations that are not provided.\n\n"
-    #     "✅ Do:\n"
-    #     "- Reorganize the raw spoken content into a clean, logical research structure.\n"
-    #     "- Fix grammar and punctuation for clarity, while preserving the original meaning.\n"
-    #     "- Ensure that all key points, arguments, and examples from the transcript appear somewhere in the notes.\n\n"
-    #     "📘 Structure your output as follows:\n\n"
-    #     "### 📚 Overview & Research Question\n"
-    #     "- Briefly describe the main topic and central question or problem being discussed.\n\n"
-    #     "### 🧩 Background & Context\n"
-    #     "- Summarize any theoretical background, prior work, or context needed to understand the topic.\n\n"
-    #     "### 🧪 Method / Approach\n"
-    #     "- Describe the methods, models, experiments, datasets, or procedures mentioned.\n\n"
-    #     "### 📊 Key Findings / Insights\n"
-    #     "- Bullet points listing the main results, observations, or insights from the video.\n\n"
-    #     "### ⚖️ Strengths, Limitations & Assumptions\n"
-    #     "- Summarize any pros/cons, caveats, or assumptions explicitly discussed.\n\n"
-    #     "### 🔭 Open Questions / Future Directions\n"
-    #     "- List any future work, unanswered questions, or directions suggested.\n\n"
-    #     "### ✅ Takeaway Summary\n"
-    #     "A concise paragraph summarizing the overall message or implications of the video.\n\n"
-    #     "Transcript:\n\n"
-    # ),
-
-    # "Short Summary": (
-    #     "You are summarizing the transcript into a very short, high-signal overview that still covers all major topics.\n\n"
-    #     "Your task is to compress the content into a compact form while preserving the core ideas and outcomes of the video.\n\n"
-    #     "⚙️ Output Requirements:\n"
-    #     "1. Capture the main topic, goal, and key ideas of the video without going into fine-grained detail.\n"
-    #     "2. Do not exceed 5–8 bullet points OR 1–2 short paragraphs (choose whichever fits the content best).\n"
-    #     "3. Use simple, direct language so the summary can be read and understood quickly.\n"
-    #     "4. Include only the most important concepts, decisions, or results — no filler.\n"
-    #     "5. Do not introduce new information that is not present in the transcript.\n\n"
-    #     "🛑 Do not:\n"
-    #     "- Add diagrams, long explanations, or detailed step-by-step instructions.\n"
-    #     "- Use very long sentences or nested lists.\n\n"
-    #     "✅ Do:\n"
-    #     "- Make the summary grammatically correct and easy to scan.\n"
-    #     "- Ensure that every major section or turning point in the video is reflected at least once.\n\n"
-    #     "📘 Structure your output as one of the following (choose the best fit based on the transcript):\n\n"
-    #     "Option A – Bulleted Summary:\n"
-    #     "- 5–8 concise bullet points covering what the video explains, demonstrates, or concludes.\n\n"
-    #     "Option B – Paragraph Summary:\n"
-    #     "1–2 short paragraphs that describe the core idea, what is done or shown, and the final takeaway.\n\n"
-    #     "Transcript:\n\n"
-    # ),
-
-    # "UPSC Preparation Format": (
-    #     "You are an expert UPSC mentor and content curator. Your task is to convert the transcript into high-quality, "
-    #     "exam-oriented notes suitable for UPSC (Civil Services) preparation.\n\n"
-    #     "⚙️ Output Requirements:\n"
-    #     "1. Identify all topics, subtopics, and dimensions (historical, geographical, economic, social, political, ethical, etc.) "
-    #     "relevant for UPSC GS papers, Essay, or optional subjects.\n"
-    #     "2. Extract only the points that are conceptually important, factually relevant, or analytically useful for mains and prelims.\n"
-    #     "3. Highlight important keywords, terms, committees, schemes, institutions, reports, and constitutional / legal provisions.\n"
-    #     "4. For each important keyword, provide:\n"
-    #     "   - A short definition/meaning in simple terms.\n"
-    #     "   - 2–4 useful synonyms or related phrases (only if they make sense in the given context).\n"
-    #     "5. Avoid unnecessary storytelling; focus on crisp, point-wise content that can be revised quickly.\n"
-    #     "6. Maintain factual accuracy; do not invent data, reports, or case laws that are not clearly present in the transcript.\n"
-    #     "7. Use neutral, exam-style language — clear, balanced, and free from ideological bias.\n\n"
-    #     "🛑 Do not:\n"
-    #     "- Add external facts, statistics, or articles that are not mentioned or clearly implied by the transcript.\n"
-    #     "- Turn the notes into long paragraphs without structure.\n"
-    #     "- Use casual or conversational tone.\n\n"
-    #     "✅ Do:\n"
-    #     "- Reorganize the content logically (issue → causes → impact → measures → way forward) wherever applicable.\n"
-    #     "- Fix grammar and punctuation so that the notes are ready to be used in answers.\n"
-    #     "- Ensure coverage of all major aspects discussed in the video.\n\n"
-    #     "📘 Structure your output exactly as follows:\n\n"
-    #     "### 📌 Topic & Relevance for UPSC\n"
-    #     "- 2–4 lines explaining what the topic is and where it fits in the UPSC syllabus (e.g., GS2 – Polity & Governance).\n\n"
-    #     "### 🧠 Core Concepts & Definitions\n"
-    #     "- Bullet points explaining all key concepts in simple, precise language.\n\n"
-    #     "### 📊 Important Points / Dimensions\n"
-    #     "- Point-wise coverage of all major dimensions (historical, constitutional, economic, social, environmental, ethical, etc.).\n\n"
-    #     "### 🔑 Keywords, Meanings & Synonyms\n"
-    #     "- For each important keyword from the transcript:\n"
-    #     "  - **Keyword** – short meaning / definition.\n"
-    #     "  - Synonyms / related keywords: A, B, C (only if meaningful).\n\n"
-    #     "### 🧩 Examples, Case Studies or Illustrations (if any)\n"
-    #     "- Briefly list any examples, case studies, or real-world references mentioned.\n\n"
-    #     "### 🧭 Way Forward / Policy Suggestions (only if present in transcript)\n"
-    #     "- Summarize any suggestions, reforms, or recommendations discussed.\n\n"
-    #     "### ✅ UPSC-Style Conclusion\n"
-    #     "- 1–2 well-crafted, exam-oriented concluding paragraphs that connect the topic to larger constitutional values, "
-    #     "governance, sustainable development, or ethical considerations — strictly based on the transcript.\n\n"
-    #     "Transcript:\n\n"
-    # ),
-
-    "Interview QnA Notes": (
-        "You are an experienced interviewer for mid-senior AI/ML and Data Science roles (~5 years experience).\n\n"
-        "Convert the transcript into **interview-oriented preparation notes** containing realistic, high-quality "
-        "questions and structured answers strictly based on the video content.\n\n"
-        
-        "⚙️ Output Requirements:\n"
-        "1. Extract all relevant concepts, tools, techniques, workflows, and trade-offs discussed in the transcript.\n"
-        "2. Generate interview questions that a mid-senior AI/ML or Data Science candidate would typically face, "
-            "based only on the transcript topics.\n"
-        "3. Provide clear, concise, technically accurate answers grounded strictly in the transcript "
-            "(paraphrased and organized, no external content).\n"
-        "4. Include a balanced mix of:\n"
-            " Conceptual questions (What, Why)\n"
-            " Practical/scenario questions (How would you…)\n"
-            " Implementation questions (architecture, modeling, evaluation, deployment)\n"
-            " Workflow / pipeline reasoning\n"
-        "5. Use language appropriate for a 5-year experienced candidate; answers should be structured and speak-ready.\n\n"
-        
-        "🛑 Do Not:\n"
-            "  Introduce external information, tools, or architectures not present or implied.\n"
-            "  Add generic interview questions unrelated to the transcript.\n"
-            "  Hallucinate metrics or technical details.\n\n"
-        
-        "✅ Do:\n"
-        "- Rephrase transcript content into strong interview-style Q&A.\n"
-        "- Emphasize reasoning, trade-offs, advantages, disadvantages, and decision-making when provided.\n"
-        "- Ensure grammar and clarity suitable for verbal interviews.\n\n"
-
-        "📘 Structure your output as follows:\n\n"
-
-        "### Overview\n"
-        "2–4 lines summarizing which AI/ML/Data Science interview domains this topic prepares the candidate for.\n\n"
-
-        "### Core Concepts to Know\n"
-            "Bullet points listing the key concepts, tools, workflows, and principles covered in the video.\n\n"
-
-        "### Most Asked Interview Questions (Based on This Topic)\n"
-            "Extract and generate the **most commonly asked questions** from this domain, strictly based on the transcript.\n"
-            "Around 5–10 high-frequency or high-importance questions.\n"
-            "Provide **short, sharp answers** based entirely on the transcript.\n\n"
-
-        "### Main Interview Questions & Answers\n"
-        "Q1: <High-quality question derived from transcript>\n"
-         "Ans: <Clear, structured answer based only on the transcript>\n\n"
-
-        "Q2: …\n"
-        "Q3: …\n"
-        "(Include as many meaningful Q&A pairs as the transcript supports.)\n\n"
-
-        "### Scenario Based Questions\n"
-        "- 2–5 scenario-based or problem-solving questions relevant to the transcript/topic.\n"
-        "- Provide practical, real senario, structured answers grounded in the transcript.\n\n"
-
-        "### Final Interview Tips (Based on This Video)\n"
-        "   3–6 bullet points summarizing how the candidate can leverage the video's content to answer AI/ML/Data Science "
-        "   interview questions confidently at a mid-senior level.\n\n"
-
-        "Transcript:\n\n"
-    )
-}
+# Streamlit re-executes this script on every interaction. Clients, prompts and
+# compiled regexes live in imported modules, so they are only built once per process.
+configure()
 
 
 st.set_page_config(
@@ -346,6 +61,78 @@ with st.sidebar:
         index=0,
         key="language_selector"
     )
+    separate_translation = st.checkbox(
+        "Translate in a separate pass",
+        value=False,
+        key="separate_translation",
+        help="Generate English notes first and translate them afterwards. Slower and uses more tokens; "
+             "by default notes are written directly in the selected language."
+    )
+    run_in_background = st.checkbox(
+        "Run generation in the background",
+        value=True,
+        key="run_in_background",
+        help="Queues the request so it keeps running if you refresh the page, and shares the work "
+             "with anyone else requesting the same video, format and language."
+    )
+    stream_output = st.checkbox(
+        "Show notes while they are being written",
+        value=True,
+        key="stream_output",
+        help="Streams the notes into the page as Gemini writes them instead of waiting for the full response."
+    )
+    with st.expander("⚙️ Gemini queue"):
+        limiter_stats = gemini_limiter.metrics()
+        st.caption(
+            f"Waiting now: {limiter_stats['queue_depth']} (max {limiter_stats['max_queue_depth']}) · "
+            f"Mean wait: {limiter_stats['mean_wait_seconds']:.1f}s (max {limiter_stats['max_wait_seconds']:.1f}s) · "
+            f"Retries: {limiter_stats['retries']} · Failures: {limiter_stats['failures']}"
+        )
+        dispatcher_stats = gemini_dispatcher.metrics()
+        st.caption(
+            f"Hedged: {dispatcher_stats['hedges']} · Fallbacks: {dispatcher_stats['fallbacks']} · "
+            f"Won by hedge/fallback: {dispatcher_stats['hedge_wins']}"
+        )
+    with st.expander("📊 Stage latency"):
+        stage_stats = metrics_summary()
+        if stage_stats:
+            st.table({
+                stage: {
+                    "runs": stats["count"],
+                    "p50 (s)": round(stats["p50"], 2),
+                    "p90 (s)": round(stats["p90"], 2),
+                    "p99 (s)": round(stats["p99"], 2),
+                    "tokens in": stats["input_tokens"],
+                    "tokens out": stats["output_tokens"],
+                }
+                for stage, stats in stage_stats.items()
+            })
+        else:
+            st.caption("No measurements yet in this server process.")
+        st.download_button(
+            "⬇️ Prometheus metrics",
+            prometheus_text(),
+            "tubenotes_metrics.prom",
+            mime="text/plain",
+            key="download_metrics_button"
+        )
+    with st.expander("📚 Notes library"):
+        library = get_library()
+        library_query = st.text_input(
+            "Search saved notes", placeholder="Keywords, video ID or notes name...", key="library_query"
+        )
+        library_entries = library.search(library_query, limit=10) if library_query else library.recent(10)
+        st.caption(f"{len(library_entries)} of {library.count():,} saved notes")
+        for entry in library_entries:
+            st.markdown(
+                f"**{entry['name'] or entry['notes_format']}** · "
+                f"{LANGUAGE_NAMES.get(entry['lang'], entry['lang'])} · "
+                f"[{entry['video_id']}](https://youtu.be/{entry['video_id']})"
+            )
+            if entry.get("snippet"):
+                st.caption(" ".join(entry["snippet"].split()))
+            if st.button("📂 Open", key=f"library_open_{entry['id']}"):
+                st.session_state["library_entry"] = entry["id"]
     st.markdown("---")
     st.markdown(
         "<small style='color:#888;'>Powered by Google Gemini | Developed by Ravi</small>",
@@ -383,6 +170,15 @@ if selected_notes_format == "Choose the format for your notes...":
     st.warning("Please select a notes format to continue.")
 
 
+# Extra formats generated from the same transcript, in parallel with the main one
+extra_notes_formats = []
+if selected_notes_format != "Choose the format for your notes...":
+    extra_notes_formats = st.multiselect(
+        "➕ Also generate these formats (optional)",
+        options=[fmt for fmt in NOTES_FORMAT_PROMPTS if fmt != selected_notes_format],
+        key="extra_notes_formats"
+    )
+
 custom_prompt_text = None
 if selected_notes_format == "Custom Prompt":
     custom_prompt_text = st.text_area(
@@ -401,33 +197,30 @@ notes_name = st.text_input(
 )
 
 
-def get_video_id(url):
-    """Extract YouTube video ID from link."""
-    try:
-        if "youtu.be" in url:
-            return url.split("/")[-1]
-        elif "youtube.com" in url:
-            query = urlparse(url).query
-            return parse_qs(query)["v"][0]
-    except:
-        return None
-    return None
-
 if youtube_link:
     video_id = get_video_id(youtube_link)
     if video_id:
         st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
+        # Fetch the transcript while the user is still picking a format, so the
+        # slowest network step is done (and cached) by the time they press Generate.
+        # Only when the link changes: reruns for other widgets don't touch the cache.
+        previous_video_id = st.session_state.get("prefetch_video_id")
+        if previous_video_id != video_id:
+            if previous_video_id:
+                cancel_prefetch(previous_video_id)
+            if is_video_id(video_id):
+                prefetch_transcript(video_id)
+            st.session_state["prefetch_video_id"] = video_id
 
 # =========================
 # FETCH TRANSCRIPT
 # =========================
 
-def extract_transcript_details(youtube_video_url):
+def extract_transcript_segments(youtube_video_url):
+    """Fetch the timestamped transcript segments, reporting failures in the UI."""
     try:
         video_id = get_video_id(youtube_video_url)
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'hi'])
-        transcript = " ".join([entry["text"] for entry in transcript_data])
-        return transcript
+        transcript_data = fetch_transcript(video_id, languages=('en', 'hi'))
     except (NoTranscriptFound, TranscriptsDisabled):
         st.error("No transcript is available for this video (disabled or not provided).")
         return None
@@ -442,136 +235,319 @@ def extract_transcript_details(youtube_video_url):
         st.write(e)
         return None
 
+    # Strip caption noise before it costs input tokens
+    transcript_data, report = preprocess_segments(transcript_data, label=video_id)
+    st.caption(
+        f"🧹 Transcript cleaned: {report['tokens_before']:,} → {report['tokens_after']:,} estimated tokens "
+        f"(-{report['token_reduction_pct']}%)"
+    )
+    return transcript_data
+
+
+def extract_transcript_details(youtube_video_url):
+    """Fetch the transcript as a ``Transcript``: one text buffer that keeps segment timings."""
+    transcript_data = extract_transcript_segments(youtube_video_url)
+    if not transcript_data:
+        return None
+    return Transcript.from_segments(transcript_data)
 
-# =========================
-# TRANSLATION VIA GEMINI
-# =========================
-def translate_text(text, target_lang_code):
-    if target_lang_code == "en":
-        return text
-    try:
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
-        # Generic translation prompt for all note types
-        translate_prompt = (
-            f"Translate the following notes into the target language. Preserve any code blocks and "
-            f"markdown formatting.\n"
-            f"Target language code: {target_lang_code}\n\n"
-            f"Notes:\n{text}"
-        )
-        response = model.generate_content([translate_prompt])
-        return response.text
-    except Exception as e:
-        st.error(f"Error translating summary: {e}")
-        return text
 
 # =========================
 # GEMINI CONTENT GENERATION
 # =========================
-def generate_gemini_content(transcript_text, prompt, target_lang_code, progress):
-    try:
-        progress.progress(40)
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
+def stream_callback(placeholder):
+    """Callback rendering partial notes into ``placeholder`` (None when not streaming)."""
+    if placeholder is None:
+        return None
+    return lambda text: placeholder.markdown(text + " ▌", unsafe_allow_html=True)
+
 
-        # Generate Summary
-        response = model.generate_content([prompt + transcript_text])
-        summary = response.text
+def show_plan(plan):
+    st.caption(f"🧮 {describe_plan(plan)} — {plan['reason']}")
 
-        progress.progress(70)
-        # Translate (if needed)
-        summary = translate_text(summary, target_lang_code)
 
-        progress.progress(100)
-        return summary
+def generate_gemini_content(transcript_text, prompt, target_lang_code, progress, segments=None,
+                            placeholder=None, single_pass=True, notes_format=None):
+    """Generate notes in the target language; with a ``placeholder`` the text streams into the page.
+
+    By default the target language is folded into the prompt so the notes come
+    out in one call; ``single_pass=False`` keeps the generate-then-translate path.
+    ``progress`` is the page's ``StageProgress``.
+    """
+    try:
+        # The pre-flight plan decides between one call and parallel chunking.
+        return generate_notes(
+            transcript_text,
+            prompt,
+            target_lang_code,
+            segments=segments,
+            single_pass=single_pass,
+            model_name=DEFAULT_MODEL,
+            progress=progress,
+            on_text=stream_callback(placeholder),
+            notes_format=notes_format,
+            on_plan=show_plan
+        )
     except Exception as e:
         st.error(f"Error generating summary: {e}")
         return None
 
 # =========================
-# MARKDOWN TO HTML
+# NOTES DISPLAY + DOWNLOAD
 # =========================
-def markdown_to_html(md_text):
-    md_text = md_text.strip()
-    md_text = re.sub(r"\*\*(.*?)\*\*", r"<strong>\1</strong>", md_text)
-    md_text = re.sub(r"^#{1,3}\s*$", "", md_text, flags=re.MULTILINE)
-    md_text = re.sub(r"### (.*?)\n", r"<h2>\1</h2>\n", md_text)
-
-    code_blocks = []
-
-    def replace_code_block(match):
-        lang = match.group(1).strip().lower()
-        raw_code = match.group(2).strip()
-        escaped_code = html.escape(raw_code)
-        placeholder = f"[[CODE_BLOCK_{len(code_blocks)}]]"
-        code_blocks.append(f'<pre><code class="language-{lang}">{escaped_code}</code></pre>')
-        return placeholder
-
-    md_text = re.sub(r"```(\w*)\n(.*?)```", replace_code_block, md_text, flags=re.DOTALL)
-
-    lines = md_text.splitlines()
-    processed_lines = []
-    for line in lines:
-        line = line.strip()
-        if line.startswith(("-", "*")):
-            processed_lines.append(f"<li>{line.lstrip('-*').strip()}</li>")
-        else:
-            processed_lines.append(f"<p>{line}</p>")
+def show_notes(summary, notes_format, language_name, key_suffix="", video_id=None):
+    # [m:ss] markers become links that open the video at that moment.
+    summary = link_timestamps(summary, video_id)
+    st.markdown(
+        f"<h2 style='color:#007acc;'>📝 TubeNotes AI ({notes_format}):</h2>",
+        unsafe_allow_html=True
+    )
+    st.markdown(summary, unsafe_allow_html=True)
+
+    html_header_title = "📘 Custom Prompt Notes" if notes_format == "Custom Prompt" else f"📘 {notes_format}"
+    format_suffix = f"_{key_suffix}" if key_suffix else ""
+    # Rendered once in memory; every download format comes from the same render.
+    exports = export_formats(summary, header_title=html_header_title)
+    html_col, md_col, gz_col = st.columns(3)
+    with html_col:
+        st.download_button(
+            f"🖥️ Download Notes as HTML ({language_name})",
+            exports["html"][0],
+            f"{notes_base_name}{format_suffix}.html",
+            mime=exports["html"][1],
+            key=f"download_button{format_suffix}",
+            use_container_width=True
+        )
+    with md_col:
+        st.download_button(
+            "📄 Download as Markdown",
+            exports["md"][0],
+            f"{notes_base_name}{format_suffix}.md",
+            mime=exports["md"][1],
+            key=f"download_markdown_button{format_suffix}",
+            use_container_width=True
+        )
+    with gz_col:
+        st.download_button(
+            "🗜️ Download compressed HTML",
+            exports["html.gz"][0],
+            f"{notes_base_name}{format_suffix}.html.gz",
+            mime=exports["html.gz"][1],
+            key=f"download_gzip_button{format_suffix}",
+            use_container_width=True
+        )
 
-    html_output = "\n".join(processed_lines)
-    for i, block in enumerate(code_blocks):
-        html_output = html_output.replace(f"[[CODE_BLOCK_{i}]]", block)
 
-    return html_output
+def show_notes_set(notes_by_format, language_name, video_id=None):
+    """Show one or more generated formats, in tabs when there are several."""
+    if not notes_by_format:
+        return
+    st.success("Notes generation complete!")
+    if len(notes_by_format) == 1:
+        (notes_format, summary), = notes_by_format.items()
+        show_notes(summary, notes_format, language_name, video_id=video_id)
+    else:
+        tabs = st.tabs(list(notes_by_format))
+        for index, (tab, (notes_format, summary)) in enumerate(zip(tabs, notes_by_format.items())):
+            with tab:
+                show_notes(summary, notes_format, language_name, key_suffix=str(index), video_id=video_id)
+        st.download_button(
+            f"📦 Download all {len(notes_by_format)} formats (.zip)",
+            export_bundle(
+                {name: link_timestamps(notes, video_id) for name, notes in notes_by_format.items()},
+                notes_base_name
+            ),
+            f"{notes_base_name}.zip",
+            mime="application/zip",
+            key="download_bundle_button",
+            use_container_width=True
+        )
+
+    st.info("☁️ Google Drive upload feature coming soon 🚀")
+    st.caption("📚 These notes are saved in the notes library; search them from the sidebar.")
+
+
+def show_job_error(job):
+    if job["error_kind"] == "no_transcript":
+        st.error("No transcript is available for this video (disabled or not provided).")
+    elif job["error_kind"] == "transcript":
+        st.error(
+            "We couldn't fetch the transcript. This often happens when YouTube blocks "
+            "requests from the server's IP (common on cloud hosting). "
+            "Please try another video or run the app locally."
+        )
+        st.write(job["error"])
+    else:
+        st.error(f"Error generating summary ({job['notes_format']}): {job['error']}")
+
+
+def show_jobs(job_ids):
+    """Render background jobs (one per format); while any is active, poll by rerunning."""
+    queue = get_job_queue()
+    jobs = [job for job in (queue.get(job_id) for job_id in job_ids) if job is not None]
+    if not jobs:
+        st.session_state.pop("job_ids", None)
+        st.query_params.pop("jobs", None)
+        return
+
+    active = [job for job in jobs if job["status"] in ACTIVE_STATUSES]
+    if active:
+        st.info("⏳ Generating your video summary in the background... You can refresh this page safely.")
+        st.progress(sum(job["progress"] for job in jobs) // len(jobs))
+        for job in active:
+            if job["plan"]:
+                show_plan(job["plan"])
+        if stream_output and active[0]["partial"]:
+            st.markdown(active[0]["partial"] + " ▌", unsafe_allow_html=True)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
+    # Finished jobs feed the session record; the notes are rendered from there.
+    session = notes_session(jobs[0]["video_id"])
+    session["request"] = ({job["notes_format"]: job["prompt"] for job in jobs}, jobs[0]["lang"])
+    for job in jobs:
+        key = notes_key(job["notes_format"], job["prompt"], job["lang"])
+        if job["status"] == "done":
+            session["notes"][key] = job["result"]
+            session["failed"].discard(key)
+        else:
+            show_job_error(job)
+            session["failed"].add(key)
+
 
 # =========================
-# CREATE HTML FILE
+# INCREMENTAL REGENERATION
 # =========================
-def create_html_file(content, header_title="📝 TubeNotes AI"):
-    html_template = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="utf-8">
-        <title>📝 TubeNotes AI</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', sans-serif;
-                margin: 40px;
-                color: #333;
-                background-color: #fafafa;
-            }}
-            h1 {{
-                text-align: center;
-                color: #003366;
-            }}
-            h2 {{
-                color: #004488;
-                border-bottom: 1px solid #ccc;
-                padding-bottom: 5px;
-            }}
-            pre {{
-                background: #f4f4f4;
-                padding: 10px;
-                border-radius: 8px;
-                overflow-x: auto;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>{header_title}</h1>
-        {markdown_to_html(content)}
-    </body>
-    </html>
-    """
+# The session keeps the transcript and every notes variant produced for the
+# current video, so switching language or format afterwards only runs the
+# missing stage: a translation of notes that already exist, or generation of
+# a new format from the transcript already in memory.
+def selected_prompts():
+    """Prompts for the formats currently selected, or None while the selection is incomplete."""
+    if selected_notes_format == "Custom Prompt":
+        if not custom_prompt_text:
+            return None
+        prompt = custom_prompt(custom_prompt_text)
+    elif selected_notes_format in NOTES_FORMAT_PROMPTS:
+        prompt = NOTES_FORMAT_PROMPTS[selected_notes_format]
+    else:
+        return None
+    prompts_by_format = {selected_notes_format: prompt}
+    prompts_by_format.update({fmt: NOTES_FORMAT_PROMPTS[fmt] for fmt in extra_notes_formats})
+    return prompts_by_format
+
+
+def notes_key(notes_format, prompt, lang_code):
+    return notes_format, text_digest(prompt), lang_code
+
+
+def load_stored_notes(session, notes_format, prompt, lang_code):
+    """Fill the session from the notes library; returns whether these notes were stored."""
+    key = notes_key(notes_format, prompt, lang_code)
+    if key in session["notes"]:
+        return True
+    stored = get_library().lookup(session["video_id"], prompt, lang_code)
+    if stored is None:
+        return False
+    session["notes"][key] = stored["notes"]
+    session["failed"].discard(key)
+    return True
+
+
+def load_similar_notes(session, prompts_by_format, lang_code, transcript):
+    """Reuse notes of near-duplicate videos (re-uploads, mirrors); returns the prompts still to generate."""
+    remaining = {}
+    for notes_format, prompt in prompts_by_format.items():
+        similar = get_library().reuse_similar(session["video_id"], transcript.text, notes_format, prompt, lang_code)
+        if similar is None:
+            remaining[notes_format] = prompt
+            continue
+        session["notes"][notes_key(notes_format, prompt, lang_code)] = similar["notes"]
+        st.info(
+            f"♻️ {notes_format}: this video's transcript matches "
+            f"[{similar['source_video_id']}](https://youtu.be/{similar['source_video_id']}) "
+            f"({similar['similarity']:.0%} similar), so its existing notes are reused."
+        )
+    return remaining
+
 
-    file_path = tempfile.NamedTemporaryFile(delete=False, suffix=".html")
-    with open(file_path.name, "w", encoding="utf-8") as f:
-        f.write(html_template)
-    return file_path.name
+def notes_session(video_id):
+    """This session's record for ``video_id``, started afresh when the video changes."""
+    session = st.session_state.get("notes_session")
+    if session is None or session["video_id"] != video_id:
+        session = {"video_id": video_id, "transcript": None, "notes": {}, "failed": set(), "request": None}
+        st.session_state["notes_session"] = session
+    return session
+
+
+def complete_notes(session, prompts_by_format, lang_code, single_pass):
+    """Notes for every requested format in ``lang_code``, producing only what is missing.
+
+    Missing formats run as background jobs when "Run generation in the
+    background" is checked, and inline otherwise.
+    """
+    notes = session["notes"]
+    missing = {}
+    for notes_format, prompt in prompts_by_format.items():
+        key = notes_key(notes_format, prompt, lang_code)
+        if key in session["failed"] or load_stored_notes(session, notes_format, prompt, lang_code):
+            continue
+        sources = {k[2]: summary for k, summary in notes.items() if k[:2] == key[:2]}
+        if not sources:
+            missing[notes_format] = prompt
+            continue
+        # Same notes in another language: one translation call instead of a full run.
+        try:
+            with st.spinner(f"🌐 Translating {notes_format} notes..."):
+                notes[key] = translate_notes(sources.get("en") or next(iter(sources.values())), lang_code)
+            get_library().save(session["video_id"], notes_format, prompt, lang_code, notes[key])
+        except Exception as e:
+            st.error(f"Error translating summary: {e}")
+            session["failed"].add(key)
+
+    if missing and run_in_background:
+        # New formats go through the shared job table like any other request, so identical
+        # work in flight elsewhere is reused and the result survives a refresh.
+        job_ids = [
+            get_job_queue().submit(session["video_id"], notes_format, prompt, lang_code, single_pass=single_pass)
+            for notes_format, prompt in missing.items()
+        ]
+        st.session_state["job_ids"] = job_ids
+        st.query_params["jobs"] = ",".join(job_ids)
+        show_jobs(job_ids)  # reruns the script until the jobs are finished
+        missing = {}
+    if missing and session["transcript"] is None:
+        session["transcript"] = extract_transcript_details(f"https://youtu.be/{session['video_id']}") or False
+    if missing and session["transcript"]:
+        transcript = session["transcript"]
+        missing = load_similar_notes(session, missing, lang_code, transcript)
+        if missing:
+            with st.spinner("⏳ Generating notes for the new format... Please wait!"):
+                generated, errors = run_async(get_service().notes_multi(
+                    session["video_id"],
+                    missing,
+                    lang_code,
+                    single_pass=single_pass,
+                    model_name=DEFAULT_MODEL,
+                    transcript=transcript
+                ))
+            for notes_format, summary in generated.items():
+                notes[notes_key(notes_format, missing[notes_format], lang_code)] = summary
+                get_library().save(session["video_id"], notes_format, missing[notes_format], lang_code, summary)
+            for notes_format, error in errors.items():
+                st.error(f"Error generating summary ({notes_format}): {error}")
+                session["failed"].add(notes_key(notes_format, missing[notes_format], lang_code))
+
+    return {
+        notes_format: notes[notes_key(notes_format, prompt, lang_code)]
+        for notes_format, prompt in prompts_by_format.items()
+        if notes_key(notes_format, prompt, lang_code) in notes
+    }
 
 # =========================
 # MAIN ACTION WITH SPINNER + PROGRESS
 # =========================
-file_name = f"{notes_name or 'video_summary'}.html"
+notes_base_name = notes_name or 'video_summary'
 if st.button("📄 Generate Notes", use_container_width=True, key="generate_summary_button"):
     if not youtube_link:
         st.error("Please enter a YouTube video link first.")
@@ -582,53 +558,155 @@ if st.button("📄 Generate Notes", use_container_width=True, key="generate_summ
         st.error("Please select a valid notes format before generating.")
         st.stop()
 
-    with st.spinner("⏳ Generating your video summary... Please wait!"):
-        progress = st.progress(10)
-        transcript_text = extract_transcript_details(youtube_link)
-        if transcript_text:
-            progress.progress(30)
-
-            # Decide prompt based on selected format
-            if selected_notes_format == "Custom Prompt":
-                if not custom_prompt_text:
-                    st.error("Please enter your custom prompt before generating notes.")
-                    st.stop()
-                prompt = custom_prompt_text.strip() + "\n\nTranscript:\n\n"
-                html_header_title = "📘 Custom Prompt Notes"
-            else:
-                # Extra safety: ensure key exists
-                if selected_notes_format not in NOTES_FORMAT_PROMPTS:
-                    st.error("Invalid notes format selected. Please try again.")
-                    st.stop()
-
-                prompt = NOTES_FORMAT_PROMPTS[selected_notes_format]
-                html_header_title = f"📘 {selected_notes_format}"
-
-            summary = generate_gemini_content(
-                transcript_text,
-                prompt,
+    # Validate the selected format
+    if selected_notes_format == "Custom Prompt":
+        if not custom_prompt_text:
+            st.error("Please enter your custom prompt before generating notes.")
+            st.stop()
+    else:
+        # Extra safety: ensure key exists
+        if selected_notes_format not in NOTES_FORMAT_PROMPTS:
+            st.error("Invalid notes format selected. Please try again.")
+            st.stop()
+
+    # Every selected format shares one transcript fetch
+    prompts_by_format = selected_prompts()
+
+    if run_in_background:
+        # Identical requests from any session share one in-flight job per format.
+        job_ids = [
+            get_job_queue().submit(
+                get_video_id(youtube_link),
+                notes_format,
+                format_prompt,
                 LANGUAGES[selected_language],
-                progress
+                single_pass=not separate_translation
             )
-
-            if summary:
-                st.success("Notes generation complete!")
-                st.markdown(
-                    f"<h2 style='color:#007acc;'>📝 TubeNotes AI ({selected_notes_format}):</h2>",
-                    unsafe_allow_html=True
-                )
-                st.markdown(summary, unsafe_allow_html=True)
-
-                html_path = create_html_file(summary, header_title=html_header_title)
-                with open(html_path, "rb") as f:
-                    st.download_button(
-                        f"🖥️ Download Notes as HTML ({selected_language})",
-                        f,
-                        file_name,
-                        mime="text/html",
-                        key="download_button"
+            for notes_format, format_prompt in prompts_by_format.items()
+        ]
+        st.session_state["job_ids"] = job_ids
+        st.query_params["jobs"] = ",".join(job_ids)
+    else:
+        st.session_state.pop("job_ids", None)
+        st.query_params.pop("jobs", None)
+        session = notes_session(get_video_id(youtube_link))
+        session["request"] = (prompts_by_format, LANGUAGES[selected_language])
+        # Formats already in the notes library are shown from there without calling Gemini.
+        prompts_by_format = {
+            notes_format: format_prompt
+            for notes_format, format_prompt in prompts_by_format.items()
+            if not load_stored_notes(session, notes_format, format_prompt, LANGUAGES[selected_language])
+        }
+        if prompts_by_format:
+            with st.spinner("⏳ Generating your video summary... Please wait!"):
+                # The bar advances as stages finish, weighted by how long each usually takes.
+                progress_bar = st.progress(0)
+                progress = StageProgress(PIPELINE_STAGES, on_progress=progress_bar.progress)
+                transcript = extract_transcript_details(youtube_link)
+                transcript_text = transcript.text if transcript else None
+                if transcript_text:
+                    progress.complete("transcript")
+                    progress.complete("preprocess")
+                    prompts_by_format = load_similar_notes(
+                        session, prompts_by_format, LANGUAGES[selected_language], transcript
                     )
+                    notes_by_format = {}
+                    if len(prompts_by_format) == 1:
+                        (notes_format, format_prompt), = prompts_by_format.items()
+                        stream_area = st.empty() if stream_output else None
+                        summary = generate_gemini_content(
+                            transcript_text,
+                            format_prompt,
+                            LANGUAGES[selected_language],
+                            progress,
+                            segments=transcript,
+                            placeholder=stream_area,
+                            single_pass=not separate_translation,
+                            notes_format=notes_format
+                        )
+                        if stream_area is not None:
+                            stream_area.empty()
+                        notes_by_format = {notes_format: summary} if summary else {}
+                    elif prompts_by_format:
+                        # All formats run concurrently on the shared async service; progress is
+                        # only updated from this (the script) thread as each one finishes.
+                        service = get_service()
+                        futures = {
+                            submit_async(service.notes(
+                                get_video_id(youtube_link),
+                                format_prompt,
+                                LANGUAGES[selected_language],
+                                single_pass=not separate_translation,
+                                notes_format=notes_format,
+                                model_name=DEFAULT_MODEL,
+                                transcript=transcript
+                            )): notes_format
+                            for notes_format, format_prompt in prompts_by_format.items()
+                        }
+                        results = {}
+                        for finished, future in enumerate(as_completed(futures), start=1):
+                            try:
+                                results[futures[future]] = future.result()
+                            except Exception as e:
+                                st.error(f"Error generating summary ({futures[future]}): {e}")
+                            progress_bar.progress(
+                                progress.percent + (100 - progress.percent) * finished // len(prompts_by_format)
+                            )
+                        notes_by_format = {fmt: results[fmt] for fmt in prompts_by_format if fmt in results}
+
+                    # Remember the results so later language or format changes reuse them,
+                    # and keep them in the library for everyone who asks for these notes later.
+                    session["transcript"] = transcript
+                    for notes_format, format_prompt in prompts_by_format.items():
+                        key = notes_key(notes_format, format_prompt, LANGUAGES[selected_language])
+                        if notes_format in notes_by_format:
+                            session["notes"][key] = notes_by_format[notes_format]
+                            session["failed"].discard(key)
+                            get_library().save(
+                                session["video_id"], notes_format, format_prompt, LANGUAGES[selected_language],
+                                notes_by_format[notes_format], name=notes_name or None
+                            )
+                        else:
+                            session["failed"].add(key)
+                else:
+                    # The fetch already reported its error; don't fetch again for this selection.
+                    session["transcript"] = False
+                    for notes_format, format_prompt in prompts_by_format.items():
+                        session["failed"].add(notes_key(notes_format, format_prompt, LANGUAGES[selected_language]))
+
+# Running or finished background jobs survive reruns and browser refreshes.
+active_job_ids = st.session_state.get("job_ids") or [
+    job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id
+]
+if active_job_ids:
+    show_jobs(active_job_ids)
+
+# Show notes for the current selection, running only the stages that are missing.
+session = st.session_state.get("notes_session")
+if session and (not youtube_link or get_video_id(youtube_link) == session["video_id"]):
+    prompts_by_format, lang_code = selected_prompts(), LANGUAGES[selected_language]
+    if prompts_by_format is None and session["request"]:
+        # Nothing selected (e.g. after a refresh): show the last request as it was.
+        prompts_by_format, lang_code = session["request"]
+    if prompts_by_format:
+        show_notes_set(
+            complete_notes(session, prompts_by_format, lang_code, not separate_translation),
+            LANGUAGE_NAMES.get(lang_code, lang_code),
+            video_id=session["video_id"]
+        )
 
-                st.info("☁️ Google Drive upload feature coming soon 🚀")
-                st.info(" Multiple Notes Format feature coming soon 🚀")
-                st.info(" Notes Backup feature coming soon 🚀")
+# Notes opened from the sidebar library.
+library_entry_id = st.session_state.get("library_entry")
+library_entry = get_library().get(library_entry_id) if library_entry_id else None
+if library_entry:
+    st.markdown("---")
+    if st.button("✖️ Close saved notes", key="library_close_button"):
+        st.session_state.pop("library_entry", None)
+        st.rerun()
+    show_notes(
+        library_entry["notes"],
+        library_entry["notes_format"],
+        LANGUAGE_NAMES.get(library_entry["lang"], library_entry["lang"]),
+        key_suffix="library",
+        video_id=library_entry["video_id"]
+    )
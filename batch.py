@@ -0,0 +1,240 @@
+"""Headless batch notes generation for lists of videos or playlists.
+
+    python batch.py urls.txt --format "Technical Notes" --lang en --out notes/
+    python batch.py "https://www.youtube.com/playlist?list=PL..." --llm-workers 2
+
+Transcripts are fetched and notes generated concurrently, each stage with its
+own worker limit. Finished videos are recorded in ``batch_state.json`` inside
+the output directory, so re-running the same command resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlparse
+
+from export import render_html
+from library import get_library
+from llm import DEFAULT_MODEL, configure
+from metrics import prometheus_text, summary as metrics_summary
+from pipeline import generate_notes
+from preprocess import DEFAULT_STAGES, STAGES, preprocess_segments
+from prompts import LANGUAGES, NOTES_FORMAT_PROMPTS
+from routing import describe_plan
+from transcripts import Transcript, fetch_transcript, get_video_id, link_timestamps
+
+STATE_FILE = "batch_state.json"
+
+
+# =========================
+# INPUT RESOLUTION
+# =========================
+def playlist_video_ids(playlist_url):
+    """Scrape the ordered, de-duplicated video IDs from a public playlist page."""
+    list_id = parse_qs(urlparse(playlist_url).query)["list"][0]
+    request = urllib.request.Request(
+        f"https://www.youtube.com/playlist?list={list_id}",
+        headers={"User-Agent": "Mozilla/5.0", "Accept-Language": "en"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        page = response.read().decode("utf-8", errors="replace")
+    return list(dict.fromkeys(re.findall(r'"videoId":"([\w-]{11})"', page)))
+
+
+def resolve_video_ids(source):
+    """Turn a playlist URL, a single video URL or a file of URLs into video IDs."""
+    if "list=" in source and "youtube.com" in source:
+        return playlist_video_ids(source)
+    if os.path.isfile(source):
+        with open(source, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        lines = [source]
+    video_ids = []
+    for line in lines:
+        if "list=" in line and "youtube.com" in line:
+            video_ids.extend(playlist_video_ids(line))
+        else:
+            video_ids.append(get_video_id(line) or line)
+    return list(dict.fromkeys(video_ids))
+
+
+# =========================
+# RESUMABLE STATE
+# =========================
+class BatchState:
+    """Per-video results persisted to JSON after every update."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.videos = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.videos = json.load(f)
+
+    def is_done(self, video_id, output_path):
+        return self.videos.get(video_id, {}).get("status") == "done" and os.path.exists(output_path)
+
+    def record(self, video_id, **fields):
+        with self._lock:
+            self.videos[video_id] = fields
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.videos, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def output_path_for(out_dir, video_id, notes_format, lang_code):
+    slug = re.sub(r"[^a-z0-9]+", "-", notes_format.lower()).strip("-")
+    return os.path.join(out_dir, f"{video_id}_{slug}_{lang_code}.html")
+
+
+# =========================
+# BATCH RUN
+# =========================
+def run_batch(video_ids, notes_format, lang_code, out_dir, transcript_workers=4, llm_workers=2,
+              single_pass=True, model_name=DEFAULT_MODEL, stages=DEFAULT_STAGES):
+    """Process videos with separate concurrency limits for transcripts and generation."""
+    os.makedirs(out_dir, exist_ok=True)
+    state = BatchState(os.path.join(out_dir, STATE_FILE))
+    prompt = NOTES_FORMAT_PROMPTS[notes_format]
+    header_title = f"📘 {notes_format}"
+
+    def write_notes(video_id, summary):
+        output_path = output_path_for(out_dir, video_id, notes_format, lang_code)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(render_html(link_timestamps(summary, video_id), header_title=header_title))
+        return output_path
+
+    pending = []
+    reused = 0
+    for video_id in video_ids:
+        if state.is_done(video_id, output_path_for(out_dir, video_id, notes_format, lang_code)):
+            print(f"[skip] {video_id} already done")
+            continue
+        stored = get_library().lookup(video_id, prompt, lang_code)
+        if stored is not None:
+            # Notes generated earlier by anyone (UI, API or batch) are reused as they are.
+            output_path = write_notes(video_id, stored["notes"])
+            state.record(video_id, status="done", output=output_path, source="library")
+            print(f"[library] {video_id} -> {output_path}")
+            reused += 1
+        else:
+            pending.append(video_id)
+
+    def fetch(video_id):
+        started = time.perf_counter()
+        segments, report = preprocess_segments(fetch_transcript(video_id), stages, label=video_id)
+        return segments, report, time.perf_counter() - started
+
+    def generate(video_id, segments):
+        started = time.perf_counter()
+        plans = []
+        transcript = Transcript.from_segments(segments)
+        similar = get_library().reuse_similar(video_id, transcript.text, notes_format, prompt, lang_code)
+        if similar is not None:
+            print(f"[similar] {video_id} matches {similar['source_video_id']} ({similar['similarity']:.0%}); reusing its notes")
+            return write_notes(video_id, similar["notes"]), time.perf_counter() - started
+        summary = generate_notes(transcript.text, prompt, lang_code, segments=transcript,
+                                 single_pass=single_pass, model_name=model_name,
+                                 notes_format=notes_format, on_plan=plans.append)
+        generation_seconds = time.perf_counter() - started
+        print(f"[plan] {video_id} {describe_plan(plans[0])}")
+        get_library().save(video_id, notes_format, prompt, lang_code, summary)
+        return write_notes(video_id, summary), generation_seconds
+
+    results = {"done": reused, "failed": 0, "skipped": len(video_ids) - len(pending) - reused}
+    with ThreadPoolExecutor(max_workers=transcript_workers) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=llm_workers) as llm_pool:
+        fetches = {fetch_pool.submit(fetch, video_id): video_id for video_id in pending}
+        generations = {}
+        fetch_seconds = {}
+        reports = {}
+        for future in as_completed(fetches):
+            video_id = fetches[future]
+            try:
+                segments, reports[video_id], fetch_seconds[video_id] = future.result()
+            except Exception as e:
+                results["failed"] += 1
+                state.record(video_id, status="failed", stage="transcript", error=str(e))
+                print(f"[fail] {video_id} transcript: {e}")
+                continue
+            generations[llm_pool.submit(generate, video_id, segments)] = video_id
+
+        for future in as_completed(generations):
+            video_id = generations[future]
+            try:
+                output_path, generation_seconds = future.result()
+            except Exception as e:
+                results["failed"] += 1
+                state.record(video_id, status="failed", stage="generation", error=str(e))
+                print(f"[fail] {video_id} generation: {e}")
+                continue
+            results["done"] += 1
+            state.record(
+                video_id,
+                status="done",
+                output=output_path,
+                transcript_seconds=round(fetch_seconds[video_id], 3),
+                generation_seconds=round(generation_seconds, 3),
+                tokens_before=reports[video_id]["tokens_before"],
+                tokens_after=reports[video_id]["tokens_after"],
+            )
+            print(
+                f"[done] {video_id} transcript {fetch_seconds[video_id]:.1f}s, "
+                f"generation {generation_seconds:.1f}s -> {output_path}"
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate TubeNotes AI notes for many videos at once.")
+    parser.add_argument("source", help="Playlist URL, video URL, or a text file with one URL per line.")
+    parser.add_argument("--format", default="Technical Notes", choices=sorted(NOTES_FORMAT_PROMPTS))
+    parser.add_argument("--lang", default="en", choices=sorted(LANGUAGES.values()))
+    parser.add_argument("--out", default="notes", help="Directory for the HTML notes (default: notes/).")
+    parser.add_argument("--transcript-workers", type=int, default=4)
+    parser.add_argument("--llm-workers", type=int, default=2)
+    parser.add_argument("--two-pass", action="store_true", help="Generate in English, then translate.")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument(
+        "--stages", default=",".join(DEFAULT_STAGES),
+        help=f"Comma-separated transcript preprocessing stages (available: {', '.join(STAGES)})."
+    )
+    parser.add_argument(
+        "--metrics", metavar="FILE",
+        help="Write per-stage latency and token metrics in Prometheus text format to FILE when done."
+    )
+    args = parser.parse_args(argv)
+
+    configure()
+
+    video_ids = resolve_video_ids(args.source)
+    print(f"{len(video_ids)} video(s) to process")
+    started = time.perf_counter()
+    results = run_batch(
+        video_ids, args.format, args.lang, args.out,
+        transcript_workers=args.transcript_workers,
+        llm_workers=args.llm_workers,
+        single_pass=not args.two_pass,
+        model_name=args.model,
+        stages=tuple(name for name in args.stages.split(",") if name),
+    )
+    print(
+        f"\n{results['done']} done, {results['failed']} failed, {results['skipped']} skipped "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    for stage, stats in metrics_summary().items():
+        print(f"  {stage:<12} n={stats['count']:<4} p50={stats['p50']:.2f}s p90={stats['p90']:.2f}s p99={stats['p99']:.2f}s")
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Microbenchmark for markdown_to_html on large, code-heavy generated notes.
+
+Compares the single-pass renderer with the previous regex + str.replace
+implementation (kept here verbatim) as the number of code blocks grows:
+
+    python benchmarks/bench_markdown.py --blocks 100 200 400 800
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import markdown_to_html
+
+
+def legacy_markdown_to_html(md_text):
+    md_text = md_text.strip()
+    md_text = re.sub(r"\*\*(.*?)\*\*", r"<strong>\1</strong>", md_text)
+    md_text = re.sub(r"^#{1,3}\s*$", "", md_text, flags=re.MULTILINE)
+    md_text = re.sub(r"### (.*?)\n", r"<h2>\1</h2>\n", md_text)
+
+    code_blocks = []
+
+    def replace_code_block(match):
+        lang = match.group(1).strip().lower()
+        raw_code = match.group(2).strip()
+        escaped_code = html.escape(raw_code)
+        placeholder = f"[[CODE_BLOCK_{len(code_blocks)}]]"
+        code_blocks.append(f'<pre><code class="language-{lang}">{escaped_code}</code></pre>')
+        return placeholder
+
+    md_text = re.sub(r"```(\w*)\n(.*?)```", replace_code_block, md_text, flags=re.DOTALL)
+
+    lines = md_text.splitlines()
+    processed_lines = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith(("-", "*")):
+            processed_lines.append(f"<li>{line.lstrip('-*').strip()}</li>")
+        else:
+            processed_lines.append(f"<p>{line}</p>")
+
+    html_output = "\n".join(processed_lines)
+    for i, block in enumerate(code_blocks):
+        html_output = html_output.replace(f"[[CODE_BLOCK_{i}]]", block)
+
+    return html_output
+
+
+def make_notes(blocks):
+    """Synthetic Technical Notes with ``blocks`` sections, each holding one code block."""
+    parts = ["### Video Summary\nA long talk about **building** data pipelines.\n"]
+    for n in range(blocks):
+        parts.append(
+            f"### Step {n + 1}: Configure `stage_{n}`\n"
+            f"1. Install the **dependencies** for stage {n}.\n"
+            f"2. Write the handler:\n"
+            f"   - keep it *idempotent*\n"
+            f"   - log with `logger.info`\n\n"
+            f"```python\n"
+            f"def handler_{n}(event, context):\n"
+            f"    records = [r for r in event['records'] if r['id'] > {n}]\n"
+            f"    return {{'count': len(records), 'stage': {n}}}\n"
+            f"```\n\n"
+            f"| Setting | Value |\n|---|---|\n| retries | {n % 5} |\n"
+        )
+    return "\n".join(parts)
+
+
+def best_of(fn, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, nargs="+", default=[100, 200, 400, 800])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7} {'chars':>9} {'legacy ms':>10} {'single-pass ms':>15} {'speedup':>8}")
+    for blocks in args.blocks:
+        text = make_notes(blocks)
+        legacy = best_of(legacy_markdown_to_html, text, args.repeat)
+        current = best_of(markdown_to_html, text, args.repeat)
+        print(f"{blocks:>7} {len(text):>9} {legacy * 1000:>10.2f} {current * 1000:>15.2f} {legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
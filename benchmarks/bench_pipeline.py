@@ -0,0 +1,314 @@
+"""Offline end-to-end benchmark of the notes pipeline with local YouTube and Gemini fakes.
+
+``YouTubeTranscriptApi`` and ``genai.GenerativeModel`` are replaced by fakes
+with configurable latency and payload sizes, so the transcript fetch,
+preprocessing, routing, generation (direct or map-reduce), markdown
+rendering and export all run for real without network access. Every request
+uses a fresh video ID and an empty cache directory, so nothing is served
+from cache unless ``--warm`` is given.
+
+    python benchmarks/bench_pipeline.py --minutes 10,60,180 --concurrency 1,4,16
+    python benchmarks/bench_pipeline.py --json after.json --compare before.json
+
+Transcripts, fake responses and latency jitter are all derived from fixed
+seeds, so two runs with the same arguments do the same work; save results
+with ``--json`` on one commit and pass them to ``--compare`` on another.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings read at import time: isolate the cache and keep the limiter out of the way.
+os.environ.setdefault("TUBENOTES_CACHE_DIR", tempfile.mkdtemp(prefix="tubenotes-bench-"))
+os.environ.setdefault("TUBENOTES_GEMINI_RPM", "1000000")
+os.environ.setdefault("TUBENOTES_GEMINI_TPM", "1000000000")
+
+import llm
+import metrics
+import service
+import transcripts
+from export import export_formats
+from pipeline import generate_notes
+from preprocess import preprocess_segments
+from prompts import NOTES_FORMAT_PROMPTS
+
+WORDS = (
+    "the model data function python variable loop request server cache token we will now see how "
+    "this works and why it matters for performance memory thread process queue latency index"
+).split()
+
+
+# =========================
+# FAKES
+# =========================
+class FakeTranscriptApi:
+    """Stands in for ``YouTubeTranscriptApi``; video IDs look like ``bench-<minutes>-<n>``."""
+
+    latency = 0.3
+    seed = 0
+
+    @classmethod
+    def get_transcript(cls, video_id, languages=None):
+        time.sleep(cls.latency)
+        minutes = int(video_id.split("-")[1])
+        rng = random.Random(f"{cls.seed}:{video_id}")
+        segments, start = [], 0.0
+        while start < minutes * 60:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(5, 12))]
+            if rng.random() < 0.15:
+                words[-1] += "."
+            text = " ".join(words)
+            if rng.random() < 0.03:
+                text = "[Music]"
+            duration = round(rng.uniform(2.0, 4.5), 2)
+            segments.append({"text": text, "start": round(start, 2), "duration": duration})
+            start += duration
+        return segments
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class _Response:
+    def __init__(self, text, usage):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class _StreamResponse:
+    def __init__(self, pieces, usage, delay):
+        self._pieces = pieces
+        self._delay = delay
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        for piece in self._pieces:
+            time.sleep(self._delay)
+            yield _Response(piece, None)
+
+
+class _TokenCount:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+class FakeGenerativeModel:
+    """Stands in for ``genai.GenerativeModel``: Markdown notes after a simulated delay."""
+
+    first_token_seconds = 0.5
+    tokens_per_second = 400.0
+    output_tokens = 1200
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def count_tokens(self, contents):
+        return _TokenCount(max(1, len("".join(contents)) // 4))
+
+    @classmethod
+    def notes(cls, contents):
+        rng = random.Random(zlib.crc32(contents.encode("utf-8")))
+        blocks, size = [], 0
+        while size < cls.output_tokens * 4:
+            kind = rng.random()
+            title = " ".join(rng.choice(WORDS) for _ in range(4)).title()
+            if kind < 0.15:
+                block = f"## {title}"
+            elif kind < 0.55:
+                block = "\n".join(
+                    f"- **{rng.choice(WORDS)}**: " + " ".join(rng.choice(WORDS) for _ in range(12))
+                    for _ in range(rng.randint(2, 6))
+                )
+            elif kind < 0.7:
+                block = "```python\n" + "\n".join(
+                    f"{rng.choice(WORDS)} = {rng.choice(WORDS)}({rng.randint(0, 99)})" for _ in range(rng.randint(3, 10))
+                ) + "\n```"
+            elif kind < 0.78:
+                block = "| Term | Meaning |\n|---|---|\n" + "\n".join(
+                    f"| `{rng.choice(WORDS)}` | {' '.join(rng.choice(WORDS) for _ in range(6))} |" for _ in range(4)
+                )
+            else:
+                block = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) + "."
+            blocks.append(block)
+            size += len(block) + 2
+        return "\n\n".join(blocks)
+
+    def generate_content(self, parts, stream=False, **kwargs):
+        contents = "".join(parts)
+        text = self.notes(contents)
+        usage = _Usage(len(contents) // 4, len(text) // 4)
+        time.sleep(self.first_token_seconds)
+        if not stream:
+            time.sleep(usage.candidates_token_count / self.tokens_per_second)
+            return _Response(text, usage)
+        pieces = [text[i:i + 400] for i in range(0, len(text), 400)]
+        return _StreamResponse(pieces, usage, 100 / self.tokens_per_second)
+
+    async def generate_content_async(self, parts, **kwargs):
+        contents = "".join(parts)
+        text = self.notes(contents)
+        usage = _Usage(len(contents) // 4, len(text) // 4)
+        await asyncio.sleep(self.first_token_seconds + usage.candidates_token_count / self.tokens_per_second)
+        return _Response(text, usage)
+
+
+def install_fakes(args):
+    FakeTranscriptApi.latency = args.fetch_latency
+    FakeTranscriptApi.seed = args.seed
+    FakeGenerativeModel.first_token_seconds = args.first_token_latency
+    FakeGenerativeModel.tokens_per_second = args.tokens_per_second
+    FakeGenerativeModel.output_tokens = args.output_tokens
+    transcripts.YouTubeTranscriptApi = FakeTranscriptApi
+    llm.genai.GenerativeModel = FakeGenerativeModel
+    llm.genai.configure = lambda **kwargs: None
+    llm.get_model.cache_clear()
+
+
+# =========================
+# SCENARIOS
+# =========================
+def run_request(video_id, prompt, lang_code, stream):
+    started = time.perf_counter()
+    segments, _ = preprocess_segments(transcripts.fetch_transcript(video_id), label=video_id)
+    transcript = transcripts.Transcript.from_segments(segments)
+    on_text = (lambda text: None) if stream else None
+    notes = generate_notes(transcript.text, prompt, lang_code, segments=transcript, on_text=on_text)
+    export_formats(notes)
+    return time.perf_counter() - started
+
+
+async def run_requests_async(video_ids, prompt, lang_code, concurrency):
+    """The same requests through ``service.NotesService``, at most ``concurrency`` at a time."""
+    notes_service = service.get_service()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(video_id):
+        async with limit:
+            started = time.perf_counter()
+            notes = await notes_service.notes(video_id, prompt, lang_code)
+            await asyncio.to_thread(export_formats, notes)
+            return time.perf_counter() - started
+
+    return await asyncio.gather(*(one(video_id) for video_id in video_ids))
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(minutes, concurrency, args, prompt):
+    metrics.reset()
+    count = concurrency * args.rounds
+    # --warm reuses one video so repeats are served from the caches.
+    video_ids = [f"bench-{minutes}-0" if args.warm else f"bench-{minutes}-{concurrency}-{n}" for n in range(count)]
+    started = time.perf_counter()
+    if args.use_async:
+        latencies = sorted(service.run(run_requests_async(video_ids, prompt, args.lang, concurrency)))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(lambda video_id: run_request(video_id, prompt, args.lang, args.stream), video_ids))
+    wall = time.perf_counter() - started
+    stages = metrics.summary()
+    return {
+        "minutes": minutes,
+        "concurrency": concurrency,
+        "requests": count,
+        "wall_seconds": round(wall, 3),
+        "throughput_rpm": round(60 * count / wall, 2),
+        "latency_p50": round(percentile(latencies, 0.5), 3),
+        "latency_p95": round(percentile(latencies, 0.95), 3),
+        "latency_max": round(latencies[-1], 3),
+        "latency_mean": round(statistics.mean(latencies), 3),
+        "stages_p50": {stage: round(stats["p50"], 4) for stage, stats in sorted(stages.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {(r["minutes"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    print(f"{'minutes':>7} {'conc':>5} {'reqs':>5} {'req/min':>9} {'p50 s':>8} {'p95 s':>8} {'max s':>8}  stage p50 (ms)")
+    for r in results:
+        stages = " ".join(f"{stage}={seconds * 1000:.0f}" for stage, seconds in r["stages_p50"].items())
+        line = (
+            f"{r['minutes']:>7} {r['concurrency']:>5} {r['requests']:>5} {r['throughput_rpm']:>9.1f} "
+            f"{r['latency_p50']:>8.3f} {r['latency_p95']:>8.3f} {r['latency_max']:>8.3f}  {stages}"
+        )
+        before = previous.get((r["minutes"], r["concurrency"]))
+        if before:
+            change = 100.0 * (r["latency_p50"] - before["latency_p50"]) / before["latency_p50"]
+            line += f"  (p50 {change:+.1f}% vs {baseline['meta'].get('commit') or 'baseline'})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", default="10,60,180", help="Comma-separated video lengths to simulate.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated numbers of concurrent requests.")
+    parser.add_argument("--rounds", type=int, default=2, help="Requests per worker in each scenario.")
+    parser.add_argument("--format", default="Technical Notes", choices=sorted(NOTES_FORMAT_PROMPTS))
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming generation path.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Serve requests through the asyncio service layer instead of threads.")
+    parser.add_argument("--warm", action="store_true", help="Repeat one video so later requests hit the caches.")
+    parser.add_argument("--fetch-latency", type=float, default=0.3, help="Fake transcript fetch time (s).")
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="Fake Gemini time to first token (s).")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="Fake Gemini output speed.")
+    parser.add_argument("--output-tokens", type=int, default=1200, help="Size of each fake Gemini response.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FILE", help="Write results as JSON.")
+    parser.add_argument("--compare", metavar="FILE", help="JSON results from an earlier run to compare against.")
+    args = parser.parse_args()
+
+    install_fakes(args)
+    prompt = NOTES_FORMAT_PROMPTS[args.format]
+    results = [
+        run_scenario(int(minutes), int(concurrency), args, prompt)
+        for minutes in args.minutes.split(",")
+        for concurrency in args.concurrency.split(",")
+    ]
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "args": {name: value for name, value in vars(args).items() if name not in ("json", "compare")},
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark transcript preprocessing on a corpus of saved transcripts.
+
+The corpus is either a directory of JSON files (each a list of
+``{"text", "start", "duration"}`` segments, as returned by
+``transcripts.fetch_transcript``) or the local transcript cache:
+
+    python benchmarks/bench_preprocess.py --corpus saved_transcripts/
+    python benchmarks/bench_preprocess.py --from-cache --stages strip_non_speech,dedupe_overlaps
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import DEFAULT_STAGES, STAGES, preprocess_segments
+
+
+def load_corpus(args):
+    if args.from_cache:
+        from cache import transcript_cache
+        return [(entry["key"][:12], entry["value"]) for entry in transcript_cache.entries(args.limit)]
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.json")))[:args.limit]:
+        with open(path, encoding="utf-8") as f:
+            corpus.append((os.path.splitext(os.path.basename(path))[0], json.load(f)))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", help="Directory of transcript JSON files.")
+    source.add_argument("--from-cache", action="store_true", help="Use transcripts from the local cache.")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"Comma-separated stages (available: {', '.join(STAGES)}).")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    stages = tuple(name for name in args.stages.split(",") if name)
+    corpus = load_corpus(args)
+    if not corpus:
+        sys.exit("No transcripts found.")
+
+    print(f"stages: {', '.join(stages)}\n")
+    print(f"{'video':<14} {'segments':>9} {'tokens in':>10} {'tokens out':>11} {'saved':>7} {'ms':>8}")
+    totals = {"before": 0, "after": 0, "seconds": 0.0}
+    for name, segments in corpus:
+        started = time.perf_counter()
+        cleaned, report = preprocess_segments(segments, stages, label=name)
+        elapsed = time.perf_counter() - started
+        totals["before"] += report["tokens_before"]
+        totals["after"] += report["tokens_after"]
+        totals["seconds"] += elapsed
+        print(
+            f"{name[:14]:<14} {len(segments):>9} {report['tokens_before']:>10} {report['tokens_after']:>11} "
+            f"{report['token_reduction_pct']:>6.1f}% {elapsed * 1000:>8.2f}"
+        )
+    saved = 100.0 * (totals["before"] - totals["after"]) / totals["before"] if totals["before"] else 0.0
+    print(
+        f"\n{len(corpus)} transcripts: {totals['before']:,} -> {totals['after']:,} estimated tokens "
+        f"({saved:.1f}% saved) in {totals['seconds'] * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare single-pass and generate-then-translate notes on latency and tokens.
+
+Runs against the live Gemini API (responses are never served from cache):
+
+    python benchmarks/bench_translation_modes.py --video dQw4w9WgXcQ --lang hi --runs 3
+    python benchmarks/bench_translation_modes.py --transcript-file talk.txt --lang es
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import DEFAULT_MODEL, complete, configure
+from prompts import LANGUAGES, NOTES_FORMAT_PROMPTS, localize_prompt, translation_prompt
+from transcripts import fetch_transcript, join_segments
+
+
+def run_single_pass(transcript, prompt, lang_code, model_name):
+    text, usage = complete(localize_prompt(prompt, lang_code), transcript, model_name)
+    return text, [usage]
+
+
+def run_two_pass(transcript, prompt, lang_code, model_name):
+    notes, first = complete(prompt, transcript, model_name)
+    text, second = complete(translation_prompt(lang_code), notes, model_name)
+    return text, [first, second]
+
+
+MODES = {"single-pass": run_single_pass, "two-pass": run_two_pass}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="YouTube video ID to fetch the transcript for.")
+    source.add_argument("--transcript-file", help="Plain-text transcript to use instead.")
+    parser.add_argument("--lang", default="hi", choices=sorted(LANGUAGES.values()))
+    parser.add_argument("--format", default="Technical Notes", choices=sorted(NOTES_FORMAT_PROMPTS))
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    configure()
+
+    if args.video:
+        transcript = join_segments(fetch_transcript(args.video))
+    else:
+        with open(args.transcript_file, encoding="utf-8") as f:
+            transcript = f.read()
+    prompt = NOTES_FORMAT_PROMPTS[args.format]
+
+    print(f"Transcript: {len(transcript)} chars | format: {args.format} | lang: {args.lang} | runs: {args.runs}\n")
+    print(f"{'mode':<12} {'calls':>5} {'mean s':>8} {'min s':>8} {'in tok':>8} {'out tok':>8} {'total tok':>10}")
+    for name, run in MODES.items():
+        latencies, usages = [], []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            _, usage = run(transcript, prompt, args.lang, args.model)
+            latencies.append(time.perf_counter() - started)
+            usages.append(usage)
+        calls = len(usages[0])
+        mean_tokens = {
+            field: statistics.mean(sum(u[field] for u in run_usage) for run_usage in usages)
+            for field in ("prompt_tokens", "output_tokens", "total_tokens")
+        }
+        print(
+            f"{name:<12} {calls:>5} {statistics.mean(latencies):>8.2f} {min(latencies):>8.2f} "
+            f"{mean_tokens['prompt_tokens']:>8.0f} {mean_tokens['output_tokens']:>8.0f} "
+            f"{mean_tokens['total_tokens']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
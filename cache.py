@@ -0,0 +1,207 @@
+"""Disk-backed caches shared by the Streamlit app and batch tools.
+
+Entries live in a small SQLite file so they survive Streamlit reruns and
+process restarts. Keys are content-addressed (a SHA-256 of the key parts),
+entries expire after an optional TTL, and the least recently used entries
+are evicted once the cache grows past its size limits.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.environ.get(
+    "TUBENOTES_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def make_key(*parts):
+    """Build a content-addressed key from any JSON-serialisable parts."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """SQLite key/value cache with TTL expiry and size-bounded LRU eviction."""
+
+    def __init__(self, name, ttl=None, max_entries=5000, max_bytes=200 * 1024 * 1024, directory=None):
+        directory = directory or CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        # A fresh connection per operation keeps the cache safe to use from
+        # Streamlit's script threads and from worker pools alike.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _bump(self, conn, counter):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (counter,)
+        )
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` or ``default`` on a miss."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._bump(conn, "misses")
+                return default
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+            return json.loads(row[0])
+
+    def contains(self, key):
+        """Whether an unexpired entry exists for ``key``, without loading it or counting a hit."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def set(self, key, value):
+        """Store ``value`` under ``key`` and evict old entries if over budget."""
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES ('evictions', ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (evicted,)
+        )
+
+    def delete(self, key):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def entries(self, limit=50):
+        """Return metadata for the most recently used entries, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, value, size, created, accessed FROM entries ORDER BY accessed DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"key": key, "value": json.loads(value), "size": size, "created": created, "accessed": accessed}
+            for key, value, size, created, accessed in rows
+        ]
+
+    def purge(self, older_than=None):
+        """Delete entries created more than ``older_than`` seconds ago (all if None)."""
+        with self._lock, self._connect() as conn:
+            if older_than is None:
+                cursor = conn.execute("DELETE FROM entries")
+            else:
+                cursor = conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - older_than,))
+            return cursor.rowcount
+
+    def stats(self):
+        """Return entry count, stored bytes and hit/miss/eviction counters."""
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+
+# =========================
+# SHARED CACHE INSTANCES
+# =========================
+transcript_cache = DiskCache(
+    "transcripts",
+    ttl=float(os.environ.get("TUBENOTES_TRANSCRIPT_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.environ.get("TUBENOTES_TRANSCRIPT_MAX_ENTRIES", 2000)),
+    max_bytes=int(os.environ.get("TUBENOTES_TRANSCRIPT_MAX_BYTES", 100 * 1024 * 1024))
+)
+
+response_cache = DiskCache(
+    "responses",
+    ttl=float(os.environ["TUBENOTES_RESPONSE_TTL"]) if os.environ.get("TUBENOTES_RESPONSE_TTL") else None,
+    max_entries=int(os.environ.get("TUBENOTES_RESPONSE_MAX_ENTRIES", 5000)),
+    max_bytes=int(os.environ.get("TUBENOTES_RESPONSE_MAX_BYTES", 200 * 1024 * 1024))
+)
+
+CACHES = {cache.name: cache for cache in (transcript_cache, response_cache)}
+
+
+# =========================
+# ADMIN CLI
+# =========================
+def main(argv=None):
+    """Inspect and purge caches: ``python cache.py {stats,list,purge} [--cache NAME]``."""
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Inspect or purge TubeNotes AI caches.")
+    parser.add_argument("command", choices=["stats", "list", "purge"])
+    parser.add_argument("--cache", choices=sorted(CACHES), help="Limit to one cache (default: all).")
+    parser.add_argument("--limit", type=int, default=20, help="Entries to show for 'list'.")
+    parser.add_argument("--key", help="Delete a single entry by key for 'purge'.")
+    parser.add_argument("--older-than", type=float, help="Only purge entries older than this many seconds.")
+    args = parser.parse_args(argv)
+
+    selected = [CACHES[args.cache]] if args.cache else list(CACHES.values())
+    for cache in selected:
+        if args.command == "stats":
+            print(f"{cache.name}: {cache.stats()}")
+        elif args.command == "list":
+            print(f"\n{cache.name}:")
+            for entry in cache.entries(args.limit):
+                value = entry["value"]
+                meta = {k: v for k, v in value.items() if k != "text"} if isinstance(value, dict) else {}
+                created = datetime.fromtimestamp(entry["created"]).isoformat(timespec="seconds")
+                print(f"  {entry['key']}  {entry['size']:>8} B  {created}  {meta}")
+        elif args.key:
+            cache.delete(args.key)
+            print(f"{cache.name}: deleted {args.key}")
+        else:
+            print(f"{cache.name}: purged {cache.purge(args.older_than)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Map-reduce summarization for transcripts too long for one comfortable call.
+
+Transcript segments are grouped into overlapping chunks that end on sentence
+boundaries where possible, each chunk is condensed concurrently (map), and the
+partial notes are combined with the selected notes-format prompt (reduce).
+"""
+import os
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from llm import DEFAULT_MODEL, generate
+from transcripts import Transcript, format_timestamp
+
+CHUNK_CHARS = int(os.environ.get("TUBENOTES_CHUNK_CHARS", 24000))
+CHUNK_OVERLAP_CHARS = int(os.environ.get("TUBENOTES_CHUNK_OVERLAP_CHARS", 1000))
+LONG_TRANSCRIPT_CHARS = int(os.environ.get("TUBENOTES_LONG_TRANSCRIPT_CHARS", 60000))
+MAP_WORKERS = int(os.environ.get("TUBENOTES_MAP_WORKERS", 4))
+
+MAP_PROMPT = (
+    "You are condensing one part of a long video transcript so that it can later be merged with the "
+    "other parts into complete notes.\n\n"
+    "Write detailed, well-organized Markdown notes for this part only. Keep every concept, step, "
+    "tool, command, number and code snippet that is mentioned; put code in fenced triple-backtick "
+    "blocks. Do not add an introduction or conclusion and do not invent information. The transcript "
+    "carries [m:ss] time markers; start each section with the marker where its topic begins, "
+    "written exactly as [m:ss].\n\n"
+    "Part {index} of {total} (video time {start} – {end}).\n\n"
+    "Transcript part:\n\n"
+)
+
+REDUCE_PREFIX = (
+    "The transcript below has been condensed into partial notes, one per consecutive part of the "
+    "video, in chronological order. Treat them as the full transcript; merge overlapping content "
+    "rather than repeating it. Keep their [m:ss] time markers at the start of the sections they "
+    "introduce.\n\n"
+)
+
+MARKED_PREFIX = (
+    "The transcript below carries [m:ss] time markers. Start each section of the notes with the "
+    "marker where its topic begins, written exactly as [m:ss].\n\n"
+)
+
+
+def chunk_segments(segments, max_chars=CHUNK_CHARS, overlap_chars=CHUNK_OVERLAP_CHARS):
+    """Group transcript segments into overlapping chunks of roughly ``max_chars``.
+
+    ``segments`` is a list of segment dicts or a ``Transcript``. Chunks only
+    break between segments. Once a chunk passes 80% of the budget it closes at
+    the next segment that ends a sentence; it is cut hard at ``max_chars``.
+    The last ``overlap_chars`` of each chunk are repeated at the start of the
+    next one so ideas spanning a boundary are not lost. Every boundary is a
+    binary search over the transcript's offsets and its sentence ends (both
+    built once in ``Transcript.from_segments``), so the text is never rescanned.
+    Returns a list of ``{"text", "start", "end", "first", "stop"}`` dicts, where
+    ``first``/``stop`` are the chunk's segment index range.
+    """
+    transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments)
+    offsets, sentence_ends, total = transcript.offsets, transcript.sentence_ends, len(transcript)
+    chunks = []
+    soft_limit = max_chars * 0.8
+    start = 0
+    while start < total:
+        base = offsets[start]
+        # Segments [start, hard_stop) fit in max_chars (always at least one).
+        hard_stop = min(max(bisect_right(offsets, base + max_chars, start) - 1, start + 1), total)
+        soft_stop = bisect_left(offsets, base + soft_limit, start)
+        n = bisect_left(sentence_ends, soft_stop - 1)
+        end = sentence_ends[n] + 1 if n < len(sentence_ends) and sentence_ends[n] < hard_stop else hard_stop
+        chunks.append({
+            "text": transcript.span_text(start, end),
+            "start": transcript.starts[start],
+            "end": transcript.end_time(end - 1),
+            "first": start,
+            "stop": end,
+        })
+        if end >= total:
+            break
+        # Step back over whole segments to build the overlap, always moving forward.
+        start = bisect_left(offsets, offsets[end] - overlap_chars, start + 1, end)
+    return chunks
+
+
+def map_requests(transcript, chunks):
+    """``(prompt, text)`` of the map call for each chunk, with ``[m:ss]`` markers in the text."""
+    return [
+        (
+            MAP_PROMPT.format(
+                index=index + 1,
+                total=len(chunks),
+                start=format_timestamp(chunk["start"]),
+                end=format_timestamp(chunk["end"]),
+            ),
+            transcript.marked_text(chunk["first"], chunk["stop"]),
+        )
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def marked_transcript(transcript):
+    """The whole transcript with ``[m:ss]`` markers, for a single direct call."""
+    return MARKED_PREFIX + transcript.marked_text(0, len(transcript))
+
+
+def reduce_text(chunks, partials):
+    """The reduce call's input: every partial note under a header with its part's time range."""
+    return REDUCE_PREFIX + "\n\n".join(
+        f"--- Part {i + 1} ({format_timestamp(chunk['start'])} – {format_timestamp(chunk['end'])}) ---\n{notes}"
+        for i, (chunk, notes) in enumerate(zip(chunks, partials))
+    )
+
+
+def map_reduce_summarize(segments, prompt, model_name=DEFAULT_MODEL, max_workers=MAP_WORKERS,
+                         max_chars=CHUNK_CHARS, overlap_chars=CHUNK_OVERLAP_CHARS, output_lang_code="en"):
+    """Summarize a long transcript chunk-by-chunk in parallel, then merge with ``prompt``.
+
+    Map calls run through a bounded thread pool so wall-clock time grows with
+    ``len(chunks) / max_workers`` rather than with the transcript length.
+    Partial notes are always English; only the reduce call writes in
+    ``output_lang_code``. Every call goes through ``llm.generate`` and is cached.
+    """
+    transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments)
+    chunks = chunk_segments(transcript, max_chars, overlap_chars)
+    if len(chunks) <= 1:
+        return generate(prompt, marked_transcript(transcript) if chunks else "", output_lang_code, model_name)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        partials = list(pool.map(
+            lambda request: generate(request[0], request[1], "en", model_name), map_requests(transcript, chunks)
+        ))
+    return generate(prompt, reduce_text(chunks, partials), output_lang_code, model_name)
@@ -0,0 +1,331 @@
+"""Markdown rendering and HTML export for generated notes."""
+import gzip
+import html
+import io
+import re
+import zipfile
+
+from metrics import timed
+
+
+# =========================
+# MARKDOWN TO HTML
+# =========================
+# Single-pass renderer: every line is looked at once and output is collected
+# in a list, so rendering stays linear in the size of the notes no matter how
+# many code blocks they contain. Patterns are compiled once at import.
+HEADING_RE = re.compile(r"^(#{1,6})(?:\s+(.*?))?\s*#*\s*$")
+FENCE_RE = re.compile(r"^(\s*)(`{3,}|~{3,})\s*([\w+#.-]*)")
+LIST_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+HR_RE = re.compile(r"^\s*([-*_])(?:\s*\1){2,}\s*$")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+INLINE_RE = re.compile(
+    r"(?P<code>`+)(?P<code_text>.+?)(?P=code)"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_alt>.+?)__"
+    r"|(?<![\w*])\*(?P<italic>[^\s*](?:.*?[^\s*])?)\*(?![\w*])"
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)\)"
+)
+
+
+def render_inline(text):
+    """Render inline code, bold, italics and links; everything else is escaped."""
+    out = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        out.append(html.escape(text[position:match.start()]))
+        if match.group("code"):
+            out.append(f"<code>{html.escape(match.group('code_text').strip())}</code>")
+        elif match.group("bold") is not None or match.group("bold_alt") is not None:
+            out.append(f"<strong>{render_inline(match.group('bold') or match.group('bold_alt'))}</strong>")
+        elif match.group("italic") is not None:
+            out.append(f"<em>{render_inline(match.group('italic'))}</em>")
+        else:
+            url = match.group("link_url")
+            if url.lower().startswith(("http://", "https://", "mailto:", "#")):
+                out.append(f'<a href="{html.escape(url)}">{render_inline(match.group("link_text"))}</a>')
+            else:
+                out.append(html.escape(match.group(0)))
+        position = match.end()
+    out.append(html.escape(text[position:]))
+    return "".join(out)
+
+
+def _indent_width(whitespace):
+    return len(whitespace.replace("\t", "    "))
+
+
+def _table_cells(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _top_heading_level(lines):
+    """Level of the shallowest heading outside code blocks (1 when there are none)."""
+    top, fence = None, None
+    for line in lines:
+        if fence:
+            if line.strip().startswith(fence):
+                fence = None
+            continue
+        match = FENCE_RE.match(line)
+        if match:
+            fence = match.group(2)
+            continue
+        heading = HEADING_RE.match(line.strip())
+        if heading and heading.group(2):
+            top = min(top or 6, len(heading.group(1)))
+    return top or 1
+
+
+def markdown_to_html(md_text):
+    lines = md_text.strip().splitlines()
+    # The page title is <h1>, so the shallowest heading level in the notes maps to
+    # <h2> and deeper levels follow one to one, up to <h6>. The format prompts
+    # write their sections as "###", and those render as <h2> section headings.
+    heading_shift = 2 - _top_heading_level(lines)
+    out = []
+    paragraph = []
+    lists = []  # stack of (indent, tag) for open <ul>/<ol>; the innermost <li> is left open
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{render_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+
+    def close_lists(min_indent=-1):
+        while lists and lists[-1][0] > min_indent:
+            out.append(f"</li></{lists.pop()[1]}>")
+
+    i, total = 0, len(lines)
+    while i < total:
+        line = lines[i]
+        stripped = line.strip()
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        fence = FENCE_RE.match(line)
+        if fence:
+            flush_paragraph()
+            indent = _indent_width(fence.group(1))
+            if not lists or indent <= lists[-1][0]:
+                close_lists()
+            marker, lang = fence.group(2), fence.group(3).lower()
+            code_lines = []
+            i += 1
+            while i < total and not lines[i].strip().startswith(marker):
+                code_line = lines[i]
+                # Drop the fence's own indentation (e.g. code nested in a list item).
+                code_lines.append(code_line[indent:] if code_line[:indent].strip() == "" else code_line.lstrip())
+                i += 1
+            i += 1  # closing fence (or end of text)
+            code = html.escape("\n".join(code_lines).strip("\n"))
+            if lang == "mermaid":
+                out.append(f'<pre class="mermaid">{code}</pre>')
+            else:
+                out.append(f'<pre><code class="language-{lang}">{code}</code></pre>')
+            continue
+
+        heading = HEADING_RE.match(stripped)
+        if heading:
+            flush_paragraph()
+            close_lists()
+            if heading.group(2):
+                level = min(6, len(heading.group(1)) + heading_shift)
+                out.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if HR_RE.match(stripped):
+            flush_paragraph()
+            close_lists()
+            out.append("<hr>")
+            i += 1
+            continue
+
+        item = LIST_ITEM_RE.match(line)
+        if item:
+            flush_paragraph()
+            indent = _indent_width(item.group(1))
+            tag = "ul" if item.group(2) in "-*+" else "ol"
+            close_lists(indent)
+            if lists and lists[-1][0] == indent and lists[-1][1] != tag:
+                close_lists(indent - 1)
+            if lists and lists[-1][0] == indent:
+                out.append("</li>")
+            else:
+                start = item.group(2)[:-1] if tag == "ol" else "1"
+                out.append(f'<{tag} start="{start}">' if tag == "ol" and start != "1" else f"<{tag}>")
+                lists.append((indent, tag))
+            out.append(f"<li>{render_inline(item.group(3))}")
+            i += 1
+            continue
+
+        if "|" in stripped and i + 1 < total and TABLE_SEPARATOR_RE.match(lines[i + 1]) and "-" in lines[i + 1]:
+            flush_paragraph()
+            close_lists()
+            aligns = []
+            for cell in _table_cells(lines[i + 1]):
+                if cell.startswith(":") and cell.endswith(":"):
+                    aligns.append(' style="text-align:center"')
+                elif cell.endswith(":"):
+                    aligns.append(' style="text-align:right"')
+                else:
+                    aligns.append("")
+            header = _table_cells(line)
+            out.append("<table><thead><tr>")
+            out.extend(
+                f"<th{aligns[n] if n < len(aligns) else ''}>{render_inline(cell)}</th>"
+                for n, cell in enumerate(header)
+            )
+            out.append("</tr></thead><tbody>")
+            i += 2
+            while i < total and "|" in lines[i] and lines[i].strip():
+                out.append("<tr>")
+                out.extend(
+                    f"<td{aligns[n] if n < len(aligns) else ''}>{render_inline(cell)}</td>"
+                    for n, cell in enumerate(_table_cells(lines[i]))
+                )
+                out.append("</tr>")
+                i += 1
+            out.append("</tbody></table>")
+            continue
+
+        if stripped.startswith(">"):
+            flush_paragraph()
+            close_lists()
+            quote = []
+            while i < total and lines[i].strip().startswith(">"):
+                quote.append(lines[i].strip()[1:].strip())
+                i += 1
+            out.append(f"<blockquote>{render_inline(' '.join(quote))}</blockquote>")
+            continue
+
+        if lists:
+            if _indent_width(line[:len(line) - len(line.lstrip())]) > lists[-1][0]:
+                # Continuation of the current list item.
+                out.append(f" {render_inline(stripped)}")
+                i += 1
+                continue
+            close_lists()
+        paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    close_lists()
+    return "\n".join(out)
+
+# =========================
+# CREATE HTML FILE
+# =========================
+MERMAID_SCRIPT = """
+        <script type="module">
+            import mermaid from "https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs";
+            mermaid.initialize({ startOnLoad: true });
+        </script>"""
+
+
+def render_html(content, header_title="📝 TubeNotes AI"):
+    """Render notes markdown into a standalone HTML document string."""
+    with timed("render", input_chars=len(content)):
+        body = markdown_to_html(content)
+    html_template = f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="utf-8">
+        <title>📝 TubeNotes AI</title>
+        <style>
+            body {{
+                font-family: 'Segoe UI', sans-serif;
+                margin: 40px;
+                color: #333;
+                background-color: #fafafa;
+            }}
+            h1 {{
+                text-align: center;
+                color: #003366;
+            }}
+            h2 {{
+                color: #004488;
+                border-bottom: 1px solid #ccc;
+                padding-bottom: 5px;
+            }}
+            h3, h4, h5, h6 {{
+                color: #004488;
+            }}
+            pre {{
+                background: #f4f4f4;
+                padding: 10px;
+                border-radius: 8px;
+                overflow-x: auto;
+            }}
+            code {{
+                background: #f4f4f4;
+                padding: 1px 4px;
+                border-radius: 4px;
+            }}
+            pre code {{
+                padding: 0;
+            }}
+            table {{
+                border-collapse: collapse;
+                margin: 10px 0;
+            }}
+            th, td {{
+                border: 1px solid #ccc;
+                padding: 6px 10px;
+            }}
+            blockquote {{
+                border-left: 4px solid #ccc;
+                margin-left: 0;
+                padding-left: 12px;
+                color: #555;
+            }}
+        </style>{MERMAID_SCRIPT if 'class="mermaid"' in body else ""}
+    </head>
+    <body>
+        <h1>{header_title}</h1>
+        {body}
+    </body>
+    </html>
+    """
+    return html_template
+
+
+# =========================
+# IN-MEMORY EXPORTS
+# =========================
+def export_html_bytes(content, header_title="📝 TubeNotes AI"):
+    """Rendered HTML document as UTF-8 bytes, ready for a download button."""
+    return render_html(content, header_title).encode("utf-8")
+
+
+def export_formats(content, header_title="📝 TubeNotes AI"):
+    """Render once and return every export format as ``{extension: (bytes, mime)}``."""
+    with timed("export", input_chars=len(content)):
+        html_bytes = export_html_bytes(content, header_title)
+        return {
+            "html": (html_bytes, "text/html"),
+            "html.gz": (gzip.compress(html_bytes, compresslevel=6), "application/gzip"),
+            "md": (content.encode("utf-8"), "text/markdown"),
+        }
+
+
+def export_bundle(notes_by_format, base_name="video_summary"):
+    """Zip the HTML and Markdown exports of several notes formats into one download."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for notes_format, content in notes_by_format.items():
+            slug = re.sub(r"[^\w-]+", "_", notes_format).strip("_") or "notes"
+            bundle.writestr(f"{base_name}_{slug}.html", export_html_bytes(content, f"📘 {notes_format}"))
+            bundle.writestr(f"{base_name}_{slug}.md", content.encode("utf-8"))
+    return buffer.getvalue()
+
@@ -0,0 +1,88 @@
+"""MinHash fingerprints of transcripts for near-duplicate video detection.
+
+Re-uploads and mirrors of the same talk have different video IDs but nearly
+the same transcript. A transcript is reduced to word shingles and summarised
+by a fixed-size MinHash signature whose agreement with another signature
+estimates the Jaccard similarity of the two shingle sets. Signatures are
+split into bands for locality-sensitive hashing, so the index only compares
+a transcript against the few videos that share a band bucket with it.
+
+Signatures use one-permutation hashing: every shingle is hashed once and
+lands in one of ``NUM_HASHES`` bins, keeping the bin minimum, with empty bins
+filled from their neighbours. That keeps fingerprinting one pass over the
+transcript instead of one pass per hash function.
+"""
+import hashlib
+import os
+import re
+from array import array
+
+SHINGLE_WORDS = int(os.environ.get("TUBENOTES_SHINGLE_WORDS", 5))
+NUM_HASHES = 128
+BANDS = 16                       # 16 bands of 8 rows: pairs above ~0.7 Jaccard become candidates
+ROWS = NUM_HASHES // BANDS
+MIN_SHINGLES = 20                # shorter transcripts are too small to fingerprint meaningfully
+
+_MAX = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Set of ``size``-word shingles of the lowercased text."""
+    words = _WORD_RE.findall(text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(0, len(words) - size + 1))}
+
+
+def signature(text):
+    """MinHash signature of ``text`` as ``NUM_HASHES`` unsigned 64-bit ints, or None if it is too short."""
+    grams = shingles(text)
+    if len(grams) < MIN_SHINGLES:
+        return None
+    bins = [_MAX] * NUM_HASHES
+    for gram in grams:
+        value = _hash64(gram.encode("utf-8"))
+        index = value % NUM_HASHES
+        if value < bins[index]:
+            bins[index] = value
+    # Densify: an empty bin borrows the value of the next non-empty bin (circularly),
+    # rehashed with the distance so borrowed values still differ between bins.
+    if _MAX in bins:
+        original = list(bins)
+        for i in range(NUM_HASHES):
+            if original[i] == _MAX:
+                step = 1
+                while original[(i + step) % NUM_HASHES] == _MAX:
+                    step += 1
+                source = original[(i + step) % NUM_HASHES]
+                bins[i] = _hash64(source.to_bytes(8, "little") + step.to_bytes(2, "little"))
+    return array("Q", bins)
+
+
+def band_keys(sig):
+    """One signed 64-bit bucket key per band, for the LSH index."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            "little", signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the transcripts behind two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_HASHES
+
+
+def to_blob(sig):
+    return sig.tobytes()
+
+
+def from_blob(blob):
+    sig = array("Q")
+    sig.frombytes(blob)
+    return sig
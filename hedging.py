@@ -0,0 +1,269 @@
+"""Hedged Gemini requests with model fallback, to cut tail latency.
+
+``Dispatcher.call`` runs a request on the requested model. If no response
+has arrived after the hedge delay, the same request is fired on the next
+candidate model (a duplicate on the same model when no fallbacks are
+configured); when an attempt fails after the rate limiter's retries, the
+next candidate starts at once. The first good response wins and the other
+attempts are cancelled, or abandoned when a blocking call is already in
+flight.
+
+The hedge delay follows each model's recent latency for the same kind of
+call (the 95th percentile of its last calls). Kinds keep a streamed call's
+wait for its first chunk apart from full calls, and full calls apart by input
+size, so quick calls never set the delay for long ones (see ``call_kind``).
+Until enough calls of a kind were seen, a stream is hedged after
+``TUBENOTES_HEDGE_AFTER`` seconds and a full call is not hedged at all, since
+a long generation can take longer than any flat delay.
+Fallback models (``TUBENOTES_FALLBACK_MODELS``, none by default) are opt-in
+and tried fastest first, by live latency or by the probe results that
+``python list_models.py --probe`` stores in ``model_latency.json``.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cache import CACHE_DIR
+from rate_limit import gemini_limiter
+
+logger = logging.getLogger(__name__)
+
+HEDGING = os.environ.get("TUBENOTES_HEDGING", "1") == "1"
+FALLBACK_MODELS = [
+    name.strip()
+    for name in os.environ.get("TUBENOTES_FALLBACK_MODELS", "").split(",")
+    if name.strip()
+]
+HEDGE_AFTER_SECONDS = float(os.environ.get("TUBENOTES_HEDGE_AFTER", 30))
+MAX_HEDGES = int(os.environ.get("TUBENOTES_MAX_HEDGES", 1))
+HEDGE_WORKERS = int(os.environ.get("TUBENOTES_HEDGE_WORKERS", 32))
+HEDGE_QUANTILE = 0.95
+MIN_SAMPLES = 20
+SIZE_CLASS_TOKENS = 2048  # full calls up to this many input tokens share one size class
+LATENCY_FILE = os.path.join(CACHE_DIR, "model_latency.json")
+
+
+def call_kind(estimated_tokens, stream=False):
+    """Latency class of a call: ``"first_chunk"`` for streams, else ``"full:<n>"`` by input size.
+
+    Size classes grow by a factor of four, so a map chunk, a translation
+    section and a whole transcript keep separate latency samples.
+    """
+    if stream:
+        return "first_chunk"
+    ratio = max(1.0, estimated_tokens / SIZE_CLASS_TOKENS)
+    return f"full:{math.ceil(math.log(ratio, 4))}"
+
+
+def load_probe_results(path=LATENCY_FILE):
+    """Per-model probe results written by ``list_models.py --probe`` (empty if never run)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_probe_results(results, path=LATENCY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class Dispatcher:
+    """Runs one logical request as one or more model attempts and keeps the first good response."""
+
+    def __init__(self, fallback_models=FALLBACK_MODELS, hedge_after=HEDGE_AFTER_SECONDS,
+                 max_hedges=MAX_HEDGES, enabled=HEDGING, probe_results=None):
+        self.fallback_models = list(fallback_models)
+        self.default_hedge_after = hedge_after
+        self.max_hedges = max_hedges if enabled else 0
+        self.probe_results = load_probe_results() if probe_results is None else probe_results
+        self._pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="gemini-hedge")
+        self._lock = threading.Lock()
+        self._latency = {}  # (model, kind) -> deque of recent successful call durations
+        self._stats = {"requests": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "failures": 0}
+
+    # ---- latency bookkeeping ----
+    def _observe(self, model_name, kind, seconds):
+        with self._lock:
+            self._latency.setdefault((model_name, kind), deque(maxlen=200)).append(seconds)
+
+    def _quantile(self, model_name, kind, q):
+        with self._lock:
+            samples = sorted(self._latency.get((model_name, kind), ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_after(self, model_name, kind="full:0"):
+        """Seconds to wait for a ``kind`` call to ``model_name`` before hedging, or None to not hedge.
+
+        Without enough samples only streams fall back to the default delay;
+        full calls run unhedged, because their length depends on the input.
+        """
+        measured = self._quantile(model_name, kind, HEDGE_QUANTILE)
+        if measured is not None:
+            return measured
+        return self.default_hedge_after if kind == "first_chunk" else None
+
+    def expected_latency(self, model_name, kind="full:0"):
+        measured = self._quantile(model_name, kind, 0.5)
+        if measured is not None:
+            return measured
+        probe = self.probe_results.get(model_name) or {}
+        return probe.get("median_seconds", float("inf"))
+
+    def candidates(self, model_name, kind="full:0"):
+        """The requested model first, then the other fallbacks, fastest first."""
+        fallbacks = [name for name in self.fallback_models if name != model_name]
+        return [model_name] + sorted(fallbacks, key=lambda name: self.expected_latency(name, kind))
+
+    def _next_model(self, candidates, launched):
+        # Hedges and fallbacks walk the candidate list; with a single model they duplicate it.
+        return candidates[launched % len(candidates)]
+
+    def _should_hedge(self, hedges, deadline):
+        # A duplicate request while calls are queued for quota would only lengthen the queue.
+        return (
+            deadline is not None and hedges < self.max_hedges and gemini_limiter.metrics()["queue_depth"] == 0
+        )
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, amount in increments.items():
+                self._stats[name] += amount
+
+    # ---- blocking calls ----
+    def _timed(self, attempt, model_name, kind):
+        started = time.monotonic()
+        result = attempt(model_name)
+        self._observe(model_name, kind, time.monotonic() - started)
+        return result
+
+    def call(self, attempt, model_name, kind="full:0"):
+        """Run ``attempt(model)`` with hedging and fallback; returns ``(result, model)``.
+
+        ``kind`` (see ``call_kind``) picks the latency samples that set the
+        hedge delay. Errors propagate once every candidate has failed.
+        """
+        self._count(requests=1)
+        candidates = self.candidates(model_name, kind)
+        pending = {}
+        launched = hedges = 0
+        error = None
+
+        def launch():
+            nonlocal launched
+            pending[self._pool.submit(self._timed, attempt, self._next_model(candidates, launched), kind)] = launched
+            launched += 1
+
+        launch()
+        delay = self.hedge_after(model_name, kind)
+        deadline = None if delay is None else time.monotonic() + delay
+        while pending:
+            timeout = max(0.0, deadline - time.monotonic()) if self._should_hedge(hedges, deadline) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedges += 1
+                self._count(hedges=1)
+                logger.info("no response from %s after %.1fs; hedging", model_name, delay)
+                launch()
+                deadline = time.monotonic() + delay
+                continue
+            for future in done:
+                index = pending.pop(future)
+                model = self._next_model(candidates, index)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    logger.warning("attempt on %s failed: %s", model, e)
+                    if launched < len(candidates):  # fall back to a model not tried yet
+                        self._count(fallbacks=1)
+                        launch()
+                    continue
+                for other in pending:
+                    other.cancel()  # only stops attempts not started yet; running calls are abandoned
+                self._count(hedge_wins=int(index > 0))
+                return result, model
+        self._count(failures=1)
+        raise error
+
+    # ---- coroutines ----
+    async def _timed_async(self, attempt, model_name, kind):
+        started = time.monotonic()
+        result = await attempt(model_name)
+        self._observe(model_name, kind, time.monotonic() - started)
+        return result
+
+    async def call_async(self, attempt, model_name, kind="full:0"):
+        """``call`` for coroutine functions; losing attempts are cancelled."""
+        self._count(requests=1)
+        candidates = self.candidates(model_name, kind)
+        pending = {}
+        launched = hedges = 0
+        error = None
+
+        def launch():
+            nonlocal launched
+            model = self._next_model(candidates, launched)
+            pending[asyncio.ensure_future(self._timed_async(attempt, model, kind))] = launched
+            launched += 1
+
+        launch()
+        try:
+            delay = self.hedge_after(model_name, kind)
+            deadline = None if delay is None else time.monotonic() + delay
+            while pending:
+                timeout = max(0.0, deadline - time.monotonic()) if self._should_hedge(hedges, deadline) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedges += 1
+                    self._count(hedges=1)
+                    logger.info("no response from %s after %.1fs; hedging", model_name, delay)
+                    launch()
+                    deadline = time.monotonic() + delay
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    model = self._next_model(candidates, index)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        logger.warning("attempt on %s failed: %s", model, e)
+                        if launched < len(candidates):  # fall back to a model not tried yet
+                            self._count(fallbacks=1)
+                            launch()
+                        continue
+                    self._count(hedge_wins=int(index > 0))
+                    return result, model
+            self._count(failures=1)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            series = list(self._latency)
+        stats["latency"] = {
+            f"{model} {kind}": {
+                "p50": self._quantile(model, kind, 0.5), "p95": self._quantile(model, kind, HEDGE_QUANTILE)
+            }
+            for model, kind in series
+        }
+        return stats
+
+
+gemini_dispatcher = Dispatcher()
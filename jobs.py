@@ -0,0 +1,237 @@
+"""Background notes jobs: a local worker pool backed by a persistent job table.
+
+The Streamlit page enqueues a job and polls it instead of generating inline,
+so slow videos never block a session and a browser refresh can pick the
+result up again. Jobs are keyed by video, prompt, language and mode, so
+identical requests from many sessions share one in-flight generation.
+
+Each process renews a lease on its active jobs by touching ``updated``
+every ``TUBENOTES_JOB_HEARTBEAT`` seconds. A queued or running job whose
+lease has lapsed (its worker died) is taken over by the next ``submit`` or
+``get`` that sees it, so identical requests never wait on a dead job.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled
+
+from cache import CACHE_DIR, make_key
+from library import get_library
+from llm import text_digest
+from metrics import StageProgress
+from pipeline import PIPELINE_STAGES, generate_notes
+from preprocess import preprocess_segments
+from transcripts import fetch_transcript, join_segments
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("TUBENOTES_JOB_WORKERS", 4))
+JOB_RETENTION_SECONDS = float(os.environ.get("TUBENOTES_JOB_RETENTION", 24 * 3600))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("TUBENOTES_JOB_HEARTBEAT", 10))
+JOB_LEASE_SECONDS = float(os.environ.get("TUBENOTES_JOB_LEASE", 6 * JOB_HEARTBEAT_SECONDS))
+PARTIAL_UPDATE_SECONDS = 0.5
+
+ACTIVE_STATUSES = ("queued", "running")
+
+COLUMNS = (
+    "id", "status", "stage", "progress", "video_id", "notes_format", "lang", "single_pass",
+    "prompt", "partial", "result", "error", "error_kind", "owner", "created", "updated", "plan"
+)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Thread-pool job runner whose state lives in SQLite."""
+
+    def __init__(self, path=None, max_workers=JOB_WORKERS):
+        self.path = path or os.path.join(CACHE_DIR, "jobs.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tubenotes-job")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, progress INTEGER NOT NULL DEFAULT 0,"
+                " video_id TEXT NOT NULL, notes_format TEXT, lang TEXT NOT NULL, single_pass INTEGER NOT NULL,"
+                " prompt TEXT NOT NULL, partial TEXT, result TEXT, error TEXT, error_kind TEXT,"
+                " owner INTEGER, created REAL NOT NULL, updated REAL NOT NULL, plan TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "plan" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN plan TEXT")
+            conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND updated < ?",
+                (time.time() - JOB_RETENTION_SECONDS,)
+            )
+        self._recover()
+        threading.Thread(target=self._heartbeat, name="tubenotes-job-heartbeat", daemon=True).start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, video_id, notes_format, prompt, lang_code, single_pass=True):
+        """Enqueue a job and return its ID; identical active or finished jobs are reused."""
+        job_id = make_key("job", video_id, text_digest(prompt), lang_code, bool(single_pass))
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE makes check-then-insert atomic across sessions and processes.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row[0] != "failed":
+                claimed = self._claim_stale(conn, job_id)
+                conn.execute("COMMIT")
+                if claimed:
+                    self._pool.submit(self._run, job_id)
+                return job_id
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, stage, progress, video_id, notes_format, lang,"
+                " single_pass, prompt, owner, created, updated)"
+                " VALUES (?, 'queued', 'queued', 0, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, video_id, notes_format, lang_code, int(bool(single_pass)), prompt, os.getpid(), now, now)
+            )
+            conn.execute("COMMIT")
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist (or was pruned)."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(COLUMNS, row))
+        if job["status"] in ACTIVE_STATUSES and job["updated"] < time.time() - JOB_LEASE_SECONDS:
+            with self._connect() as conn:
+                claimed = self._claim_stale(conn, job_id)
+            if claimed:
+                self._pool.submit(self._run, job_id)
+                return self.get(job_id)
+        job["plan"] = json.loads(job["plan"]) if job["plan"] else None
+        return job
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        if job is None or job["status"] != "queued":
+            return
+        stored = get_library().lookup(job["video_id"], job["prompt"], job["lang"])
+        if stored is not None:
+            self._update(job_id, status="done", stage="done", progress=100, result=stored["notes"])
+            return
+        self._update(job_id, status="running", stage="transcript", progress=0)
+        progress = StageProgress(
+            PIPELINE_STAGES, on_progress=lambda percent: self._update(job_id, progress=percent)
+        )
+        try:
+            segments = fetch_transcript(job["video_id"])
+            progress.complete("transcript")
+            segments, _ = preprocess_segments(segments, label=job["video_id"])
+            progress.complete("preprocess")
+        except (NoTranscriptFound, TranscriptsDisabled) as e:
+            self._update(job_id, status="failed", error=str(e), error_kind="no_transcript")
+            return
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), error_kind="transcript")
+            return
+
+        transcript_text = join_segments(segments)
+        # A re-upload or mirror of a video that already has these notes needs no generation.
+        similar = get_library().reuse_similar(
+            job["video_id"], transcript_text, job["notes_format"], job["prompt"], job["lang"]
+        )
+        if similar is not None:
+            self._update(job_id, status="done", stage="done", progress=100, result=similar["notes"])
+            return
+
+        self._update(job_id, stage="generation")
+        last_partial = [0.0]
+
+        def on_text(text):
+            now = time.monotonic()
+            if now - last_partial[0] >= PARTIAL_UPDATE_SECONDS:
+                last_partial[0] = now
+                self._update(job_id, partial=text)
+
+        try:
+            summary = generate_notes(
+                transcript_text, job["prompt"], job["lang"], segments=segments,
+                single_pass=bool(job["single_pass"]),
+                progress=progress,
+                on_text=on_text,
+                notes_format=job["notes_format"],
+                on_plan=lambda plan: self._update(job_id, plan=json.dumps(plan)),
+            )
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), error_kind="generation")
+            return
+        get_library().save(job["video_id"], job["notes_format"], job["prompt"], job["lang"], summary)
+        self._update(job_id, status="done", stage="done", progress=100, result=summary, partial=None)
+
+    def _claim_stale(self, conn, job_id):
+        """Take over ``job_id`` if it is active but its lease lapsed; True when claimed."""
+        now = time.time()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, owner = ?, updated = ?"
+            " WHERE id = ? AND status IN ('queued', 'running') AND updated < ?",
+            (os.getpid(), now, job_id, now - JOB_LEASE_SECONDS)
+        )
+        if cursor.rowcount:
+            logger.warning("job %s lost its worker; requeued in process %s", job_id, os.getpid())
+        return cursor.rowcount > 0
+
+    def _heartbeat(self):
+        """Renew the lease on every active job this process owns."""
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET updated = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                        (time.time(), os.getpid())
+                    )
+            except sqlite3.Error as e:
+                logger.warning("job heartbeat failed: %s", e)
+
+    def _recover(self):
+        """Requeue active jobs whose owning process died before finishing them."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        for job_id, owner in rows:
+            if owner and owner != os.getpid() and _pid_alive(owner):
+                continue  # a live process still owns it; its lease covers it from here on
+            self._update(job_id, status="queued", stage="queued", progress=0, owner=os.getpid())
+            self._pool.submit(self._run, job_id)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide job queue, created on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,283 @@
+"""Persistent notes library with full-text search.
+
+Every finished set of notes is saved here with its video ID, format,
+language and timestamps, so notes the team already generated are served
+again instead of calling Gemini, and can be found by keyword from the UI or
+``python library.py search``. Notes live in a SQLite table with an FTS5
+index kept in sync by triggers; builds of SQLite without FTS5 fall back to a
+slower substring scan.
+
+The library also keeps a MinHash fingerprint of every transcript it sees,
+banded into an LSH index, so notes for a re-upload or mirror of a video
+already summarised under another ID can be reused too.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import fingerprint
+from cache import CACHE_DIR, make_key
+from llm import text_digest
+
+LIBRARY_PATH = os.environ.get("TUBENOTES_LIBRARY", os.path.join(CACHE_DIR, "library.sqlite3"))
+# Estimated transcript Jaccard similarity above which another video's notes are reused.
+DUPLICATE_THRESHOLD = float(os.environ.get("TUBENOTES_DUPLICATE_THRESHOLD", 0.8))
+
+COLUMNS = ("id", "video_id", "notes_format", "lang", "prompt", "name", "notes", "created", "updated")
+# Column weights for ranking: a hit in the name or format counts more than one in the body.
+BM25_WEIGHTS = (1.0, 4.0, 8.0, 2.0)  # notes, notes_format, name, video_id
+
+
+def notes_id(video_id, prompt, lang_code):
+    """Library key: the same video, prompt and language always map to one entry."""
+    return make_key("notes", video_id, text_digest(prompt), lang_code)
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = ['"' + word + '"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class NotesLibrary:
+    """SQLite notes store keyed by video, prompt and language, with keyword search."""
+
+    def __init__(self, path=None):
+        self.path = path or LIBRARY_PATH
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS notes ("
+                " id TEXT PRIMARY KEY, video_id TEXT NOT NULL, notes_format TEXT, lang TEXT NOT NULL,"
+                " prompt TEXT NOT NULL, name TEXT, notes TEXT NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS notes_video ON notes(video_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS notes_updated ON notes(updated)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " video_id TEXT PRIMARY KEY, signature BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprint_bands ("
+                " band INTEGER NOT NULL, bucket INTEGER NOT NULL, video_id TEXT NOT NULL,"
+                " PRIMARY KEY (band, bucket, video_id)) WITHOUT ROWID"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+                    " notes, notes_format, name, video_id,"
+                    " content='notes', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+                )
+            except sqlite3.OperationalError:
+                self.full_text = False
+            else:
+                self.full_text = True
+                conn.executescript("""
+                    CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+                        INSERT INTO notes_fts (rowid, notes, notes_format, name, video_id)
+                        VALUES (new.rowid, new.notes, new.notes_format, new.name, new.video_id);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+                        INSERT INTO notes_fts (notes_fts, rowid, notes, notes_format, name, video_id)
+                        VALUES ('delete', old.rowid, old.notes, old.notes_format, old.name, old.video_id);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+                        INSERT INTO notes_fts (notes_fts, rowid, notes, notes_format, name, video_id)
+                        VALUES ('delete', old.rowid, old.notes, old.notes_format, old.name, old.video_id);
+                        INSERT INTO notes_fts (rowid, notes, notes_format, name, video_id)
+                        VALUES (new.rowid, new.notes, new.notes_format, new.name, new.video_id);
+                    END;
+                """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, video_id, notes_format, prompt, lang_code, notes, name=None):
+        """Store notes, replacing an older entry for the same video, prompt and language; returns its ID.
+
+        A missing ``name`` keeps the name the entry already had.
+        """
+        entry_id = notes_id(video_id, prompt, lang_code)
+        now = time.time()
+        with self._connect() as conn:
+            # An upsert (not INSERT OR REPLACE) so the update trigger keeps the index in sync.
+            conn.execute(
+                "INSERT INTO notes (id, video_id, notes_format, lang, prompt, name, notes, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET notes_format = excluded.notes_format, notes = excluded.notes,"
+                " name = COALESCE(excluded.name, notes.name), updated = excluded.updated",
+                (entry_id, video_id, notes_format, lang_code, prompt, name, notes, now, now)
+            )
+        return entry_id
+
+    def get(self, entry_id):
+        """Return an entry as a dict, or None."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM notes WHERE id = ?", (entry_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def lookup(self, video_id, prompt, lang_code):
+        """Stored notes for this exact request, or None."""
+        return self.get(notes_id(video_id, prompt, lang_code))
+
+    def add_fingerprint(self, video_id, signature):
+        """Index a transcript signature; a video is fingerprinted once."""
+        with self._connect() as conn:
+            added = conn.execute(
+                "INSERT OR IGNORE INTO fingerprints (video_id, signature, created) VALUES (?, ?, ?)",
+                (video_id, fingerprint.to_blob(signature), time.time())
+            ).rowcount
+            if added:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO fingerprint_bands (band, bucket, video_id) VALUES (?, ?, ?)",
+                    [(band, bucket, video_id) for band, bucket in enumerate(fingerprint.band_keys(signature))]
+                )
+
+    def similar_videos(self, signature, threshold=DUPLICATE_THRESHOLD, exclude=None):
+        """``(video_id, similarity)`` of indexed transcripts at least ``threshold`` similar, best first.
+
+        Only videos sharing an LSH band bucket are compared, so the cost depends
+        on the number of candidates rather than the size of the index.
+        """
+        keys = list(enumerate(fingerprint.band_keys(signature)))
+        with self._connect() as conn:
+            candidates = [row[0] for row in conn.execute(
+                f"WITH wanted(band, bucket) AS (VALUES {', '.join(['(?, ?)'] * len(keys))})"
+                " SELECT DISTINCT b.video_id FROM wanted"
+                " JOIN fingerprint_bands b ON b.band = wanted.band AND b.bucket = wanted.bucket",
+                [value for key in keys for value in key]
+            ) if row[0] != exclude]
+            rows = conn.execute(
+                f"SELECT video_id, signature FROM fingerprints WHERE video_id IN ({', '.join('?' * len(candidates))})",
+                candidates
+            ).fetchall() if candidates else []
+        scored = [(video_id, fingerprint.similarity(signature, fingerprint.from_blob(blob))) for video_id, blob in rows]
+        return sorted(
+            ((video_id, score) for video_id, score in scored if score >= threshold), key=lambda item: -item[1]
+        )
+
+    def reuse_similar(self, video_id, transcript_text, notes_format, prompt, lang_code, threshold=DUPLICATE_THRESHOLD):
+        """Notes for a near-duplicate of ``video_id`` (a re-upload or mirror), or None.
+
+        Fingerprints the transcript into the index either way. When another
+        video with a transcript at least ``threshold`` similar already has notes
+        for this prompt and language, they are saved under ``video_id`` as well
+        and the entry is returned with ``source_video_id`` and ``similarity``.
+        """
+        signature = fingerprint.signature(transcript_text)
+        if signature is None:
+            return None
+        self.add_fingerprint(video_id, signature)
+        for other_video_id, score in self.similar_videos(signature, threshold, exclude=video_id):
+            stored = self.lookup(other_video_id, prompt, lang_code)
+            if stored is not None:
+                self.save(video_id, notes_format, prompt, lang_code, stored["notes"], name=stored["name"])
+                return {**self.lookup(video_id, prompt, lang_code),
+                        "source_video_id": other_video_id, "similarity": score}
+        return None
+
+    def search(self, text, limit=20):
+        """Entries matching every word of ``text``, best first, each with a highlighted ``snippet``."""
+        meta = ", ".join(f"n.{column}" for column in COLUMNS if column not in ("prompt", "notes"))
+        with self._connect() as conn:
+            if self.full_text:
+                query = fts_query(text)
+                if query is None:
+                    return []
+                rows = conn.execute(
+                    f"SELECT {meta}, snippet(notes_fts, 0, '**', '**', '…', 16)"
+                    " FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid"
+                    f" WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts, {', '.join(map(str, BM25_WEIGHTS))})"
+                    " LIMIT ?",
+                    (query, limit)
+                ).fetchall()
+            else:
+                words = re.findall(r"\w+", text.lower())
+                if not words:
+                    return []
+                haystack = "lower(n.notes || ' ' || COALESCE(n.name, '') || ' ' || COALESCE(n.notes_format, ''))"
+                rows = conn.execute(
+                    f"SELECT {meta}, substr(n.notes, 1, 160) FROM notes n"
+                    f" WHERE {' AND '.join([f'instr({haystack}, ?)'] * len(words))}"
+                    " ORDER BY n.updated DESC LIMIT ?",
+                    (*words, limit)
+                ).fetchall()
+        keys = [column for column in COLUMNS if column not in ("prompt", "notes")] + ["snippet"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def recent(self, limit=20):
+        """Most recently saved entries, without their notes text."""
+        keys = [column for column in COLUMNS if column not in ("prompt", "notes")]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(keys)} FROM notes ORDER BY updated DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(keys, row)) for row in rows]
+
+    def delete(self, entry_id):
+        """Remove an entry from the library; cached responses and finished jobs for it are kept."""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM notes WHERE id = ?", (entry_id,)).rowcount
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_library():
+    """Process-wide notes library, created on first use."""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = NotesLibrary()
+        return _library
+
+
+# =========================
+# ADMIN CLI
+# =========================
+def main(argv=None):
+    """Browse the library: ``python library.py {search TEXT,list,show ID,delete ID}``."""
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Search or manage the TubeNotes AI notes library.")
+    parser.add_argument("command", choices=["search", "list", "show", "delete"])
+    parser.add_argument("argument", nargs="?", help="Search text for 'search', entry ID for 'show'/'delete'.")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    library = get_library()
+    if args.command in ("show", "delete") and not args.argument:
+        parser.error(f"'{args.command}' needs an entry ID")
+    if args.command == "show":
+        entry = library.get(args.argument)
+        print(entry["notes"] if entry else f"no entry {args.argument}")
+    elif args.command == "delete":
+        print(f"deleted {library.delete(args.argument)} entry")
+    else:
+        started = time.perf_counter()
+        entries = library.search(args.argument or "", args.limit) if args.command == "search" \
+            else library.recent(args.limit)
+        for entry in entries:
+            updated = datetime.fromtimestamp(entry["updated"]).isoformat(timespec="seconds")
+            print(f"{entry['id']}  {updated}  {entry['video_id']}  {entry['lang']}  "
+                  f"{entry['notes_format']}  {entry['name'] or ''}")
+            if entry.get("snippet"):
+                print(f"    {' '.join(entry['snippet'].split())}")
+        print(f"{len(entries)} of {library.count()} entries ({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,80 @@
-import os
+"""List the Gemini models available to this API key, or probe their latency.
+
+    python list_models.py
+    python list_models.py --probe --runs 3
+    python list_models.py --probe --models models/gemini-2.5-flash,models/gemini-2.5-flash-lite
+
+``--probe`` times a few tiny uncached requests per model and stores the
+results in ``model_latency.json`` in the cache directory, where the hedging
+dispatcher reads them to try the fastest fallback model first.
+"""
+import argparse
+import statistics
+import time
+
 import google.generativeai as genai
-from dotenv import load_dotenv
 
-# Load your .env file where GOOGLE_API_KEY is stored
-load_dotenv()
+from hedging import FALLBACK_MODELS, LATENCY_FILE, load_probe_results, save_probe_results
+from llm import DEFAULT_MODEL, configure, get_model
+
+PROBE_PROMPT = "Reply with the single word: ok"
+
+
+def probe(model_name, runs):
+    """Time ``runs`` tiny requests to ``model_name``; returns the probe record."""
+    latencies, errors = [], []
+    model = get_model(model_name)
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            model.generate_content([PROBE_PROMPT])
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        latencies.append(time.perf_counter() - started)
+    record = {"runs": runs, "ok": len(latencies), "probed_at": time.time()}
+    if latencies:
+        record.update(
+            median_seconds=round(statistics.median(latencies), 3),
+            min_seconds=round(min(latencies), 3),
+            max_seconds=round(max(latencies), 3),
+        )
+    if errors:
+        record["last_error"] = errors[-1]
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List Gemini models or probe their latency.")
+    parser.add_argument("--probe", action="store_true", help=f"Measure latency and save it to {LATENCY_FILE}.")
+    parser.add_argument(
+        "--models", default=",".join([DEFAULT_MODEL] + FALLBACK_MODELS),
+        help="Comma-separated models to probe (default: the default model and the fallbacks)."
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Requests per model when probing.")
+    args = parser.parse_args(argv)
+
+    # Load your .env file where GOOGLE_API_KEY is stored and set up the Gemini client
+    configure()
+
+    if not args.probe:
+        print("\nAvailable Models:\n")
+        for model in genai.list_models():
+            print(f"{model.name} -> {model.supported_generation_methods}")
+        return
 
-# Set up Gemini client
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    results = load_probe_results()
+    for model_name in dict.fromkeys(name.strip() for name in args.models.split(",") if name.strip()):
+        record = probe(model_name, args.runs)
+        results[model_name] = record
+        if "median_seconds" in record:
+            print(f"{model_name}: median {record['median_seconds']:.2f}s "
+                  f"(min {record['min_seconds']:.2f}s, max {record['max_seconds']:.2f}s, {record['ok']}/{args.runs} ok)")
+        else:
+            print(f"{model_name}: failed ({record.get('last_error')})")
+    save_probe_results(results)
+    print(f"\nSaved to {LATENCY_FILE}")
 
-# List and print available models
-models = genai.list_models()
 
-print("\nAvailable Models:\n")
-for model in models:
-    print(f"{model.name} -> {model.supported_generation_methods}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Gemini calls fronted by the persistent response cache."""
+import asyncio
+import functools
+import hashlib
+import itertools
+import os
+import time
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+from cache import make_key, response_cache
+from hedging import call_kind, gemini_dispatcher
+from rate_limit import estimate_tokens, gemini_limiter
+
+DEFAULT_MODEL = "models/gemini-2.5-flash"
+
+
+# =========================
+# CLIENT SETUP (ONCE PER PROCESS)
+# =========================
+@functools.lru_cache(maxsize=None)
+def configure():
+    """Load ``.env`` and configure the Gemini client; later calls are no-ops."""
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_model(model_name=DEFAULT_MODEL):
+    """Return a shared ``GenerativeModel`` for ``model_name``, created on first use."""
+    configure()
+    return genai.GenerativeModel(model_name)
+
+
+def text_digest(text):
+    """SHA-256 digest of a prompt or transcript, used in cache keys."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def usage_of(response):
+    """Token counts reported by Gemini for a response (zeros when missing)."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        "total_tokens": getattr(usage, "total_token_count", 0) or 0,
+    }
+
+
+def complete(prompt, text, model_name=DEFAULT_MODEL):
+    """Uncached call: return ``(response_text, usage)`` for ``prompt + text``.
+
+    The call waits its turn in the shared rate limiter and is retried with
+    backoff on quota and transient server errors. A slow or failing call is
+    hedged on a fallback model (see ``hedging``); ``usage["model"]`` names
+    the model that answered.
+    """
+    contents = prompt + text
+    estimated = estimate_tokens(contents)
+
+    def attempt(model):
+        response = gemini_limiter.call(lambda: get_model(model).generate_content([contents]), estimated)
+        gemini_limiter.settle(estimated, usage_of(response)["total_tokens"])
+        return response
+
+    response, answered_by = gemini_dispatcher.call(attempt, model_name, call_kind(estimated))
+    return response.text, {**usage_of(response), "model": answered_by}
+
+
+def _response_key(prompt, text, target_lang_code, model_name):
+    return make_key("generate", model_name, text_digest(prompt), text_digest(text), target_lang_code)
+
+
+def _remember(result, prompt, text, target_lang_code, model_name):
+    # Stored under the key of the model that produced the text, so a fallback
+    # answer is never served later to requests for the requested model.
+    key = _response_key(prompt, text, target_lang_code, model_name)
+    response_cache.set(key, {
+        "text": result,
+        "model": model_name,
+        "prompt_digest": text_digest(prompt),
+        "lang": target_lang_code,
+        "generated_at": time.time(),
+    })
+
+
+def generate(prompt, text, target_lang_code="en", model_name=DEFAULT_MODEL):
+    """Return Gemini's response to ``prompt + text``, served from cache on repeats.
+
+    Responses are keyed on the model name, the prompt digest, the digest of
+    the transcript (or notes) being processed and the language of the output,
+    so identical requests from different sessions share one generation.
+    """
+    key = _response_key(prompt, text, target_lang_code, model_name)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached["text"]
+
+    result, usage = complete(prompt, text, model_name)
+    _remember(result, prompt, text, target_lang_code, usage["model"])
+    return result
+
+
+async def generate_async(prompt, text, target_lang_code="en", model_name=DEFAULT_MODEL):
+    """``generate`` for coroutines: same cache, limiter and retries, without blocking a thread.
+
+    The request goes through the SDK's ``generate_content_async``; cache
+    reads and writes (SQLite) run in the default executor.
+    """
+    key = _response_key(prompt, text, target_lang_code, model_name)
+    cached = await asyncio.to_thread(response_cache.get, key)
+    if cached is not None:
+        return cached["text"]
+
+    contents = prompt + text
+    estimated = estimate_tokens(contents)
+
+    async def attempt(model):
+        response = await gemini_limiter.call_async(
+            lambda: get_model(model).generate_content_async([contents]), estimated
+        )
+        gemini_limiter.settle(estimated, usage_of(response)["total_tokens"])
+        return response
+
+    response, answered_by = await gemini_dispatcher.call_async(attempt, model_name, call_kind(estimated))
+    await asyncio.to_thread(_remember, response.text, prompt, text, target_lang_code, answered_by)
+    return response.text
+
+
+def generate_stream(prompt, text, target_lang_code="en", model_name=DEFAULT_MODEL):
+    """Yield Gemini's response to ``prompt + text`` piece by piece as it streams in.
+
+    A cached response is yielded in one piece. The full text is written to
+    the response cache only once the stream completes, so an interrupted
+    stream never leaves a truncated entry behind.
+    """
+    key = _response_key(prompt, text, target_lang_code, model_name)
+    cached = response_cache.get(key)
+    if cached is not None:
+        yield cached["text"]
+        return
+
+    contents = prompt + text
+    estimated = estimate_tokens(contents)
+
+    def start(model):
+        # Pull the first chunk inside the limiter so quota errors are retried
+        # before anything has been shown to the user.
+        def first_chunk():
+            response = get_model(model).generate_content([contents], stream=True)
+            chunks = iter(response)
+            return response, chunks, next(chunks, None)
+        return gemini_limiter.call(first_chunk, estimated)
+
+    # Hedging covers the wait for the first chunk, timed apart from full calls;
+    # the winning stream is then read to the end.
+    (response, chunks, first), answered_by = gemini_dispatcher.call(
+        start, model_name, call_kind(estimated, stream=True)
+    )
+    pieces = []
+    for chunk in itertools.chain([first] if first is not None else [], chunks):
+        piece = chunk.text
+        if piece:
+            pieces.append(piece)
+            yield piece
+    gemini_limiter.settle(estimated, usage_of(response)["total_tokens"])
+    _remember("".join(pieces), prompt, text, target_lang_code, answered_by)
@@ -0,0 +1,187 @@
+"""Per-stage latency and token metrics for the notes pipeline.
+
+Every stage (transcript fetch, preprocessing, prompt assembly, generation,
+translation, markdown rendering, export) is timed with ``timed``. Each
+measurement is logged as one JSON record and added to an in-process window
+of recent samples, from which ``summary`` computes percentiles and
+``prometheus_text`` renders the Prometheus text exposition format.
+``StageProgress`` turns stage completions into a progress percentage.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from hedging import gemini_dispatcher
+from rate_limit import gemini_limiter
+
+logger = logging.getLogger(__name__)
+
+WINDOW = int(os.environ.get("TUBENOTES_METRICS_WINDOW", 1000))
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Typical seconds per stage, used to weight progress until real samples exist.
+DEFAULT_STAGE_SECONDS = {
+    "transcript": 2.0,
+    "preprocess": 0.1,
+    "prompt": 0.3,
+    "generation": 20.0,
+    "translation": 10.0,
+    "render": 0.05,
+    "export": 0.1,
+}
+
+_lock = threading.Lock()
+_samples = {}   # stage -> deque of recent durations
+_totals = {}    # stage -> {"count", "seconds", "input_tokens", "output_tokens"}
+
+
+def record(stage, seconds, **fields):
+    """Add one measurement for ``stage`` and log it as a structured record."""
+    with _lock:
+        _samples.setdefault(stage, deque(maxlen=WINDOW)).append(seconds)
+        totals = _totals.setdefault(stage, {"count": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0})
+        totals["count"] += 1
+        totals["seconds"] += seconds
+        totals["input_tokens"] += fields.get("input_tokens", 0) or 0
+        totals["output_tokens"] += fields.get("output_tokens", 0) or 0
+    logger.info(json.dumps({"event": "stage", "stage": stage, "seconds": round(seconds, 4), **fields}))
+
+
+@contextmanager
+def timed(stage, **fields):
+    """Time the ``with`` block as ``stage``; add fields (e.g. token counts) to the yielded dict.
+
+    Failed stages are recorded too, with ``error`` set to the exception type.
+    """
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        record(stage, time.perf_counter() - started, **fields)
+
+
+def reset():
+    """Forget all samples and totals (used by benchmarks between scenarios)."""
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+
+
+def _quantile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summary():
+    """Per-stage count, totals and latency percentiles over the recent window."""
+    with _lock:
+        samples = {stage: sorted(values) for stage, values in _samples.items()}
+        totals = {stage: dict(values) for stage, values in _totals.items()}
+    return {
+        stage: {
+            **totals[stage],
+            **{f"p{int(q * 100)}": _quantile(ordered, q) for q in QUANTILES},
+            "max": ordered[-1] if ordered else 0.0,
+        }
+        for stage, ordered in samples.items()
+    }
+
+
+def expected_seconds(stage):
+    """Median recent duration of ``stage``, or its default when nothing was measured yet."""
+    with _lock:
+        values = sorted(_samples.get(stage, ()))
+    return _quantile(values, 0.5) if values else DEFAULT_STAGE_SECONDS.get(stage, 1.0)
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        samples = {stage: sorted(values) for stage, values in _samples.items()}
+        totals = {stage: dict(values) for stage, values in _totals.items()}
+    lines = [
+        "# HELP tubenotes_stage_seconds Latency of notes pipeline stages.",
+        "# TYPE tubenotes_stage_seconds summary",
+    ]
+    for stage in sorted(samples):
+        for q in QUANTILES:
+            lines.append(f'tubenotes_stage_seconds{{stage="{stage}",quantile="{q}"}} {_quantile(samples[stage], q):.6f}')
+        lines.append(f'tubenotes_stage_seconds_sum{{stage="{stage}"}} {totals[stage]["seconds"]:.6f}')
+        lines.append(f'tubenotes_stage_seconds_count{{stage="{stage}"}} {totals[stage]["count"]}')
+    lines += [
+        "# HELP tubenotes_stage_tokens_total Tokens processed per stage.",
+        "# TYPE tubenotes_stage_tokens_total counter",
+    ]
+    for stage in sorted(totals):
+        for kind in ("input", "output"):
+            lines.append(f'tubenotes_stage_tokens_total{{stage="{stage}",kind="{kind}"}} {totals[stage][f"{kind}_tokens"]}')
+    limiter = gemini_limiter.metrics()
+    lines += [
+        "# HELP tubenotes_gemini_queue_depth Gemini calls currently waiting for rate-limit capacity.",
+        "# TYPE tubenotes_gemini_queue_depth gauge",
+        f"tubenotes_gemini_queue_depth {limiter['queue_depth']}",
+        "# HELP tubenotes_gemini_retries_total Gemini calls retried after a retryable error.",
+        "# TYPE tubenotes_gemini_retries_total counter",
+        f"tubenotes_gemini_retries_total {limiter['retries']}",
+        "# HELP tubenotes_gemini_failures_total Gemini calls that failed after all retries.",
+        "# TYPE tubenotes_gemini_failures_total counter",
+        f"tubenotes_gemini_failures_total {limiter['failures']}",
+    ]
+    dispatcher = gemini_dispatcher.metrics()
+    lines += [
+        "# HELP tubenotes_gemini_hedges_total Duplicate Gemini requests fired because a call was slow.",
+        "# TYPE tubenotes_gemini_hedges_total counter",
+        f"tubenotes_gemini_hedges_total {dispatcher['hedges']}",
+        "# HELP tubenotes_gemini_fallbacks_total Gemini requests retried on another model after a failure.",
+        "# TYPE tubenotes_gemini_fallbacks_total counter",
+        f"tubenotes_gemini_fallbacks_total {dispatcher['fallbacks']}",
+        "# HELP tubenotes_gemini_hedge_wins_total Gemini requests answered by a hedge or fallback attempt.",
+        "# TYPE tubenotes_gemini_hedge_wins_total counter",
+        f"tubenotes_gemini_hedge_wins_total {dispatcher['hedge_wins']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class StageProgress:
+    """Progress percentage driven by completed stages, weighted by their expected duration.
+
+    Weights start at each stage's median recent duration; ``weigh`` overrides
+    one with a better estimate (e.g. the generation plan), and ``skip`` drops
+    a stage that turned out not to be needed. ``on_progress`` receives the new
+    percentage whenever it changes; it never goes backwards.
+    """
+
+    def __init__(self, stages, on_progress=None):
+        self.weights = {stage: expected_seconds(stage) for stage in stages}
+        self.done = set()
+        self.on_progress = on_progress
+        self.percent = 0
+
+    def _report(self):
+        total = sum(self.weights.values())
+        finished = sum(weight for stage, weight in self.weights.items() if stage in self.done)
+        percent = int(100 * finished / total) if total else 100
+        if percent > self.percent:
+            self.percent = percent
+            if self.on_progress:
+                self.on_progress(percent)
+
+    def weigh(self, stage, seconds):
+        if stage in self.weights and stage not in self.done:
+            self.weights[stage] = max(seconds, 0.01)
+
+    def skip(self, stage):
+        self.weights.pop(stage, None)
+        self._report()
+
+    def complete(self, stage):
+        self.done.add(stage)
+        self._report()
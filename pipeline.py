@@ -0,0 +1,112 @@
+"""Streamlit-free notes pipeline shared by the app and headless tools."""
+from concurrent.futures import ThreadPoolExecutor
+
+from chunking import map_reduce_summarize, marked_transcript
+from llm import DEFAULT_MODEL, generate, generate_stream
+from metrics import timed
+from prompts import localize_prompt, translation_prompt
+from rate_limit import estimate_tokens
+from routing import plan_generation
+from transcripts import Transcript
+from translation import TRANSLATION_WORKERS, assemble, restore_code, translation_pieces, with_code
+
+# Stages of one notes request, in order, as timed in ``metrics``.
+PIPELINE_STAGES = ("transcript", "preprocess", "prompt", "generation", "translation")
+
+
+def _run(prompt, text, target_lang_code, model_name, on_text):
+    """One cached call; with ``on_text`` the growing response is reported as it streams."""
+    if on_text is None:
+        return generate(prompt, text, target_lang_code, model_name)
+    result = ""
+    for piece in generate_stream(prompt, text, target_lang_code, model_name):
+        result += piece
+        on_text(result)
+    return result
+
+
+def _translate_piece(piece, code_blocks, target_lang_code, model_name):
+    if not piece["translate"]:
+        return with_code(piece["text"], code_blocks)
+    prompt = translation_prompt(target_lang_code)
+    translated = restore_code(generate(prompt, piece["text"], target_lang_code, model_name), piece, code_blocks)
+    if translated is None:
+        # The model dropped or changed a placeholder: translate this section with its code inline.
+        translated = generate(prompt, with_code(piece["text"], code_blocks), target_lang_code, model_name).strip()
+    return translated
+
+
+def translate_notes(notes, target_lang_code, model_name=DEFAULT_MODEL, on_text=None,
+                    max_workers=TRANSLATION_WORKERS):
+    """Translate finished notes, leaving English notes untouched. Errors propagate.
+
+    Code blocks stay out of the requests and sections are translated
+    concurrently (see ``translation``); ``on_text`` receives the translated
+    notes so far each time the next section in order is done.
+    """
+    if target_lang_code == "en":
+        return notes
+    pieces, code_blocks = translation_pieces(notes)
+    requests = [piece for piece in pieces if piece["translate"]]
+    with timed("translation", model=model_name, lang=target_lang_code, sections=len(requests),
+               code_blocks=len(code_blocks),
+               input_tokens=sum(estimate_tokens(piece["text"]) for piece in requests)) as stage:
+        outputs = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as pool:
+            for output in pool.map(
+                lambda piece: _translate_piece(piece, code_blocks, target_lang_code, model_name), pieces
+            ):
+                outputs.append(output)
+                if on_text:
+                    on_text(assemble(pieces, outputs))
+        result = assemble(pieces, outputs)
+        stage["output_tokens"] = estimate_tokens(result)
+    return result
+
+
+def generate_notes(transcript_text, prompt, target_lang_code="en", segments=None,
+                   single_pass=True, model_name=DEFAULT_MODEL, progress=None, on_text=None,
+                   notes_format=None, plan=None, on_plan=None):
+    """Generate notes for a transcript in the target language.
+
+    A pre-flight ``plan`` (computed here unless given, and passed to
+    ``on_plan``) picks the model and whether long transcripts go through the
+    parallel map-reduce path. With ``single_pass`` the language is folded
+    into the prompt; otherwise English notes are generated and then
+    translated. ``progress`` is a ``metrics.StageProgress`` whose prompt,
+    generation and translation stages are completed here; ``on_text``
+    receives the partial notes while they stream in. Errors propagate.
+    """
+    with timed("prompt", notes_format=notes_format) as stage:
+        if plan is None:
+            plan = plan_generation(transcript_text, prompt, notes_format, segments, model_name)
+        output_lang_code = target_lang_code if single_pass else "en"
+        prompt = localize_prompt(prompt, output_lang_code)
+        stage["prompt_tokens"] = plan["prompt_tokens"]
+    if on_plan:
+        on_plan(plan)
+    if progress:
+        progress.weigh("generation", plan["est_seconds"])
+        progress.complete("prompt")
+    model_name = plan["model"]
+    with timed("generation", notes_format=notes_format, model=model_name, route=plan["route"],
+               chunks=plan["chunks"], input_tokens=plan["input_tokens"]) as stage:
+        if segments and plan["route"] == "chunked":
+            summary = map_reduce_summarize(segments, prompt, model_name, output_lang_code=output_lang_code)
+        elif segments:
+            # The direct call gets the same [m:ss] markers as map-reduce, so notes link into the video.
+            transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments)
+            summary = _run(prompt, marked_transcript(transcript), output_lang_code, model_name, on_text)
+        else:
+            summary = _run(prompt, transcript_text, output_lang_code, model_name, on_text)
+        stage["output_tokens"] = estimate_tokens(summary)
+    if progress:
+        progress.complete("generation")
+    if target_lang_code != output_lang_code:
+        summary = translate_notes(summary, target_lang_code, model_name, on_text)
+        if progress:
+            progress.complete("translation")
+    elif progress:
+        progress.skip("translation")
+    return summary
+
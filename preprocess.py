@@ -0,0 +1,160 @@
+"""Transcript preprocessing that compacts captions before they reach the LLM.
+
+Each stage takes and returns a list of ``{"text", "start", "duration"}``
+segments, so timestamps survive for chunking. Stages are looked up by name in
+``STAGES``; register a new function there to plug in another step.
+"""
+import logging
+import os
+import re
+import time
+
+from metrics import record
+from rate_limit import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+NON_SPEECH_RE = re.compile(
+    r"\[[^\]]{0,40}\]"                 # [Music], [Applause], [inaudible]
+    r"|\((?:music|applause|laughs?|laughter|inaudible|silence|cheering)\)"
+    r"|♪[^♪]*♪|♪|♫"                    # sung lyrics / music notes
+    r"|^\s*>>\s*",                     # speaker-change markers
+    re.IGNORECASE
+)
+FILLER_RE = re.compile(r"\b(?:u+h+m*|u+m+|e+r+m+|h+m+|mm+-?hmm+)\b[,.]?\s*", re.IGNORECASE)
+FILLER_PHRASE_RE = re.compile(r"\b(?:you know|I mean|kind of like|sort of like),\s*", re.IGNORECASE)
+REPEATED_WORD_RE = re.compile(r"\b(\w+)(?:\s+\1\b)+", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+SENTENCE_END_RE = re.compile(r"[.!?。？！][\"')\]]*$")
+
+MAX_OVERLAP_WORDS = 20
+MIN_OVERLAP_WORDS = 2  # a single shared word is usually a legitimate repeat
+MAX_SENTENCE_CHARS = 400
+
+
+def _replace_text(segments, transform):
+    cleaned = []
+    for segment in segments:
+        text = transform(segment["text"])
+        if text:
+            cleaned.append({**segment, "text": text})
+    return cleaned
+
+
+def strip_non_speech(segments):
+    """Remove [Music]-style tags, music notes and speaker markers; drop emptied segments."""
+    return _replace_text(segments, lambda text: NON_SPEECH_RE.sub(" ", text).strip())
+
+
+def normalize_whitespace(segments):
+    """Collapse newlines and runs of spaces inside each segment."""
+    return _replace_text(segments, lambda text: WHITESPACE_RE.sub(" ", text).strip())
+
+
+def dedupe_overlaps(segments):
+    """Drop repeated captions and the words a rolling caption repeats from the previous one."""
+    result = []
+    previous_words = []
+    for segment in segments:
+        words = segment["text"].split()
+        if not words:
+            continue
+        if [w.lower() for w in words] == [w.lower() for w in previous_words]:
+            continue
+        lowered_previous = [w.lower() for w in previous_words[-MAX_OVERLAP_WORDS:]]
+        lowered = [w.lower() for w in words]
+        overlap = 0
+        for size in range(min(len(lowered_previous), len(lowered)), MIN_OVERLAP_WORDS - 1, -1):
+            if lowered_previous[-size:] == lowered[:size]:
+                overlap = size
+                break
+        previous_words = words
+        remaining = words[overlap:]
+        if remaining:
+            result.append({**segment, "text": " ".join(remaining)})
+    return result
+
+
+def remove_fillers(segments):
+    """Remove filler words (um, uh, you know, ...) and immediate word repetitions."""
+    def clean(text):
+        text = FILLER_PHRASE_RE.sub("", FILLER_RE.sub("", text))
+        return REPEATED_WORD_RE.sub(r"\1", text).strip()
+    return _replace_text(segments, clean)
+
+
+def resegment_sentences(segments):
+    """Merge caption fragments into sentence-sized segments, keeping the first start time."""
+    result = []
+    buffer = []
+    size = 0
+
+    def flush():
+        last = buffer[-1]
+        result.append({
+            "text": " ".join(seg["text"] for seg in buffer),
+            "start": buffer[0]["start"],
+            "duration": last["start"] + last.get("duration", 0) - buffer[0]["start"],
+        })
+        buffer.clear()
+
+    for segment in segments:
+        buffer.append(segment)
+        size += len(segment["text"]) + 1
+        if SENTENCE_END_RE.search(segment["text"]) or size >= MAX_SENTENCE_CHARS:
+            flush()
+            size = 0
+    if buffer:
+        flush()
+    return result
+
+
+STAGES = {
+    "strip_non_speech": strip_non_speech,
+    "normalize_whitespace": normalize_whitespace,
+    "dedupe_overlaps": dedupe_overlaps,
+    "remove_fillers": remove_fillers,
+    "resegment_sentences": resegment_sentences,
+}
+
+DEFAULT_STAGES = tuple(
+    name.strip()
+    for name in os.environ.get(
+        "TUBENOTES_PREPROCESS_STAGES",
+        "strip_non_speech,normalize_whitespace,dedupe_overlaps,resegment_sentences"
+    ).split(",")
+    if name.strip()
+)
+
+
+def _text(segments):
+    return " ".join(segment["text"] for segment in segments)
+
+
+def preprocess_segments(segments, stages=DEFAULT_STAGES, label=None):
+    """Run the named stages in order; return ``(segments, report)``.
+
+    The report holds character and estimated token counts before and after,
+    plus the character count after each stage.
+    """
+    started = time.perf_counter()
+    text_before = _text(segments)
+    per_stage = {}
+    for name in stages:
+        segments = STAGES[name](segments)
+        per_stage[name] = len(_text(segments))
+    text_after = _text(segments)
+    chars_before, chars_after = len(text_before), len(text_after)
+    tokens_before, tokens_after = estimate_tokens(text_before), estimate_tokens(text_after)
+    report = {
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "token_reduction_pct": round(100.0 * (tokens_before - tokens_after) / tokens_before, 1) if tokens_before else 0.0,
+        "stages": per_stage,
+    }
+    logger.info("transcript preprocessing %s: %s", label or "", report)
+    record("preprocess", time.perf_counter() - started, video_id=label,
+           input_tokens=tokens_before, output_tokens=tokens_after)
+    return segments, report
@@ -0,0 +1,166 @@
+"""Client-side rate limiting and retry/backoff for Gemini calls.
+
+All Gemini calls in the process share one limiter holding two token buckets
+(requests per minute and tokens per minute). Callers reserve capacity up
+front and sleep until it is available, so concurrent sessions queue in
+arrival order instead of tripping quota errors. Retryable API errors are
+retried with jittered exponential backoff.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+RETRYABLE_ERRORS = (
+    api_exceptions.ResourceExhausted,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.DeadlineExceeded,
+)
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used before a call is made."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` units per minute.
+
+    ``reserve`` always succeeds immediately but may drive the balance
+    negative; the returned delay is how long the caller must wait before its
+    reservation is covered, which keeps waiting callers in FIFO order.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount):
+        """Return (or, if negative, charge) tokens after the real usage is known."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Shared requests/min + tokens/min limiter with queue and wait metrics."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._stats = {
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "calls": 0,
+            "waited_calls": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "retries": 0,
+            "failures": 0,
+        }
+
+    def _reserve(self, estimated_tokens):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        with self._lock:
+            self._stats["calls"] += 1
+            if wait > 0:
+                self._stats["queue_depth"] += 1
+                self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+        return wait
+
+    def _waited(self, wait):
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+            self._stats["waited_calls"] += 1
+            self._stats["total_wait_seconds"] += wait
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+
+    def acquire(self, estimated_tokens):
+        """Block until one request and ``estimated_tokens`` tokens are available."""
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+            self._waited(wait)
+        return wait
+
+    async def acquire_async(self, estimated_tokens):
+        """``acquire`` for coroutines: waits with ``asyncio.sleep`` instead of blocking a thread."""
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            self._waited(wait)
+        return wait
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once Gemini reports the real token usage."""
+        if actual_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _should_retry(self, attempt):
+        """Count a retryable error; False once ``max_retries`` is exhausted."""
+        with self._lock:
+            if attempt == self.max_retries:
+                self._stats["failures"] += 1
+                return False
+            self._stats["retries"] += 1
+        return True
+
+    def call(self, fn, estimated_tokens):
+        """Run ``fn()`` under the limiter, retrying retryable errors with backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                return fn()
+            except RETRYABLE_ERRORS:
+                if not self._should_retry(attempt):
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+
+    async def call_async(self, fn, estimated_tokens):
+        """Await ``fn()`` (a coroutine function) under the limiter with the same retry policy as ``call``."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(estimated_tokens)
+            try:
+                return await fn()
+            except RETRYABLE_ERRORS:
+                if not self._should_retry(attempt):
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_wait_seconds"] = (
+            stats["total_wait_seconds"] / stats["waited_calls"] if stats["waited_calls"] else 0.0
+        )
+        return stats
+
+
+gemini_limiter = RateLimiter(
+    requests_per_minute=float(os.environ.get("TUBENOTES_GEMINI_RPM", 60)),
+    tokens_per_minute=float(os.environ.get("TUBENOTES_GEMINI_TPM", 1_000_000)),
+    max_retries=int(os.environ.get("TUBENOTES_GEMINI_MAX_RETRIES", 5)),
+)
@@ -0,0 +1,137 @@
+"""Pre-flight token budgeting and adaptive routing for notes generation.
+
+Before any generation call, ``plan_generation`` counts the tokens of prompt +
+transcript (once per text; repeats reuse the cached count), estimates cost
+and latency, and decides how to run the request: one direct call for short
+videos, the parallel map-reduce path for long ones, and a cheaper, faster
+model tier for formats marked as quick.
+"""
+import logging
+import math
+import os
+
+from cache import make_key, response_cache
+from chunking import CHUNK_CHARS, CHUNK_OVERLAP_CHARS, LONG_TRANSCRIPT_CHARS, MAP_WORKERS, chunk_segments
+from llm import DEFAULT_MODEL, get_model, text_digest
+from rate_limit import estimate_tokens, gemini_limiter
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL = os.environ.get("TUBENOTES_FAST_MODEL", "models/gemini-2.5-flash-lite")
+LONG_INPUT_TOKENS = int(os.environ.get("TUBENOTES_LONG_INPUT_TOKENS", LONG_TRANSCRIPT_CHARS // 4))
+QUICK_FORMATS = {
+    name.strip() for name in os.environ.get("TUBENOTES_QUICK_FORMATS", "").split(",") if name.strip()
+}
+EXACT_TOKEN_COUNT = os.environ.get("TUBENOTES_EXACT_TOKEN_COUNT", "1") == "1"
+
+# Rough per-model figures used only for estimates (USD per million tokens and
+# observed throughput); adjust them when prices or models change.
+MODEL_PROFILES = {
+    "models/gemini-2.5-flash": {
+        "input_usd_per_m": 0.30, "output_usd_per_m": 2.50,
+        "first_token_seconds": 2.0, "output_tokens_per_second": 180.0,
+    },
+    "models/gemini-2.5-flash-lite": {
+        "input_usd_per_m": 0.10, "output_usd_per_m": 0.40,
+        "first_token_seconds": 0.8, "output_tokens_per_second": 350.0,
+    },
+}
+DEFAULT_PROFILE = MODEL_PROFILES[DEFAULT_MODEL]
+
+# Notes are roughly this fraction of the transcript, within these bounds.
+OUTPUT_RATIO = 0.35
+MIN_OUTPUT_TOKENS = 800
+MAX_OUTPUT_TOKENS = 8192
+MAP_OUTPUT_TOKENS = 1500
+
+
+def count_tokens(text, model_name=DEFAULT_MODEL):
+    """Count tokens with Gemini's tokenizer, falling back to a local estimate.
+
+    Exact counts are kept in the response cache, so a repeat request is
+    planned without a round trip. The count call waits its turn in the
+    shared rate limiter and is retried like a generation call.
+    """
+    if not EXACT_TOKEN_COUNT:
+        return estimate_tokens(text)
+    key = make_key("count_tokens", model_name, text_digest(text))
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached["tokens"]
+    try:
+        # Counting consumes a request but no generation tokens.
+        tokens = gemini_limiter.call(lambda: get_model(model_name).count_tokens([text]).total_tokens, 0)
+    except Exception as e:
+        logger.warning("count_tokens failed, using estimate: %s", e)
+        return estimate_tokens(text)
+    response_cache.set(key, {"tokens": tokens, "model": model_name})
+    return tokens
+
+
+def _output_tokens(input_tokens):
+    return int(min(MAX_OUTPUT_TOKENS, max(MIN_OUTPUT_TOKENS, input_tokens * OUTPUT_RATIO)))
+
+
+def _call_estimate(profile, input_tokens, output_tokens):
+    seconds = profile["first_token_seconds"] + output_tokens / profile["output_tokens_per_second"]
+    cost = (input_tokens * profile["input_usd_per_m"] + output_tokens * profile["output_usd_per_m"]) / 1_000_000
+    return seconds, cost
+
+
+def plan_generation(transcript_text, prompt, notes_format=None, segments=None, model_name=DEFAULT_MODEL):
+    """Return a routing decision with token, cost and latency estimates.
+
+    The result is a plain dict: ``route`` ("direct" or "chunked"), ``model``,
+    token counts, ``chunks``, ``est_cost_usd``, ``est_seconds`` and a
+    human-readable ``reason``.
+    """
+    quick = notes_format in QUICK_FORMATS
+    model = FAST_MODEL if quick else model_name
+    profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+    prompt_tokens = estimate_tokens(prompt)
+    input_tokens = count_tokens(prompt + transcript_text, model)
+    transcript_tokens = max(0, input_tokens - prompt_tokens)
+
+    if segments and input_tokens > LONG_INPUT_TOKENS:
+        chunks = len(chunk_segments(segments, CHUNK_CHARS, CHUNK_OVERLAP_CHARS))
+        chunk_input = transcript_tokens // max(1, chunks) + CHUNK_OVERLAP_CHARS // 4
+        map_seconds, map_cost = _call_estimate(profile, chunk_input, MAP_OUTPUT_TOKENS)
+        reduce_input = prompt_tokens + chunks * MAP_OUTPUT_TOKENS
+        output_tokens = _output_tokens(reduce_input)
+        reduce_seconds, reduce_cost = _call_estimate(profile, reduce_input, output_tokens)
+        waves = math.ceil(chunks / max(1, MAP_WORKERS))
+        route = "chunked"
+        est_seconds = waves * map_seconds + reduce_seconds
+        est_cost = chunks * map_cost + reduce_cost
+        reason = f"{input_tokens:,} input tokens exceed {LONG_INPUT_TOKENS:,}; {chunks} chunks in {waves} parallel wave(s)"
+    else:
+        chunks = 1
+        output_tokens = _output_tokens(input_tokens)
+        est_seconds, est_cost = _call_estimate(profile, input_tokens, output_tokens)
+        route = "direct"
+        reason = f"{input_tokens:,} input tokens fit in one call"
+    if quick:
+        reason += f"; quick format routed to {model}"
+
+    plan = {
+        "route": route,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "transcript_tokens": transcript_tokens,
+        "input_tokens": input_tokens,
+        "est_output_tokens": output_tokens,
+        "chunks": chunks,
+        "est_cost_usd": round(est_cost, 5),
+        "est_seconds": round(est_seconds, 1),
+        "reason": reason,
+    }
+    logger.info("generation plan for %s: %s", notes_format or "notes", plan)
+    return plan
+
+
+def describe_plan(plan):
+    """One-line summary of a plan for the UI and CLI output."""
+    return (
+        f"{plan['route']} via {plan['model'].split('/')[-1]} · {plan['input_tokens']:,} input tokens · "
+        f"~{plan['est_output_tokens']:,} output tokens · ~${plan['est_cost_usd']:.4f} · ~{plan['est_seconds']:.0f}s"
+    )
@@ -0,0 +1,175 @@
+"""Asyncio service layer for serving many notes requests from one process.
+
+``NotesService`` exposes transcript fetching and Gemini generation and
+translation as coroutines. Gemini calls use the SDK's async client, so a
+request waiting on the model holds no thread; the transcript API has no
+async client and runs in the default executor. Semaphores bound how many
+fetches and model calls are in flight at once, on top of the shared rate
+limiter, so one process can keep dozens of videos going without dozens of
+blocked threads.
+
+Synchronous callers (the Streamlit script, the job queue, CLIs) use ``run``
+or ``submit``, which execute coroutines on one process-wide event loop
+running in a background thread.
+"""
+import asyncio
+import os
+import threading
+
+from chunking import chunk_segments, map_requests, marked_transcript, reduce_text
+from llm import DEFAULT_MODEL, generate_async
+from metrics import timed
+from preprocess import DEFAULT_STAGES, preprocess_segments
+from prompts import localize_prompt, translation_prompt
+from rate_limit import estimate_tokens
+from routing import plan_generation
+from translation import assemble, restore_code, translation_pieces, with_code
+from transcripts import DEFAULT_LANGUAGES, Transcript, fetch_transcript
+
+TRANSCRIPT_CONCURRENCY = int(os.environ.get("TUBENOTES_ASYNC_TRANSCRIPTS", 8))
+LLM_CONCURRENCY = int(os.environ.get("TUBENOTES_ASYNC_LLM", 16))
+
+
+class NotesService:
+    """Coroutine API over transcripts and Gemini with bounded concurrency."""
+
+    def __init__(self, transcript_concurrency=TRANSCRIPT_CONCURRENCY, llm_concurrency=LLM_CONCURRENCY):
+        self._transcripts = asyncio.Semaphore(transcript_concurrency)
+        self._llm = asyncio.Semaphore(llm_concurrency)
+
+    async def transcript(self, video_id, languages=DEFAULT_LANGUAGES, stages=DEFAULT_STAGES):
+        """Fetch and preprocess a transcript; errors from the transcript API propagate."""
+        async with self._transcripts:
+            segments = await asyncio.to_thread(fetch_transcript, video_id, languages)
+        segments, _ = await asyncio.to_thread(preprocess_segments, segments, stages, video_id)
+        return Transcript.from_segments(segments)
+
+    async def generate(self, prompt, text, target_lang_code="en", model_name=DEFAULT_MODEL):
+        """One cached Gemini call, waiting for a free model slot first."""
+        async with self._llm:
+            return await generate_async(prompt, text, target_lang_code, model_name)
+
+    async def _translate_piece(self, piece, code_blocks, target_lang_code, model_name):
+        if not piece["translate"]:
+            return with_code(piece["text"], code_blocks)
+        prompt = translation_prompt(target_lang_code)
+        translated = restore_code(
+            await self.generate(prompt, piece["text"], target_lang_code, model_name), piece, code_blocks
+        )
+        if translated is None:
+            # The model dropped or changed a placeholder: translate this section with its code inline.
+            translated = (await self.generate(
+                prompt, with_code(piece["text"], code_blocks), target_lang_code, model_name
+            )).strip()
+        return translated
+
+    async def translate(self, notes, target_lang_code, model_name=DEFAULT_MODEL):
+        """Translate finished notes section by section, leaving English notes untouched."""
+        if target_lang_code == "en":
+            return notes
+        pieces, code_blocks = translation_pieces(notes)
+        requests = [piece for piece in pieces if piece["translate"]]
+        with timed("translation", model=model_name, lang=target_lang_code, sections=len(requests),
+                   code_blocks=len(code_blocks),
+                   input_tokens=sum(estimate_tokens(piece["text"]) for piece in requests)) as stage:
+            outputs = await asyncio.gather(*(
+                self._translate_piece(piece, code_blocks, target_lang_code, model_name) for piece in pieces
+            ))
+            result = assemble(pieces, outputs)
+            stage["output_tokens"] = estimate_tokens(result)
+        return result
+
+    async def _map_reduce(self, transcript, prompt, model_name, output_lang_code):
+        chunks = chunk_segments(transcript)
+        if len(chunks) <= 1:
+            text = marked_transcript(transcript) if chunks else ""
+            return await self.generate(prompt, text, output_lang_code, model_name)
+        partials = await asyncio.gather(*(
+            self.generate(map_prompt, text, "en", model_name) for map_prompt, text in map_requests(transcript, chunks)
+        ))
+        return await self.generate(prompt, reduce_text(chunks, partials), output_lang_code, model_name)
+
+    async def notes(self, video_id, prompt, target_lang_code="en", single_pass=True, notes_format=None,
+                    model_name=DEFAULT_MODEL, transcript=None):
+        """Notes for one video, following the same plan and stages as ``pipeline.generate_notes``.
+
+        Pass ``transcript`` to reuse one that was already fetched.
+        """
+        if transcript is None:
+            transcript = await self.transcript(video_id)
+        with timed("prompt", notes_format=notes_format) as stage:
+            # count_tokens is a blocking API call on a cache miss.
+            plan = await asyncio.to_thread(
+                plan_generation, transcript.text, prompt, notes_format, transcript, model_name
+            )
+            output_lang_code = target_lang_code if single_pass else "en"
+            prompt = localize_prompt(prompt, output_lang_code)
+            stage["prompt_tokens"] = plan["prompt_tokens"]
+        model_name = plan["model"]
+        with timed("generation", notes_format=notes_format, model=model_name, route=plan["route"],
+                   chunks=plan["chunks"], input_tokens=plan["input_tokens"]) as stage:
+            if plan["route"] == "chunked":
+                summary = await self._map_reduce(transcript, prompt, model_name, output_lang_code)
+            else:
+                summary = await self.generate(prompt, marked_transcript(transcript), output_lang_code, model_name)
+            stage["output_tokens"] = estimate_tokens(summary)
+        if target_lang_code != output_lang_code:
+            summary = await self.translate(summary, target_lang_code, model_name)
+        return summary
+
+    async def notes_multi(self, video_id, prompts, target_lang_code="en", single_pass=True,
+                          model_name=DEFAULT_MODEL, transcript=None):
+        """Several formats from one transcript concurrently; returns ``(results, errors)`` by label."""
+        if transcript is None:
+            transcript = await self.transcript(video_id)
+        outcomes = await asyncio.gather(
+            *(
+                self.notes(video_id, prompt, target_lang_code, single_pass, label, model_name, transcript)
+                for label, prompt in prompts.items()
+            ),
+            return_exceptions=True,
+        )
+        results, errors = {}, {}
+        for label, outcome in zip(prompts, outcomes):
+            if isinstance(outcome, Exception):
+                errors[label] = outcome
+            else:
+                results[label] = outcome
+        return results, errors
+
+
+# =========================
+# SYNC BRIDGE
+# =========================
+_loop = None
+_service = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tubenotes-async", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def get_service():
+    """Process-wide ``NotesService``; run its coroutines with ``run``/``submit`` or on any one loop."""
+    global _service
+    with _loop_lock:
+        if _service is None:
+            _service = NotesService()
+        return _service
+
+
+def submit(coro):
+    """Schedule ``coro`` on the background loop; returns a ``concurrent.futures.Future``."""
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop())
+
+
+def run(coro, timeout=None):
+    """Run ``coro`` on the background loop and block until it finishes."""
+    return submit(coro).result(timeout)
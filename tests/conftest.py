@@ -0,0 +1,7 @@
+"""Make the top-level modules importable and keep test caches out of the repo."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("TUBENOTES_CACHE_DIR", tempfile.mkdtemp(prefix="tubenotes-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
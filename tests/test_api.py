@@ -0,0 +1,74 @@
+import json
+import threading
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from api import APIError, NotesAPIHandler, int_param, parse_notes_request
+from prompts import NOTES_FORMAT_PROMPTS
+
+FORMAT = next(iter(NOTES_FORMAT_PROMPTS))
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NotesAPIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def request(url, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    try:
+        with urlopen(Request(url, data=data, method="POST" if data else "GET")) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_parse_notes_request():
+    assert parse_notes_request({"url": "https://youtu.be/dQw4w9WgXcQ", "format": FORMAT, "lang": "en"}) == (
+        "dQw4w9WgXcQ", FORMAT, NOTES_FORMAT_PROMPTS[FORMAT], "en", True
+    )
+
+
+@pytest.mark.parametrize("body", [
+    {"format": FORMAT},
+    {"url": "https://youtu.be/dQw4w9WgXcQ?si=abc", "format": FORMAT},
+    {"video_id": ["dQw4w9WgXcQ"], "format": FORMAT},
+    {"url": 42, "format": FORMAT},
+    {"video_id": "dQw4w9WgXcQ", "format": ["Technical Notes"]},
+    {"video_id": "dQw4w9WgXcQ", "format": "Nope"},
+    {"video_id": "dQw4w9WgXcQ", "format": "Custom Prompt", "prompt": {"text": "x"}},
+    {"video_id": "dQw4w9WgXcQ", "format": FORMAT, "lang": ["en"]},
+    {"video_id": "dQw4w9WgXcQ", "format": FORMAT, "lang": "xx"},
+])
+def test_invalid_notes_requests_are_bad_requests(body):
+    with pytest.raises(APIError) as error:
+        parse_notes_request(body)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_int_param():
+    assert int_param({}, "limit", 20, maximum=100) == 20
+    assert int_param({"limit": "500"}, "limit", 20, maximum=100) == 100
+    for value in ("abc", "0", "-3"):
+        with pytest.raises(APIError):
+            int_param({"limit": value}, "limit", 20)
+
+
+def test_bad_limit_is_a_400(base_url):
+    status, body = request(f"{base_url}/library?limit=abc")
+    assert status == HTTPStatus.BAD_REQUEST
+    assert body["kind"] == "bad_request"
+    assert request(f"{base_url}/library?limit=5")[0] == HTTPStatus.OK
+
+
+def test_non_string_lang_is_a_400(base_url):
+    status, body = request(f"{base_url}/notes", {"video_id": "dQw4w9WgXcQ", "format": FORMAT, "lang": ["en"]})
+    assert status == HTTPStatus.BAD_REQUEST
+    assert body == {"error": "'lang' must be a string.", "kind": "bad_request"}
@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from chunking import chunk_segments
+from transcripts import SENTENCE_ENDINGS, Transcript, join_segments
+
+WORDS = ["gradient", "descent", "is", "a", "loss", "we", "model", "the", "step", "batch"]
+
+
+def reference_chunks(segments, max_chars, overlap_chars):
+    """The segment-by-segment implementation that ``chunk_segments`` replaced."""
+    chunks = []
+    soft_limit = max_chars * 0.8
+    start, total = 0, len(segments)
+    while start < total:
+        end, size = start, 0
+        while end < total:
+            length = len(segments[end]["text"]) + 1
+            if end > start and size + length > max_chars:
+                break
+            size += length
+            end += 1
+            if size >= soft_limit and segments[end - 1]["text"].rstrip().endswith(SENTENCE_ENDINGS):
+                break
+        last = segments[end - 1]
+        chunks.append({
+            "text": " ".join(seg["text"] for seg in segments[start:end]),
+            "start": segments[start]["start"],
+            "end": last["start"] + last.get("duration", 0),
+        })
+        if end >= total:
+            break
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried + len(segments[next_start - 1]["text"]) + 1 <= overlap_chars:
+            next_start -= 1
+            carried += len(segments[next_start]["text"]) + 1
+        start = next_start
+    return chunks
+
+
+def random_segments(rng, count):
+    segments, clock = [], 0.0
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        if rng.random() < 0.3:
+            text += rng.choice(SENTENCE_ENDINGS)
+        duration = rng.uniform(0.5, 8)
+        segments.append({"text": text, "start": round(clock, 2), "duration": round(duration, 2)})
+        clock += duration + (rng.uniform(0, 90) if rng.random() < 0.05 else 0)
+    return segments
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_the_previous_implementation(seed):
+    rng = random.Random(seed)
+    segments = random_segments(rng, rng.randint(0, 300))
+    max_chars = rng.randint(20, 2000)
+    overlap_chars = rng.randint(0, max_chars // 2)
+    chunks = chunk_segments(segments, max_chars, overlap_chars)
+    expected = reference_chunks(segments, max_chars, overlap_chars)
+    assert [{k: chunk[k] for k in ("text", "start", "end")} for chunk in chunks] == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunk_invariants(seed):
+    rng = random.Random(1000 + seed)
+    segments = random_segments(rng, rng.randint(1, 400))
+    max_chars = rng.randint(50, 1500)
+    overlap_chars = rng.randint(0, max_chars // 2)
+    transcript = Transcript.from_segments(segments)
+    chunks = chunk_segments(transcript, max_chars, overlap_chars)
+
+    assert chunks[0]["first"] == 0
+    assert chunks[-1]["stop"] == len(segments)
+    for chunk in chunks:
+        assert chunk["text"] == join_segments(segments[chunk["first"]:chunk["stop"]])
+        assert chunk["start"] == segments[chunk["first"]]["start"]
+        # Only a single segment longer than the budget may exceed it.
+        assert len(chunk["text"]) <= max_chars or chunk["stop"] - chunk["first"] == 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # Always moves forward, never leaves a gap, and overlaps by at most overlap_chars.
+        assert previous["first"] < chunk["first"] <= previous["stop"]
+        overlap = transcript.offsets[previous["stop"]] - transcript.offsets[chunk["first"]]
+        assert overlap <= overlap_chars
+
+
+def test_segment_list_and_transcript_give_the_same_chunks():
+    segments = random_segments(random.Random(7), 120)
+    assert chunk_segments(segments, 300, 60) == chunk_segments(Transcript.from_segments(segments), 300, 60)
+
+
+def test_short_transcript_is_one_chunk():
+    segments = [
+        {"text": "Hello there.", "start": 1.0, "duration": 2.0},
+        {"text": "Bye.", "start": 3.0, "duration": 1.5},
+    ]
+    assert chunk_segments(segments, 1000, 100) == [
+        {"text": "Hello there. Bye.", "start": 1.0, "end": 4.5, "first": 0, "stop": 2}
+    ]
+
+
+def test_empty_transcript_has_no_chunks():
+    assert chunk_segments([], 1000, 100) == []
+
+
+def test_direct_route_sends_the_transcript_with_time_markers(monkeypatch):
+    import pipeline
+    from chunking import MARKED_PREFIX, marked_transcript
+
+    sent = []
+    monkeypatch.setattr(pipeline, "_run", lambda prompt, text, *args: sent.append(text) or "notes")
+    segments = [
+        {"text": "intro", "start": 0.0, "duration": 5.0},
+        {"text": "main part", "start": 95.0, "duration": 5.0},
+    ]
+    plan = {"route": "direct", "model": "m", "chunks": 1, "input_tokens": 10, "prompt_tokens": 5, "est_seconds": 1}
+    assert pipeline.generate_notes("intro main part", "Prompt", segments=segments, plan=plan) == "notes"
+    assert sent == [MARKED_PREFIX + "[0:00] intro [1:35] main part"]
+    assert sent[0] == marked_transcript(Transcript.from_segments(segments))
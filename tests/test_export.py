@@ -0,0 +1,132 @@
+from html.parser import HTMLParser
+
+from export import markdown_to_html, render_html
+from prompts import NOTES_FORMAT_PROMPTS
+
+VOID_TAGS = {"hr", "br"}
+
+
+def flat(md_text):
+    return markdown_to_html(md_text).replace("\n", "")
+
+
+def assert_well_formed(html_text):
+    """Every opened tag is closed, in order."""
+    stack = []
+
+    class Checker(HTMLParser):
+        def handle_starttag(self, tag, attrs):
+            if tag not in VOID_TAGS:
+                stack.append(tag)
+
+        def handle_endtag(self, tag):
+            assert stack and stack[-1] == tag, f"</{tag}> closes {stack}"
+            stack.pop()
+
+    Checker().feed(html_text)
+    assert not stack, f"unclosed {stack}"
+
+
+def test_headings_keep_their_hierarchy_below_the_page_title():
+    assert flat("# A\n## B\n### C\n#### D") == "<h2>A</h2><h3>B</h3><h4>C</h4><h5>D</h5>"
+
+
+def test_deep_headings_are_capped_at_h6():
+    assert flat("# T\n##### E\n###### F") == "<h2>T</h2><h6>E</h6><h6>F</h6>"
+
+
+def test_shallowest_heading_maps_to_h2():
+    assert flat("### Video Summary\ntext\n#### Detail\n### Conclusion") == (
+        "<h2>Video Summary</h2><p>text</p><h3>Detail</h3><h2>Conclusion</h2>"
+    )
+
+
+def test_headings_inside_code_do_not_set_the_level():
+    html_text = flat("```python\n# comment\n```\n### Section")
+    assert html_text.endswith("<h2>Section</h2>")
+
+
+def test_format_prompt_sections_render_as_styled_h2():
+    for notes_format, prompt in NOTES_FORMAT_PROMPTS.items():
+        sections = [line for line in prompt.splitlines() if line.startswith("#")]
+        if not sections:
+            continue
+        body = markdown_to_html("\n\ntext\n\n".join(sections))
+        assert body.count("<h2>") == len(sections), notes_format
+    assert "h2 {" in render_html("### Video Summary")
+
+
+def test_heading_closing_hashes_and_inline_markup():
+    assert flat("## Use `pip` **now** ##") == "<h2>Use <code>pip</code> <strong>now</strong></h2>"
+
+
+def test_nested_lists():
+    html_text = flat("- a\n  - b\n    1. c\n- d")
+    assert html_text == "<ul><li>a<ul><li>b<ol><li>c</li></ol></li></ul></li><li>d</li></ul>"
+    assert_well_formed(html_text)
+
+
+def test_ordered_list_keeps_its_start_number():
+    assert flat("3. x\n4. y") == '<ol start="3"><li>x</li><li>y</li></ol>'
+
+
+def test_switching_list_type_at_the_same_indent_starts_a_new_list():
+    assert flat("- a\n1. b") == "<ul><li>a</li></ul><ol><li>b</li></ol>"
+
+
+def test_code_block_inside_a_list_item_stays_in_the_item():
+    html_text = markdown_to_html("- item\n  ```python\n  x = 1\n    y = 2\n  ```\n- next")
+    assert html_text.split("\n") == [
+        "<ul>", "<li>item", '<pre><code class="language-python">x = 1', "  y = 2</code></pre>",
+        "</li>", "<li>next", "</li></ul>",
+    ]
+    assert_well_formed(html_text)
+
+
+def test_code_is_escaped_and_not_rendered_as_markdown():
+    html_text = markdown_to_html("```\n# not a heading\n<b>**x**</b>\n```")
+    assert html_text == '<pre><code class="language-"># not a heading\n&lt;b&gt;**x**&lt;/b&gt;</code></pre>'
+
+
+def test_unclosed_fence_runs_to_the_end():
+    assert flat("```py\nprint(1)") == '<pre><code class="language-py">print(1)</code></pre>'
+
+
+def test_table_with_alignment_and_inline_markup():
+    html_text = flat("| a | b | c |\n|:--|:-:|--:|\n| 1 | **2** | `3` |")
+    assert html_text == (
+        "<table><thead><tr><th>a</th><th style=\"text-align:center\">b</th>"
+        "<th style=\"text-align:right\">c</th></tr></thead><tbody>"
+        "<tr><td>1</td><td style=\"text-align:center\"><strong>2</strong></td>"
+        "<td style=\"text-align:right\"><code>3</code></td></tr></tbody></table>"
+    )
+    assert_well_formed(html_text)
+
+
+def test_mermaid_block_is_left_for_mermaid_to_render():
+    assert flat("```mermaid\ngraph TD; A-->B\n```") == '<pre class="mermaid">graph TD; A--&gt;B</pre>'
+
+
+def test_mermaid_script_is_only_included_when_needed():
+    assert "mermaid.esm" in render_html("```mermaid\ngraph TD; A-->B\n```")
+    assert "mermaid.esm" not in render_html("# Plain notes")
+
+
+def test_paragraphs_quotes_and_rules():
+    html_text = flat("one\ntwo\n\n> quoted\n> text\n\n---\nthree")
+    assert html_text == "<p>one two</p><blockquote>quoted text</blockquote><hr><p>three</p>"
+
+
+def test_text_and_unsafe_links_are_escaped():
+    assert flat("a <b> & [x](javascript:alert(1))") == "<p>a &lt;b&gt; &amp; [x](javascript:alert(1))</p>"
+    assert flat("[docs](https://example.com/?a=1&b=2)") == (
+        '<p><a href="https://example.com/?a=1&amp;b=2">docs</a></p>'
+    )
+
+
+def test_mixed_document_is_well_formed():
+    notes = (
+        "# Title\n\nIntro *text*.\n\n## Steps\n\n1. First\n   - detail\n     ```bash\n     ls\n     ```\n"
+        "2. Second\n\n| k | v |\n|---|---|\n| a | b |\n\n> note\n"
+    )
+    assert_well_formed(markdown_to_html(notes))
@@ -0,0 +1,83 @@
+import random
+
+import fingerprint
+from library import NotesLibrary
+
+VOCABULARY = [f"word{i}" for i in range(500)]
+
+
+def talk(seed, words=600):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def jaccard(a, b):
+    sa, sb = fingerprint.shingles(a), fingerprint.shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def edited(text, seed, fraction):
+    """``text`` with about ``fraction`` of its words replaced."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) if rng.random() < fraction else word for word in text.split())
+
+
+def test_shingles():
+    assert fingerprint.shingles("A b c", size=2) == {"a b", "b c"}
+    assert fingerprint.shingles("too short", size=5) == set()
+
+
+def test_short_text_has_no_signature():
+    assert fingerprint.signature("only a few words here") is None
+
+
+def test_signature_is_deterministic_and_case_insensitive():
+    text = talk(1)
+    sig = fingerprint.signature(text)
+    assert len(sig) == fingerprint.NUM_HASHES
+    assert sig == fingerprint.signature(text.upper())
+    assert fingerprint.similarity(sig, sig) == 1.0
+
+
+def test_similarity_estimates_jaccard():
+    original = talk(2)
+    for seed, fraction in enumerate((0.02, 0.05, 0.1, 0.3)):
+        copy = edited(original, seed, fraction)
+        estimate = fingerprint.similarity(fingerprint.signature(original), fingerprint.signature(copy))
+        assert abs(estimate - jaccard(original, copy)) < 0.15
+
+
+def test_unrelated_transcripts_are_not_similar():
+    assert fingerprint.similarity(fingerprint.signature(talk(3)), fingerprint.signature(talk(4))) < 0.1
+
+
+def test_near_duplicates_share_a_band_and_unrelated_ones_do_not():
+    original = talk(5)
+    keys = fingerprint.band_keys(fingerprint.signature(original))
+    assert len(keys) == fingerprint.BANDS
+    mirror = set(fingerprint.band_keys(fingerprint.signature(edited(original, 6, 0.02))))
+    other = set(fingerprint.band_keys(fingerprint.signature(talk(7))))
+    assert mirror & set(keys)
+    assert not other & set(keys)
+
+
+def test_blob_round_trip():
+    sig = fingerprint.signature(talk(8))
+    assert fingerprint.from_blob(fingerprint.to_blob(sig)) == sig
+
+
+def test_library_reuses_notes_of_a_near_duplicate(tmp_path):
+    library = NotesLibrary(str(tmp_path / "library.sqlite3"))
+    original = talk(9)
+    assert library.reuse_similar("orig", original, "Technical Notes", "prompt", "en") is None
+    library.save("orig", "Technical Notes", "prompt", "en", "# Notes")
+
+    reused = library.reuse_similar("mirror", edited(original, 10, 0.02), "Technical Notes", "prompt", "en")
+    assert reused["notes"] == "# Notes"
+    assert reused["source_video_id"] == "orig"
+    assert reused["similarity"] >= 0.8
+    assert library.lookup("mirror", "prompt", "en")["notes"] == "# Notes"
+
+    # A different prompt or an unrelated transcript gets nothing.
+    assert library.reuse_similar("mirror", edited(original, 10, 0.02), "Q&A", "other prompt", "en") is None
+    assert library.reuse_similar("unrelated", talk(11), "Technical Notes", "prompt", "en") is None
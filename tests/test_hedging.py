@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hedging import MIN_SAMPLES, Dispatcher, call_kind
+
+
+def dispatcher(fallbacks=(), hedge_after=0.05, max_hedges=1):
+    return Dispatcher(fallback_models=fallbacks, hedge_after=hedge_after, max_hedges=max_hedges, probe_results={})
+
+
+def warm(d, model, kind, seconds=0.01):
+    for _ in range(MIN_SAMPLES):
+        d._observe(model, kind, seconds)
+
+
+def test_call_kind_size_classes():
+    assert call_kind(10, stream=True) == "first_chunk"
+    assert call_kind(10) == call_kind(2048) == "full:0"
+    assert call_kind(2049) == call_kind(8192) == "full:1"
+    assert call_kind(30_000) == "full:2"
+
+
+def test_cold_delay_only_applies_to_streams():
+    d = dispatcher(hedge_after=30)
+    assert d.hedge_after("main", "first_chunk") == 30
+    assert d.hedge_after("main", "full:2") is None
+    warm(d, "main", "full:2", seconds=4.0)
+    assert d.hedge_after("main", "full:2") == 4.0
+    # Fast streams never shorten the delay for full calls.
+    warm(d, "main", "first_chunk", seconds=0.01)
+    assert d.hedge_after("main", "full:2") == 4.0
+
+
+def test_fast_call_is_not_hedged():
+    d = dispatcher()
+    assert d.call(lambda model: f"ok from {model}", "main", "first_chunk") == ("ok from main", "main")
+    assert d.metrics()["hedges"] == 0
+
+
+def test_slow_stream_is_hedged_and_the_hedge_wins():
+    d = dispatcher(fallbacks=["backup"])
+    release = threading.Event()
+
+    def attempt(model):
+        if model == "main":
+            release.wait(2)
+        return model
+
+    try:
+        assert d.call(attempt, "main", "first_chunk") == ("backup", "backup")
+    finally:
+        release.set()
+    stats = d.metrics()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_hedge_without_fallbacks_duplicates_on_the_same_model():
+    d = dispatcher()
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        if len(calls) == 1:
+            time.sleep(0.5)
+        return len(calls)
+
+    result, model = d.call(attempt, "main", "first_chunk")
+    assert model == "main" and result == 2
+    assert calls == ["main", "main"]
+
+
+def test_cold_full_call_is_not_hedged():
+    d = dispatcher(fallbacks=["backup"], hedge_after=0.01)
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        time.sleep(0.1)
+        return model
+
+    assert d.call(attempt, "main", "full:2") == ("main", "main")
+    assert calls == ["main"]
+
+
+def test_warm_full_call_is_hedged_after_its_p95():
+    d = dispatcher(fallbacks=["backup"], hedge_after=30)
+    warm(d, "main", "full:0", seconds=0.02)
+    release = threading.Event()
+
+    def attempt(model):
+        if model == "main":
+            release.wait(2)
+        return model
+
+    try:
+        assert d.call(attempt, "main", "full:0") == ("backup", "backup")
+    finally:
+        release.set()
+
+
+def test_failure_falls_back_to_the_next_model():
+    d = dispatcher(fallbacks=["backup"])
+
+    def attempt(model):
+        if model == "main":
+            raise RuntimeError("quota")
+        return "fine"
+
+    assert d.call(attempt, "main", "full:0") == ("fine", "backup")
+    assert d.metrics()["fallbacks"] == 1
+
+
+def test_error_propagates_when_every_model_fails():
+    d = dispatcher(fallbacks=["backup"])
+
+    def attempt(model):
+        raise RuntimeError(f"{model} down")
+
+    with pytest.raises(RuntimeError, match="down"):
+        d.call(attempt, "main", "full:0")
+    assert d.metrics()["failures"] == 1
+
+
+def test_hedges_are_capped():
+    d = dispatcher(fallbacks=["b", "c"], hedge_after=0.01, max_hedges=1)
+    calls = []
+    done = threading.Event()
+
+    def attempt(model):
+        calls.append(model)
+        done.wait(0.3)
+        return model
+
+    result, model = d.call(attempt, "main", "first_chunk")
+    done.set()
+    assert len(calls) == 2
+    assert model == result
+
+
+def test_fallbacks_are_tried_fastest_first():
+    probes = {"slow": {"median_seconds": 9}, "fast": {"median_seconds": 1}}
+    d = Dispatcher(fallback_models=["slow", "fast"], probe_results=probes)
+    assert d.candidates("main") == ["main", "fast", "slow"]
+
+
+def test_disabled_dispatcher_never_hedges():
+    d = Dispatcher(fallback_models=[], hedge_after=0.01, enabled=False, probe_results={})
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        time.sleep(0.1)
+        return model
+
+    d.call(attempt, "main", "first_chunk")
+    assert calls == ["main"]
+
+
+def test_async_losing_attempt_is_cancelled():
+    d = dispatcher(fallbacks=["backup"])
+    cancelled = []
+
+    async def attempt(model):
+        if model == "main":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+        return model
+
+    async def run():
+        result = await d.call_async(attempt, "main", "first_chunk")
+        await asyncio.sleep(0)  # let the cancellation be delivered
+        return result
+
+    assert asyncio.run(run()) == ("backup", "backup")
+    assert cancelled == ["main"]
+
+
+def test_async_failure_falls_back():
+    d = dispatcher(fallbacks=["backup"])
+
+    async def attempt(model):
+        if model == "main":
+            raise RuntimeError("quota")
+        return "fine"
+
+    assert asyncio.run(d.call_async(attempt, "main", "full:0")) == ("fine", "backup")
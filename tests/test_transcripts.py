@@ -0,0 +1,129 @@
+import pytest
+
+import transcripts
+from cache import make_key, transcript_cache
+from transcripts import (
+    Transcript, format_timestamp, get_video_id, is_video_id, join_segments, link_timestamps, prefetch_transcript
+)
+
+SEGMENTS = [
+    {"text": "welcome", "start": 0.0, "duration": 4.0},
+    {"text": "to the talk", "start": 4.0, "duration": 6.0},
+    {"text": "after a pause", "start": 65.0, "duration": 5.0},
+    {"text": "the end", "start": 200.0, "duration": 3.5},
+]
+
+
+@pytest.fixture
+def transcript():
+    return Transcript.from_segments(SEGMENTS)
+
+
+def test_text_matches_joined_segments(transcript):
+    assert transcript.text == join_segments(SEGMENTS)
+    assert len(transcript) == len(SEGMENTS)
+    assert [transcript.segment_text(i) for i in range(len(transcript))] == [s["text"] for s in SEGMENTS]
+
+
+def test_segments_round_trip(transcript):
+    assert transcript.segments() == SEGMENTS
+
+
+def test_span_text_and_end_time(transcript):
+    assert transcript.span_text(1, 3) == "to the talk after a pause"
+    assert transcript.end_time(3) == 203.5
+
+
+def test_segment_at_every_character_offset(transcript):
+    for index in range(len(SEGMENTS)):
+        first = transcript.offsets[index]
+        for offset in range(first, first + len(SEGMENTS[index]["text"])):
+            assert transcript.segment_at(offset) == index
+            assert transcript.timestamp_at(offset) == SEGMENTS[index]["start"]
+    # The separating space belongs to the segment before it; offsets past the end clamp to the last one.
+    assert transcript.segment_at(len("welcome")) == 0
+    assert transcript.segment_at(len(transcript.text) + 10) == len(SEGMENTS) - 1
+
+
+@pytest.mark.parametrize(
+    "seconds, index", [(-5, 0), (0, 0), (3.9, 0), (4, 1), (64.9, 1), (65, 2), (199, 2), (900, 3)]
+)
+def test_segment_at_time(transcript, seconds, index):
+    assert transcript.segment_at_time(seconds) == index
+    assert transcript.offset_at_time(seconds) == transcript.offsets[index]
+
+
+def test_marked_text_marks_the_segment_after_a_gap(transcript):
+    assert transcript.marked_text(0, 4) == "[0:00] welcome to the talk [1:05] after a pause [3:20] the end"
+
+
+def test_marked_text_on_a_range(transcript):
+    assert transcript.marked_text(1, 3) == "[0:04] to the talk [1:05] after a pause"
+    assert transcript.marked_text(2, 2) == ""
+
+
+def test_marked_text_once_per_interval():
+    segments = [{"text": f"s{i}", "start": i * 10.0, "duration": 10.0} for i in range(20)]
+    marked = Transcript.from_segments(segments).marked_text(0, 20, interval=60)
+    assert marked == (
+        "[0:00] s0 s1 s2 s3 s4 s5 [1:00] s6 s7 s8 s9 s10 s11 [2:00] s12 s13 s14 s15 s16 s17 [3:00] s18 s19"
+    )
+
+
+def test_empty_transcript():
+    transcript = Transcript.from_segments([])
+    assert len(transcript) == 0
+    assert transcript.text == ""
+    assert transcript.segments() == []
+
+
+def test_format_timestamp():
+    assert format_timestamp(5) == "0:05"
+    assert format_timestamp(200.7) == "3:20"
+    assert format_timestamp(3725) == "1:02:05"
+
+
+def test_link_timestamps():
+    notes = "## Intro [1:05]\nSee [1:02:05] and [link](https://x.y) but not [1:05](already)."
+    assert link_timestamps(notes, "abc") == (
+        "## Intro [1:05](https://youtu.be/abc?t=65)\nSee [1:02:05](https://youtu.be/abc?t=3725)"
+        " and [link](https://x.y) but not [1:05](already)."
+    )
+    assert link_timestamps(notes, None) == notes
+
+
+def test_get_video_id():
+    assert get_video_id("https://youtu.be/abc123") == "abc123"
+    assert get_video_id("https://www.youtube.com/watch?v=abc123&t=5") == "abc123"
+    assert get_video_id("https://example.com/video") is None
+
+
+def test_is_video_id():
+    assert is_video_id("dQw4w9WgXcQ")
+    assert is_video_id("a-b_c123456")
+    assert not is_video_id("dQw4w9WgXcQ?si=abc")
+    assert not is_video_id("short")
+    assert not is_video_id(None)
+
+
+def test_prefetch_skips_invalid_ids_and_cached_transcripts(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(transcripts._prefetch_pool, "submit", lambda *args: submitted.append(args))
+    assert prefetch_transcript("dQw4w9WgXcQ?si=abc") is None
+
+    key = make_key("transcript", "cachedVid01", list(transcripts.DEFAULT_LANGUAGES))
+    transcript_cache.set(key, SEGMENTS)
+    hits = transcript_cache.stats()["hits"]
+    assert prefetch_transcript("cachedVid01") is None
+    assert transcript_cache.stats()["hits"] == hits  # checking for the entry is not a cache hit
+    assert submitted == []
+
+
+def test_sentence_ends_are_indexed_once():
+    segments = [
+        {"text": "First sentence.", "start": 0.0, "duration": 1.0},
+        {"text": "goes on", "start": 1.0, "duration": 1.0},
+        {"text": "and ends? ", "start": 2.0, "duration": 1.0},
+        {"text": "是的。", "start": 3.0, "duration": 1.0},
+    ]
+    assert list(Transcript.from_segments(segments).sentence_ends) == [0, 2, 3]
@@ -0,0 +1,91 @@
+from translation import (
+    PLACEHOLDER, assemble, extract_code_blocks, restore_code, split_sections, translation_pieces, with_code
+)
+
+NOTES = """# Setup
+
+Install the tools first.
+
+```bash
+pip install numpy
+```
+
+## Usage
+
+- Import it:
+  ```python
+  import numpy as np
+  ```
+- Then call it.
+
+```mermaid
+graph TD; A-->B
+```
+
+## Summary
+Done.
+"""
+
+
+def identity_outputs(pieces):
+    """What a perfect translation into the same language would return."""
+    return [piece["text"] for piece in pieces]
+
+
+def test_round_trip_without_translation_gives_back_the_notes():
+    pieces, code_blocks = translation_pieces(NOTES, max_chars=40)
+    outputs = [restore_code(text, piece, code_blocks) for text, piece in zip(identity_outputs(pieces), pieces)]
+    assert assemble(pieces, outputs) == NOTES
+
+
+def test_round_trip_with_one_large_piece():
+    pieces, code_blocks = translation_pieces(NOTES, max_chars=10_000)
+    assert len(pieces) == 1
+    outputs = [restore_code(piece["text"], piece, code_blocks) for piece in pieces]
+    assert assemble(pieces, outputs) == NOTES
+
+
+def test_code_never_reaches_the_model():
+    pieces, code_blocks = translation_pieces(NOTES, max_chars=40)
+    assert len(code_blocks) == 3
+    sent = "\n".join(piece["text"] for piece in pieces if piece["translate"])
+    for needle in ("pip install", "import numpy", "graph TD"):
+        assert needle not in sent
+
+
+def test_nested_code_keeps_its_indentation():
+    text, code_blocks = extract_code_blocks("- item\n  ```python\n  x = 1\n  ```")
+    assert text == "- item\n  " + PLACEHOLDER.format(0)
+    assert with_code(text, code_blocks) == "- item\n  ```python\n  x = 1\n  ```"
+
+
+def test_code_only_piece_needs_no_model_call():
+    pieces, _ = translation_pieces("```python\nx = 1\n```\n# Title\nText", max_chars=10)
+    assert [piece["translate"] for piece in pieces] == [False, True]
+
+
+def test_restore_code_puts_code_into_a_translated_piece():
+    pieces, code_blocks = translation_pieces("# Title\nRun this:\n```bash\nls\n```\n", max_chars=1000)
+    translated = "# Titre\nExécutez ceci :\n" + PLACEHOLDER.format(0)
+    assert restore_code(translated, pieces[0], code_blocks) == "# Titre\nExécutez ceci :\n```bash\nls\n```"
+
+
+def test_restore_code_rejects_lost_or_altered_placeholders():
+    pieces, code_blocks = translation_pieces("Text\n```\na\n```\nMore\n```\nb\n```", max_chars=1000)
+    piece = pieces[0]
+    assert restore_code("Texte", piece, code_blocks) is None
+    assert restore_code("Texte " + PLACEHOLDER.format(0) + " " + PLACEHOLDER.format(0), piece, code_blocks) is None
+    assert restore_code(PLACEHOLDER.format(1) + " " + PLACEHOLDER.format(0), piece, code_blocks) is not None
+
+
+def test_split_sections_breaks_at_headings_and_joins_back():
+    text = "intro\n# A\na\n## B\nb\n### C\nc"
+    pieces = split_sections(text, max_chars=8)
+    assert pieces == ["intro", "# A\na", "## B\nb", "### C\nc"]
+    assert "\n".join(pieces) == text
+    assert "\n".join(split_sections(text, max_chars=1000)) == text
+
+
+def test_oversized_section_is_kept_whole():
+    section = "# Long\n" + "word " * 50
+    assert split_sections(section, max_chars=10) == [section]
@@ -0,0 +1,267 @@
+"""Transcript fetching with the persistent transcript cache in front of YouTube."""
+import logging
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from cache import make_key, transcript_cache
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = ("en", "hi")
+VIDEO_ID_RE = re.compile(r"[\w-]{11}")
+SENTENCE_ENDINGS = (".", "?", "!", "。", "？", "！")
+PREFETCH_WORKERS = int(os.environ.get("TUBENOTES_PREFETCH_WORKERS", 2))
+
+# One lock per cache key so concurrent requests for the same video (e.g. several
+# formats fanned out at once) wait for a single fetch instead of each calling YouTube.
+# Entries are ``[lock, users]`` and are dropped when the last user is done.
+_fetch_locks = {}
+_fetch_locks_guard = threading.Lock()
+
+
+def get_video_id(url):
+    """Extract YouTube video ID from link."""
+    try:
+        if "youtu.be" in url:
+            return url.split("/")[-1]
+        elif "youtube.com" in url:
+            query = urlparse(url).query
+            return parse_qs(query)["v"][0]
+    except:
+        return None
+    return None
+
+
+def is_video_id(video_id):
+    """Whether ``video_id`` looks like a YouTube video ID (11 URL-safe characters)."""
+    return bool(video_id and VIDEO_ID_RE.fullmatch(video_id))
+
+
+def fetch_transcript(video_id, languages=DEFAULT_LANGUAGES):
+    """Return the raw transcript segments for a video, using the cache when possible.
+
+    Segments are the ``{"text", "start", "duration"}`` dicts returned by
+    ``YouTubeTranscriptApi.get_transcript``. Errors from the API propagate to
+    the caller so the UI and batch tools can report them their own way.
+    """
+    key = make_key("transcript", video_id, list(languages))
+    with timed("transcript", video_id=video_id, cached=True) as stage:
+        segments = transcript_cache.get(key)
+        if segments is not None:
+            return segments
+
+        with _fetch_locks_guard:
+            entry = _fetch_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                segments = transcript_cache.get(key)
+                if segments is not None:
+                    return segments
+                stage["cached"] = False
+                transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages))
+                segments = [
+                    {"text": item["text"], "start": item["start"], "duration": item["duration"]}
+                    for item in transcript_data
+                ]
+                transcript_cache.set(key, segments)
+                return segments
+        finally:
+            with _fetch_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del _fetch_locks[key]
+
+
+# Speculative fetches started before the user asks for notes. Futures are kept
+# per cache key at module level, so every Streamlit rerun and session sees the
+# same in-flight fetch instead of starting another one.
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="transcript-prefetch")
+_prefetches = {}
+_prefetches_guard = threading.Lock()
+
+
+def _prefetch(video_id, languages):
+    try:
+        fetch_transcript(video_id, languages)
+    except Exception as e:
+        # The real request reports the error; a speculative fetch only logs it.
+        logger.info("transcript prefetch for %s failed: %s", video_id, e)
+
+
+def prefetch_transcript(video_id, languages=DEFAULT_LANGUAGES):
+    """Start fetching a transcript into the cache in the background.
+
+    Returns the fetch's future, or None when the transcript is already cached
+    or ``video_id`` is not a valid video ID.
+
+    Calling this again for the same video while the fetch is pending or
+    running returns the existing future. A later ``fetch_transcript`` for the
+    video waits on the in-flight fetch rather than calling YouTube again.
+    """
+    key = make_key("transcript", video_id, list(languages))
+    with _prefetches_guard:
+        future = _prefetches.get(key)
+    if future is not None:
+        return future
+    if not is_video_id(video_id) or transcript_cache.contains(key):
+        return None
+    with _prefetches_guard:
+        future = _prefetches.get(key)
+        if future is not None:
+            return future
+        future = _prefetches[key] = _prefetch_pool.submit(_prefetch, video_id, tuple(languages))
+    # Outside the guard: the callback takes it, and runs at once if the fetch already finished.
+    future.add_done_callback(lambda done: _forget_prefetch(key, done))
+    return future
+
+
+def _forget_prefetch(key, future):
+    with _prefetches_guard:
+        if _prefetches.get(key) is future:
+            del _prefetches[key]
+
+
+def cancel_prefetch(video_id, languages=DEFAULT_LANGUAGES):
+    """Cancel a prefetch that has not started yet; returns whether it was cancelled.
+
+    A fetch already talking to YouTube runs to completion and is cached.
+    """
+    key = make_key("transcript", video_id, list(languages))
+    with _prefetches_guard:
+        future = _prefetches.get(key)
+    return bool(future and future.cancel())
+
+
+def format_timestamp(seconds):
+    """Format seconds as ``h:mm:ss`` or ``m:ss``."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def join_segments(segments):
+    """Join transcript segments into the flat text sent to the model."""
+    return " ".join(entry["text"] for entry in segments)
+
+
+class Transcript:
+    """A transcript as one text buffer plus parallel per-segment arrays.
+
+    ``offsets[i]`` is where segment ``i`` starts in ``text`` (segments are
+    joined with single spaces, exactly like ``join_segments``), and
+    ``starts``/``durations`` hold its video time in seconds. A final sentinel
+    offset of ``len(text) + 1`` closes the last segment. ``sentence_ends``
+    lists, in order, the segments whose text ends a sentence. Lookups between
+    character offsets, segment indices and timestamps are binary searches.
+    """
+
+    __slots__ = ("text", "offsets", "starts", "durations", "sentence_ends")
+
+    def __init__(self, text, offsets, starts, durations, sentence_ends):
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.durations = durations
+        self.sentence_ends = sentence_ends
+
+    @classmethod
+    def from_segments(cls, segments):
+        offsets, starts, durations, sentence_ends = array("q"), array("d"), array("d"), array("q")
+        position = 0
+        for index, segment in enumerate(segments):
+            offsets.append(position)
+            starts.append(segment["start"])
+            durations.append(segment.get("duration", 0))
+            if segment["text"].rstrip().endswith(SENTENCE_ENDINGS):
+                sentence_ends.append(index)
+            position += len(segment["text"]) + 1
+        offsets.append(max(position, 1))
+        return cls(join_segments(segments), offsets, starts, durations, sentence_ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def segment_text(self, index):
+        return self.text[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def span_text(self, first, stop):
+        """Text of segments ``first`` up to (not including) ``stop``."""
+        return self.text[self.offsets[first]:self.offsets[stop] - 1]
+
+    def end_time(self, index):
+        return self.starts[index] + self.durations[index]
+
+    def segment_at(self, offset):
+        """Index of the segment containing character ``offset``."""
+        return min(max(bisect_right(self.offsets, offset) - 1, 0), len(self) - 1)
+
+    def timestamp_at(self, offset):
+        """Video time (seconds) at which the text at character ``offset`` is spoken."""
+        return self.starts[self.segment_at(offset)]
+
+    def segment_at_time(self, seconds):
+        """Index of the segment being spoken at ``seconds``."""
+        return max(bisect_right(self.starts, seconds) - 1, 0)
+
+    def offset_at_time(self, seconds):
+        return self.offsets[self.segment_at_time(seconds)]
+
+    def marked_text(self, first, stop, interval=60):
+        """Span text with ``[m:ss]`` markers, one per ``interval`` seconds of video.
+
+        A marker goes before the first segment and then before the first
+        segment starting at least ``interval`` seconds after the last marker.
+        """
+        if first >= stop:
+            return ""
+        marks = [first]
+        while True:
+            # Step from the last marked segment's start, so a segment after a gap is never skipped.
+            index = bisect_left(self.starts, self.starts[marks[-1]] + interval, marks[-1] + 1, stop)
+            if index >= stop:
+                break
+            marks.append(index)
+        parts = []
+        for n, index in enumerate(marks):
+            end = marks[n + 1] if n + 1 < len(marks) else stop
+            parts.append(f"[{format_timestamp(self.starts[index])}] {self.span_text(index, end)}")
+        return " ".join(parts)
+
+    def segments(self):
+        """The transcript back as ``{"text", "start", "duration"}`` dicts."""
+        return [
+            {"text": self.segment_text(i), "start": self.starts[i], "duration": self.durations[i]}
+            for i in range(len(self))
+        ]
+
+
+def timestamp_url(video_id, seconds):
+    """Link to ``video_id`` starting at ``seconds``."""
+    return f"https://youtu.be/{video_id}?t={int(seconds)}"
+
+
+TIMESTAMP_RE = re.compile(r"\[((?:\d+:)?\d{1,2}:\d{2})\](?!\()")
+
+
+def link_timestamps(notes, video_id):
+    """Turn ``[m:ss]`` / ``[h:mm:ss]`` markers in notes into links to that moment of the video."""
+    if not video_id:
+        return notes
+
+    def link(match):
+        seconds = 0
+        for part in match.group(1).split(":"):
+            seconds = seconds * 60 + int(part)
+        return f"[{match.group(1)}]({timestamp_url(video_id, seconds)})"
+
+    return TIMESTAMP_RE.sub(link, notes)
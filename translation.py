@@ -0,0 +1,102 @@
+"""Splitting finished notes into sections for parallel translation.
+
+Fenced code and Mermaid blocks never reach the model: each is swapped for a
+one-line placeholder that the translation has to keep, and put back
+afterwards. The remaining markdown is split at headings and consecutive
+sections are packed into pieces of up to ``TRANSLATION_SECTION_CHARS``, which
+``pipeline.translate_notes`` and ``service.NotesService.translate`` translate
+concurrently and reassemble in order.
+"""
+import os
+import re
+
+TRANSLATION_SECTION_CHARS = int(os.environ.get("TUBENOTES_TRANSLATION_SECTION_CHARS", 6000))
+TRANSLATION_WORKERS = int(os.environ.get("TUBENOTES_TRANSLATION_WORKERS", 4))
+
+FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+HEADING_RE = re.compile(r"^#{1,6}\s")
+PLACEHOLDER = "@@CODE_{}@@"
+PLACEHOLDER_RE = re.compile(r"@@CODE_(\d+)@@")
+
+
+def extract_code_blocks(notes):
+    """Replace fenced blocks with placeholder lines; returns ``(text, code_blocks)``."""
+    lines = notes.split("\n")
+    out, code_blocks = [], []
+    i = 0
+    while i < len(lines):
+        fence = FENCE_RE.match(lines[i])
+        if not fence:
+            out.append(lines[i])
+            i += 1
+            continue
+        end = i + 1
+        while end < len(lines) and not lines[end].strip().startswith(fence.group(1)):
+            end += 1
+        indent = lines[i][:len(lines[i]) - len(lines[i].lstrip())]
+        # The placeholder keeps the fence's indentation (e.g. code nested in a list item).
+        out.append(indent + PLACEHOLDER.format(len(code_blocks)))
+        code_blocks.append("\n".join([lines[i].lstrip()] + lines[i + 1:end + 1]))
+        i = end + 1
+    return "\n".join(out), code_blocks
+
+
+def split_sections(text, max_chars=TRANSLATION_SECTION_CHARS):
+    """Split markdown at headings, packing consecutive sections into pieces of up to ``max_chars``.
+
+    ``"\\n".join`` of the result gives back ``text``.
+    """
+    sections, current = [], []
+    for line in text.split("\n"):
+        if HEADING_RE.match(line) and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    sections.append("\n".join(current))
+
+    pieces = []
+    for section in sections:
+        if pieces and len(pieces[-1]) + 1 + len(section) <= max_chars:
+            pieces[-1] += "\n" + section
+        else:
+            pieces.append(section)
+    return pieces
+
+
+def translation_pieces(notes, max_chars=TRANSLATION_SECTION_CHARS):
+    """Notes split for translation: ``(pieces, code_blocks)``.
+
+    Each piece is a dict with the ``text`` to translate (code replaced by
+    placeholders, surrounding whitespace removed), that whitespace as ``lead``
+    and ``trail``, and ``translate`` set to False when the piece has no prose
+    at all and needs no model call.
+    """
+    text, code_blocks = extract_code_blocks(notes)
+    pieces = []
+    for section in split_sections(text, max_chars):
+        body = section.strip()
+        start = section.find(body) if body else len(section)
+        pieces.append({
+            "text": body,
+            "lead": section[:start],
+            "trail": section[start + len(body):],
+            "translate": bool(PLACEHOLDER_RE.sub("", body).strip()),
+        })
+    return pieces, code_blocks
+
+
+def with_code(text, code_blocks):
+    """``text`` with its placeholders replaced by the original code blocks."""
+    return PLACEHOLDER_RE.sub(lambda match: code_blocks[int(match.group(1))], text)
+
+
+def restore_code(translated, piece, code_blocks):
+    """Put the code back into a translated piece; None if the translation lost or altered a placeholder."""
+    if sorted(PLACEHOLDER_RE.findall(translated)) != sorted(PLACEHOLDER_RE.findall(piece["text"])):
+        return None
+    return with_code(translated.strip(), code_blocks)
+
+
+def assemble(pieces, outputs):
+    """Join translated pieces back together with their original surrounding whitespace."""
+    return "\n".join(piece["lead"] + output + piece["trail"] for piece, output in zip(pieces, outputs))